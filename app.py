@@ -1,195 +1,244 @@
 import streamlit as st
 import pandas as pd
 import plotly.express as px
-from search_articles import search_articles, get_search_domains
+from search_articles import iter_search_articles, results_to_dataframe, get_search_domains, SUMMARY_MODE
 import json
 import time
 import os
-import traceback
+import uuid
+import numpy as np
 from datetime import datetime
-from vector_store import initialize_pinecone, store_article_chunks
+from article_store import upsert_articles, save_selection
+from article_export import export_csv, export_json, export_parquet, import_parquet, with_content, save_upload, remove_upload
+from ingestion_queue import (
+    ACTIVE_STATES, enqueue_ingestion, start_worker, get_job, list_jobs, cancel_job, retry_failed_articles, format_job_status
+)
 
 st.set_page_config(page_title="Medical Research Explorer", layout="wide")
 
+# Number of articles shown per page of results
+RESULTS_PAGE_SIZE = int(os.getenv("RESULTS_PAGE_SIZE", "25"))
+
+# Seconds between refreshes of the ingestion job status
+INGESTION_STATUS_INTERVAL = 2
+
 # Initialize session state variables
 if 'search_complete' not in st.session_state:
     st.session_state.search_complete = False
-if 'selected_articles' not in st.session_state:
-    st.session_state.selected_articles = {}
+if 'selected_mask' not in st.session_state:
+    # One flag per row of original_results, by position
+    st.session_state.selected_mask = np.zeros(0, dtype=bool)
 if 'processed_results' not in st.session_state:
     st.session_state.processed_results = None
 if 'original_results' not in st.session_state:
     st.session_state.original_results = None
-if 'total_chunks_stored' not in st.session_state:
-    st.session_state.total_chunks_stored = 0
+if 'ingestion_job_id' not in st.session_state:
+    st.session_state.ingestion_job_id = None
+if 'imported_results_path' not in st.session_state:
+    st.session_state.imported_results_path = None
+if 'results_version' not in st.session_state:
+    st.session_state.results_version = None
 
 def load_results():
-    # The app doesn't need to read search_results.csv
+    # Results are kept in session state; the article store holds them across sessions
     return None
 
-def display_summary_stats(df):
+def set_results(df, imported_path=None):
+    """Make df the current result set, with nothing selected."""
+    # The upload behind the previous results is no longer needed
+    previous_path = st.session_state.get('imported_results_path')
+    if previous_path and previous_path != imported_path:
+        remove_upload(previous_path)
+    
+    st.session_state.original_results = df
+    st.session_state.processed_results = df
+    st.session_state.selected_mask = np.zeros(len(df), dtype=bool)
+    st.session_state.imported_results_path = imported_path
+    # Key for everything derived from this result set; unique across sessions because st.cache_data is shared
+    st.session_state.results_version = uuid.uuid4().hex
+    st.session_state.results_page = 1
+
+# Derived artifacts are cached by result set version. The DataFrame argument is
+# not hashed (leading underscore), so a rerun costs a dictionary lookup instead
+# of hashing or recomputing the whole result set.
+@st.cache_data(max_entries=32, show_spinner=False)
+def get_summary_stats(results_version, _df):
+    source_counts = _df['Source_Type'].value_counts()
+    return {
+        'total': len(_df),
+        'research_papers': int(source_counts.get('Research Paper', 0)),
+        'clinical_trials': int(source_counts.get('Clinical Trial', 0))
+    }
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def get_source_distribution_figure(results_version, _df):
+    source_counts = _df['Source_Type'].value_counts().reset_index()
+    source_counts.columns = ['Source Type', 'Count']
+    
+    return px.pie(source_counts, values='Count', names='Source Type', 
+                  title='Distribution of Source Types')
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def get_phase_distribution_figure(results_version, _df):
+    # Filter out NaN values
+    phase_df = _df[_df['Development_Phase'].notna()]
+    
+    if phase_df.empty:
+        return None
+        
+    phase_counts = phase_df['Development_Phase'].value_counts().reset_index()
+    phase_counts.columns = ['Development Phase', 'Count']
+    
+    return px.bar(phase_counts, x='Development Phase', y='Count',
+                  title='Distribution of Development Phases')
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def get_filter_options(results_version, _df):
+    return {
+        'source_types': list(_df['Source_Type'].unique()),
+        'phases': [x for x in _df['Development_Phase'].unique() if pd.notna(x)],
+        'study_types': [x for x in _df['Study_Type'].unique() if pd.notna(x)]
+    }
+
+@st.cache_data(max_entries=128, show_spinner=False)
+def get_filter_mask(results_version, _df, source_filter, phase_filter, study_filter):
+    """Boolean mask of the rows that pass the filters."""
+    return (
+        (_df['Source_Type'].isin(source_filter)) &
+        (_df['Development_Phase'].isin(phase_filter) | _df['Development_Phase'].isna()) &
+        (_df['Study_Type'].isin(study_filter) | _df['Study_Type'].isna())
+    ).to_numpy()
+
+def display_summary_stats(df, results_version):
     if df is None or df.empty:
         st.warning("No data available to display statistics")
         return
-        
+    
+    stats = get_summary_stats(results_version, df)
     col1, col2, col3 = st.columns(3)
     
     with col1:
-        st.metric("Total Articles", len(df))
+        st.metric("Total Articles", stats['total'])
     
     with col2:
-        source_counts = df['Source_Type'].value_counts()
-        st.metric("Research Papers", source_counts.get('Research Paper', 0))
+        st.metric("Research Papers", stats['research_papers'])
     
     with col3:
-        st.metric("Clinical Trials", source_counts.get('Clinical Trial', 0))
+        st.metric("Clinical Trials", stats['clinical_trials'])
 
-def create_source_distribution(df):
+def create_source_distribution(df, results_version):
     if df is None or df.empty:
         st.warning("No data available to create source distribution chart")
         return
-        
-    source_counts = df['Source_Type'].value_counts().reset_index()
-    source_counts.columns = ['Source Type', 'Count']
     
-    fig = px.pie(source_counts, values='Count', names='Source Type', 
-                 title='Distribution of Source Types')
-    st.plotly_chart(fig)
+    st.plotly_chart(get_source_distribution_figure(results_version, df))
 
-def create_phase_distribution(df):
+def create_phase_distribution(df, results_version):
     if df is None or df.empty:
         st.warning("No data available to create phase distribution chart")
         return
-        
-    # Filter out NaN values
-    phase_df = df[df['Development_Phase'].notna()]
     
-    if phase_df.empty:
+    fig = get_phase_distribution_figure(results_version, df)
+    if fig is None:
         st.info("No development phase data available")
         return
-        
-    phase_counts = phase_df['Development_Phase'].value_counts().reset_index()
-    phase_counts.columns = ['Development Phase', 'Count']
-    
-    fig = px.bar(phase_counts, x='Development Phase', y='Count',
-                 title='Distribution of Development Phases')
     st.plotly_chart(fig)
 
 # Callback for selection toggle
-def toggle_selection(index):
-    if index in st.session_state.selected_articles:
-        st.session_state.selected_articles[index] = not st.session_state.selected_articles[index]
-    else:
-        st.session_state.selected_articles[index] = True
+def toggle_selection(position):
+    st.session_state.selected_mask[position] = not st.session_state.selected_mask[position]
 
-# Callback for select all
-def select_all():
-    if st.session_state.original_results is not None:
-        for i in range(len(st.session_state.original_results)):
-            st.session_state.selected_articles[i] = True
+# Callbacks for bulk selection; positions may be an array of positions, a slice or a boolean mask
+def select_positions(positions=slice(None)):
+    st.session_state.selected_mask[positions] = True
 
-# Callback for deselect all
-def deselect_all():
-    if st.session_state.original_results is not None:
-        for i in range(len(st.session_state.original_results)):
-            st.session_state.selected_articles[i] = False
+def deselect_positions(positions=slice(None)):
+    st.session_state.selected_mask[positions] = False
 
 # Callback for execute
 def execute_selection():
     if st.session_state.original_results is not None:
         df = st.session_state.original_results
-        selected_indices = [i for i, selected in st.session_state.selected_articles.items() if selected]
+        selected_indices = np.flatnonzero(st.session_state.selected_mask)
         
-        if selected_indices:
-            selected_df = df.iloc[selected_indices].copy()
+        if len(selected_indices):
+            # Imported results load their content from the Parquet file only now
+            selected_df = with_content(df.iloc[selected_indices].copy(), st.session_state.imported_results_path)
             
-            # Save to files
-            selected_df.to_csv('search_results.csv', index=False)
-            selected_df.to_json('search_results.json', orient='records', indent=2)
+            # Remember the selection in the article store, which the ingestion worker reads from
+            upsert_articles(selected_df)
+            save_selection(selected_df['URL'])
             
             # Store in session state for display and for research summary
             st.session_state.processed_results = selected_df
             st.session_state.selected_articles_for_summary = selected_df
             
-            # Create a progress container for vector storage
-            progress_container = st.empty()
-            with progress_container.container():
-                st.subheader("Storing Articles in Vector Database")
-                progress_bar = st.progress(0)
-                status_text = st.empty()
-                debug_info = st.expander("Debug Information")
-                
-                try:
-                    # Initialize Pinecone
-                    status_text.text("Initializing Pinecone...")
-                    debug_info.write("Checking Pinecone API key...")
-                    api_key = os.getenv("PINECONE_API_KEY")
-                    if not api_key:
-                        raise ValueError("PINECONE_API_KEY environment variable is not set")
-                    debug_info.write("API key found, initializing Pinecone...")
-                    
-                    index = initialize_pinecone()
-                    debug_info.write("Pinecone initialized successfully")
-                    
-                    # Store articles in Pinecone
-                    total_articles = len(selected_df)
-                    total_chunks = 0
-                    
-                    debug_info.write(f"Processing {total_articles} articles")
-                    
-                    for i, (_, article) in enumerate(selected_df.iterrows()):
-                        # Convert article to dictionary
-                        article_dict = article.to_dict()
-                        
-                        # Update progress
-                        progress_value = (i / total_articles)
-                        progress_bar.progress(progress_value)
-                        status_text.text(f"Processing article {i+1}/{total_articles}: {article_dict.get('Title', 'Unknown')}")
-                        
-                        # Log article details
-                        debug_info.write(f"Article {i+1}: {article_dict.get('Title', 'Unknown')}")
-                        debug_info.write(f"URL: {article_dict.get('URL', 'No URL')}")
-                        debug_info.write(f"Summary length: {len(article_dict.get('Summary', '')) if article_dict.get('Summary') else 0} characters")
-                        
-                        # Define status callback for article processing
-                        def article_status_callback(message, value):
-                            status_text.text(f"Article {i+1}/{total_articles}: {message}")
-                            debug_info.write(f"Status: {message}")
-                        
-                        # Store article chunks
-                        try:
-                            chunks_stored = store_article_chunks(article_dict, index, article_status_callback)
-                            debug_info.write(f"Stored {chunks_stored} chunks for this article")
-                            total_chunks += chunks_stored
-                        except Exception as article_error:
-                            debug_info.write(f"Error processing article: {str(article_error)}")
-                            # Continue with next article instead of failing completely
-                    
-                    # Update final progress
-                    progress_bar.progress(1.0)
-                    if total_chunks > 0:
-                        status_text.text(f"✅ Successfully stored {total_chunks} chunks from {total_articles} articles in Pinecone")
-                        # Store total chunks in session state for display
-                        st.session_state.total_chunks_stored = total_chunks
-                    else:
-                        status_text.warning(f"⚠️ No chunks were stored. Check the debug information for details.")
-                        st.session_state.total_chunks_stored = 0
-                    time.sleep(2)  # Show success message for a moment
-                    
-                except Exception as e:
-                    status_text.error(f"Error storing articles in Pinecone: {str(e)}")
-                    debug_info.write(f"Error details: {str(e)}")
-                    import traceback
-                    debug_info.write(f"Traceback: {traceback.format_exc()}")
-                    time.sleep(3)  # Show error message for a moment
-            
-            # Clear the progress container
-            progress_container.empty()
-            
-            st.session_state.execute_success = True
+            # Store the articles in the vector database in the background
+            try:
+                st.session_state.ingestion_job_id = enqueue_ingestion(selected_df['URL'])
+                start_worker()
+                st.session_state.execute_success = True
+            except Exception as e:
+                st.session_state.execute_error = f"Error queueing articles for the vector database: {str(e)}"
         else:
             st.session_state.execute_warning = True
 
+# Callback for retrying the failed articles of an ingestion job
+def retry_job(job_id):
+    if retry_failed_articles(job_id):
+        start_worker()
+
+def display_ingestion_status(job_id):
+    """Show the progress of a background ingestion job; refreshes on its own only while the job runs."""
+    job = get_job(job_id)
+    if job is None:
+        return
+    if job['status'] in ACTIVE_STATES:
+        poll_ingestion_status(job_id)
+    else:
+        render_ingestion_status(job)
+
+@st.fragment(run_every=INGESTION_STATUS_INTERVAL)
+def poll_ingestion_status(job_id):
+    """Refresh the status of an active job every INGESTION_STATUS_INTERVAL seconds."""
+    job = get_job(job_id)
+    if job is None or job['status'] not in ACTIVE_STATES:
+        # Rerun the app so the finished job is shown without the timer
+        st.rerun()
+    render_ingestion_status(job)
+
+def render_ingestion_status(job):
+    """Progress bar and controls of an ingestion job."""
+    job_id = job['id']
+    col1, col2 = st.columns([5, 1])
+    with col1:
+        st.progress(job['progress'], text=format_job_status(job))
+        if job['status'] in ACTIVE_STATES and job['current_article']:
+            st.caption(f"Storing {job['current_article']}")
+    with col2:
+        if job['status'] in ACTIVE_STATES:
+            st.button("Cancel", key=f"cancel_job_{job_id}", on_click=cancel_job, args=(job_id,))
+        elif job['failed_articles']:
+            st.button("Retry failed", key=f"retry_job_{job_id}", on_click=retry_job, args=(job_id,),
+                      help="Store the chunks that are still missing; chunks already stored are skipped")
+
+def import_results(uploaded_file):
+    """Load results from an uploaded Parquet export, leaving article content on disk."""
+    # Keep the upload in a local file so it can be memory-mapped and its content read on demand
+    path = save_upload(uploaded_file.getbuffer())
+    try:
+        df = import_parquet(path)
+    except Exception:
+        remove_upload(path)
+        raise
+    set_results(df, imported_path=path)
+    st.session_state.imported_file_id = uploaded_file.file_id
+    st.session_state.search_complete = True
+    
+    # Make the imported articles available to the other pages
+    upsert_articles(df)
+    save_selection(df['URL'])
+
 def main():
     # Create a layout with columns for the title and buttons
     col1, col2, col3 = st.columns([5, 1, 1])
@@ -207,6 +256,10 @@ def main():
         if st.button("💬 Q&A Chat", use_container_width=True, help="Open the Interactive Q&A Chat"):
             st.switch_page("pages/qa_chat.py")
     
+    # Resume ingestion jobs interrupted by a restart
+    if list_jobs(limit=1, active_only=True):
+        start_worker()
+    
     # Sidebar
     st.sidebar.title("Search Controls")
     
@@ -223,11 +276,23 @@ def main():
     with st.sidebar.expander("Advanced Options"):
         source_types = st.multiselect(
             "Source Types",
-            ["Research Paper", "Clinical Trial", "Regulatory Document", "Company Document", "News"],
+            available_source_types,
             default=["Research Paper", "Clinical Trial"],
             help="Select which types of sources to search. PubMed and ClinicalTrials.gov are always included."
         )
         
+        # Batch API jobs can take hours, so the app never waits on one; SUMMARY_MODE=batch
+        # defaults to packed requests here and is only honored by the command line search
+        summary_modes = ["single", "pack"]
+        summary_mode = st.selectbox(
+            "Summarization",
+            summary_modes,
+            index=summary_modes.index(SUMMARY_MODE) if SUMMARY_MODE in summary_modes else 1,
+            format_func=lambda mode: {"single": "One request per article", "pack": "Several articles per request"}[mode],
+            help="Packing several articles into one request reduces request overhead and cost for large searches. "
+                 "Batch API summarization is only available from the command line (python search_articles.py)."
+        )
+        
         st.info("""
         Search Strategy:
         1. Direct API access to PubMed and ClinicalTrials.gov
@@ -235,6 +300,15 @@ def main():
         3. Automatic metadata extraction and summarization
         """)
     
+    with st.sidebar.expander("Import Results"):
+        uploaded_file = st.file_uploader("Parquet export", type=["parquet"], help="Load results downloaded as Parquet")
+        if uploaded_file is not None and uploaded_file.file_id != st.session_state.get('imported_file_id'):
+            try:
+                import_results(uploaded_file)
+                st.success(f"Imported {len(st.session_state.original_results)} articles")
+            except Exception as e:
+                st.error(f"Error importing results: {str(e)}")
+    
     search_button = st.sidebar.button(
         "Run Search",
         #help="This will search PubMed and ClinicalTrials.gov APIs directly, plus selected domains. May take several minutes to complete."
@@ -256,6 +330,7 @@ def main():
                     progress = st.progress(0)
                     status = st.empty()
                     results_count = st.empty()
+                    live_results = st.empty()
                 
                 try:
                     def update_progress(message, value):
@@ -263,31 +338,38 @@ def main():
                         progress.progress(value)
                     
                     # Start search
-                    update_progress("Searching PubMed...", 20)
+                    update_progress("Searching sources...", 0)
                     
                     try:
-                        df = search_articles(
+                        # Show articles as soon as each one has been processed
+                        rows = []
+                        for article in iter_search_articles(
                             query=query,
                             num_results=num_results,
                             years_back=years,
                             source_types=source_types if source_types else None,
-                            status_callback=update_progress
-                        )
+                            status_callback=update_progress,
+                            summary_mode=summary_mode
+                        ):
+                            rows.append(article)
+                            results_count.info(f"Found {len(rows)} articles so far...")
+                            live_results.dataframe(
+                                pd.DataFrame(rows, columns=['Title', 'Source_Type', 'Publication_Date', 'URL']),
+                                use_container_width=True,
+                                hide_index=True
+                            )
+                        live_results.empty()
+                        df = results_to_dataframe(rows)
                         
                         # Store the original results in session state
                         if not df.empty:
-                            st.session_state.original_results = df.copy()
-                            
-                            # Initialize selection state for each article if not already done
                             # Set all checkboxes to unchecked by default
-                            st.session_state.selected_articles = {i: False for i in range(len(df))}
-                            
-                            # Save all results initially
-                            df.to_csv('search_results.csv', index=False)
-                            df.to_json('search_results.json', orient='records', indent=2)
+                            set_results(df)
                             
-                            # Store in session state for display - make results always available
-                            st.session_state.processed_results = df.copy()
+                            # Add the results to the local article store; all of them
+                            # count as selected until the user executes a selection
+                            upsert_articles(df, query)
+                            save_selection(df['URL'])
                     except Exception as e:
                         st.error(f"Error during search: {str(e)}")
                         df = pd.DataFrame()  # Empty dataframe
@@ -328,71 +410,78 @@ def main():
                     st.rerun()
             
             # Summary statistics
-            display_summary_stats(df)
+            results_version = st.session_state.results_version
+            display_summary_stats(df, results_version)
             
             # Visualizations
             col1, col2 = st.columns(2)
             
             with col1:
-                create_source_distribution(df)
+                create_source_distribution(df, results_version)
             
             with col2:
-                create_phase_distribution(df)
+                create_phase_distribution(df, results_version)
             
             # Filters
             st.header("Filter Results")
             
+            filter_options = get_filter_options(results_version, df)
             col1, col2, col3 = st.columns(3)
             
             with col1:
                 source_filter = st.multiselect(
                     "Source Type",
-                    options=df['Source_Type'].unique(),
-                    default=df['Source_Type'].unique()
+                    options=filter_options['source_types'],
+                    default=filter_options['source_types']
                 )
             
             with col2:
                 phase_filter = st.multiselect(
                     "Development Phase",
-                    options=[x for x in df['Development_Phase'].unique() if pd.notna(x)],
-                    default=[x for x in df['Development_Phase'].unique() if pd.notna(x)]
+                    options=filter_options['phases'],
+                    default=filter_options['phases']
                 )
             
             with col3:
                 study_filter = st.multiselect(
                     "Study Type",
-                    options=[x for x in df['Study_Type'].unique() if pd.notna(x)],
-                    default=[x for x in df['Study_Type'].unique() if pd.notna(x)]
+                    options=filter_options['study_types'],
+                    default=filter_options['study_types']
                 )
             
-            # Filter the dataframe
+            # Positions of the matching rows in df, which are also the selection keys
             try:
-                filtered_df = df[
-                    (df['Source_Type'].isin(source_filter)) &
-                    (df['Development_Phase'].isin(phase_filter) | df['Development_Phase'].isna()) &
-                    (df['Study_Type'].isin(study_filter) | df['Study_Type'].isna())
-                ]
+                filtered_positions = np.flatnonzero(get_filter_mask(results_version, df, source_filter, phase_filter, study_filter))
             except Exception as e:
                 st.error(f"Error filtering results: {str(e)}")
-                filtered_df = df
+                filtered_positions = np.arange(len(df))
             
-            # Select/Deselect All/Execute buttons in a row (aligned to the right)
-            col1, col2, col3, col4 = st.columns([3, 1, 1, 1])
+            # Selection buttons and Execute in a row (aligned to the right)
+            col1, col2, col3, col4, col5 = st.columns([2, 1, 1, 1, 1])
+            with col1:
+                st.caption(f"{int(st.session_state.selected_mask.sum())} of {len(df)} articles selected")
             with col2:
-                st.button("Select All", on_click=select_all)
+                st.button("Select Filtered", on_click=select_positions, args=(filtered_positions,),
+                          help="Select every article that matches the current filters")
             with col3:
-                st.button("Deselect All", on_click=deselect_all)
+                st.button("Select All", on_click=select_positions)
             with col4:
+                st.button("Deselect All", on_click=deselect_positions)
+            with col5:
                 st.button("Execute", on_click=execute_selection)
             
             # Show success/warning messages
             if 'execute_success' in st.session_state and st.session_state.execute_success:
-                st.success(f"Processed {len(st.session_state.processed_results)} selected articles")
-                # Display total chunks stored
-                if st.session_state.total_chunks_stored > 0:
-                    st.info(f"Total chunks stored in vector database: {st.session_state.total_chunks_stored}")
+                st.success(f"Queued {len(st.session_state.processed_results)} selected articles for the vector database")
                 st.session_state.execute_success = False
             
+            if st.session_state.get('execute_error'):
+                st.error(st.session_state.execute_error)
+                st.session_state.execute_error = None
+            
+            if st.session_state.ingestion_job_id is not None:
+                display_ingestion_status(st.session_state.ingestion_job_id)
+            
             if 'execute_warning' in st.session_state and st.session_state.execute_warning:
                 st.warning("No articles selected. Please select at least one article to process.")
                 st.session_state.execute_warning = False
@@ -400,10 +489,24 @@ def main():
             # Display all results with selection buttons on the right
             st.header("Research Results")
             
-            if filtered_df.empty:
+            if len(filtered_positions) == 0:
                 st.warning("No results match the selected filters. Try adjusting your filter criteria.")
             else:
-                for i, (_, row) in enumerate(filtered_df.iterrows()):
+                # Only the current page of results is rendered
+                page_count = (len(filtered_positions) - 1) // RESULTS_PAGE_SIZE + 1
+                if st.session_state.get('results_page', 1) > page_count:
+                    st.session_state.results_page = page_count
+                
+                col1, col2 = st.columns([4, 1])
+                with col2:
+                    page = st.number_input("Page", min_value=1, max_value=page_count, step=1, key="results_page")
+                start = (page - 1) * RESULTS_PAGE_SIZE
+                page_positions = filtered_positions[start:start + RESULTS_PAGE_SIZE]
+                with col1:
+                    st.caption(f"Showing {start + 1}-{start + len(page_positions)} of {len(filtered_positions)} results")
+                
+                for position, (_, row) in zip(page_positions, df.iloc[page_positions].iterrows()):
+                    position = int(position)
                     # Use article title if available, otherwise create a descriptive title
                     if pd.notna(row['Title']) and row['Title']:
                         title = row['Title']
@@ -443,46 +546,52 @@ def main():
                             st.write(row['Summary'] if pd.notna(row['Summary']) else "No summary available")
                     
                     with col2:
-                        # Use the index in the original dataframe to track selection
-                        original_index = df.index[df['URL'] == row['URL']].tolist()[0]
-                        
                         # Get current selection state
-                        is_selected = st.session_state.selected_articles.get(original_index, False)
+                        is_selected = st.session_state.selected_mask[position]
                         
                         # Create selection button
                         button_label = "☑" if is_selected else "☐"
                         st.button(
                             button_label, 
-                            key=f"select_{original_index}",
+                            key=f"select_{position}",
                             on_click=toggle_selection,
-                            args=(original_index,)
+                            args=(position,)
                         )
             
             # Get the dataframe to use for downloads
             display_df = st.session_state.processed_results if st.session_state.processed_results is not None else df
             
             # Download buttons for results - now below Research Results
+            # Files are only generated when a button is clicked
             st.header("Download Articles")
-            col1, col2 = st.columns(2)
+            col1, col2, col3 = st.columns(3)
             
+            imported_path = st.session_state.imported_results_path
             dt = datetime.now().strftime("%Y%m%d_%H%M%S")
             with col1:
-                csv = display_df.to_csv(index=False)
                 st.download_button(
                     label="Download CSV",
-                    data=csv,
-                    file_name="research_results_{dt}.csv",
+                    data=lambda: export_csv(with_content(display_df, imported_path)),
+                    file_name=f"research_results_{dt}.csv",
                     mime="text/csv"
                 )
             
             with col2:
-                json_str = display_df.to_json(orient='records', indent=2)
                 st.download_button(
                     label="Download JSON",
-                    data=json_str,
+                    data=lambda: export_json(with_content(display_df, imported_path)),
                     file_name=f"research_results_{dt}.json",
                     mime="application/json"
                 )
+            
+            with col3:
+                st.download_button(
+                    label="Download Parquet",
+                    data=lambda: export_parquet(with_content(display_df, imported_path)),
+                    file_name=f"research_results_{dt}.parquet",
+                    mime="application/vnd.apache.parquet",
+                    help="Compressed columnar file that can be imported again"
+                )
         else:
             st.info("Enter a search query and click 'Run Search' to start exploring research articles.")
 
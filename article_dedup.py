@@ -0,0 +1,209 @@
+import os
+import re
+import hashlib
+import threading
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode, unquote
+
+# Query parameters that only track where a click came from. Generic names such as
+# 'ref' or 'src' are left alone because some sites use them to select content.
+TRACKING_PARAMS = {
+    'fbclid', 'gclid', 'dclid', 'msclkid', 'mc_cid', 'mc_eid', 'igshid', 'yclid',
+    '_ga', '_gl', '_hsenc', '_hsmi', 'mkt_tok'
+}
+TRACKING_PREFIXES = ('utm_', 'pk_', 'mtm_', 'hsa_')
+
+# Hosts that are aliases of another host
+HOST_ALIASES = {
+    'classic.clinicaltrials.gov': 'clinicaltrials.gov',
+    'www.clinicaltrials.gov': 'clinicaltrials.gov',
+    'dx.doi.org': 'doi.org'
+}
+
+DOI_PATTERN = re.compile(r'(10\.\d{4,9}/[^\s?#"<>]+)')
+PMID_PATTERN = re.compile(r'^/(?:pubmed/)?(\d+)/?$')
+PMC_PATTERN = re.compile(r'/(PMC\d+)', re.IGNORECASE)
+NCT_PATTERN = re.compile(r'\b(NCT\d{8})\b', re.IGNORECASE)
+
+# Near-duplicate detection: articles whose 64-bit SimHash fingerprints differ in at most
+# SIMHASH_MAX_DISTANCE bits are treated as the same text. Texts shorter than
+# SIMHASH_MIN_WORDS (e.g. bare abstracts) are only deduplicated by identifier.
+SIMHASH_MAX_DISTANCE = int(os.getenv("SIMHASH_MAX_DISTANCE", "3"))
+SIMHASH_MIN_WORDS = int(os.getenv("SIMHASH_MIN_WORDS", "100"))
+SIMHASH_MAX_WORDS = 5000
+SHINGLE_SIZE = 3
+
+def normalize_doi(doi):
+    """Lowercase a DOI and strip resolver prefixes and trailing punctuation."""
+    if not doi:
+        return None
+    match = DOI_PATTERN.search(unquote(str(doi)))
+    if not match:
+        return None
+    return match.group(1).rstrip('.,;)').lower()
+
+def canonicalize_url(url):
+    """
+    Normalize a URL so that different links to the same page compare equal.
+
+    The canonical form is a key for deduplication and storage only; pages are
+    always downloaded from the URL the search source returned.
+
+    Lowercases the scheme and host, resolves host aliases, drops default ports,
+    fragments and tracking parameters, sorts the remaining query parameters and
+    rewrites PubMed and ClinicalTrials.gov links to their canonical form.
+
+    Args:
+        url (str): URL as returned by a search source
+
+    Returns:
+        str: Canonical URL
+    """
+    try:
+        parts = urlsplit(url.strip())
+    except ValueError:
+        return url
+    if not parts.netloc:
+        return url
+
+    scheme = parts.scheme.lower() or 'https'
+    host = (parts.hostname or '').rstrip('.')
+    host = HOST_ALIASES.get(host, host)
+    if parts.port and not (scheme, parts.port) in (('http', 80), ('https', 443)):
+        host = f"{host}:{parts.port}"
+    path = parts.path or '/'
+
+    if host == 'clinicaltrials.gov':
+        nct = NCT_PATTERN.search(url)
+        if nct and not path.startswith('/api/'):
+            return f"https://clinicaltrials.gov/study/{nct.group(1).upper()}"
+    if host in ('pubmed.ncbi.nlm.nih.gov', 'www.ncbi.nlm.nih.gov'):
+        pmid = PMID_PATTERN.match(path)
+        if pmid:
+            return f"https://pubmed.ncbi.nlm.nih.gov/{pmid.group(1)}/"
+    if host == 'doi.org':
+        doi = normalize_doi(path)
+        if doi:
+            return f"https://doi.org/{doi}"
+
+    query = sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if key.lower() not in TRACKING_PARAMS and not key.lower().startswith(TRACKING_PREFIXES)
+    )
+    if len(path) > 1:
+        path = path.rstrip('/')
+    return urlunsplit((scheme, host, path, urlencode(query), ''))
+
+def article_keys(url, metadata=None):
+    """
+    Get the keys that identify an article: its canonical URL and any DOI, PMID, PMC or NCT identifier.
+
+    Two results that share any key are the same article.
+
+    Args:
+        url (str): Article URL
+        metadata (dict, optional): Article metadata with 'doi', 'pmid' or 'nct_id'
+
+    Returns:
+        set: Identifier keys such as 'doi:10.2337/dc20-2995' or 'pmid:33397400'
+    """
+    canonical = canonicalize_url(url)
+    parts = urlsplit(canonical)
+    host = parts.hostname or ''
+    # canonicalize_url already lowercased the scheme and host; paths are case-sensitive
+    keys = {'url:' + canonical.replace('://www.', '://', 1)}
+
+    if host == 'pubmed.ncbi.nlm.nih.gov':
+        pmid = PMID_PATTERN.match(parts.path)
+        if pmid:
+            keys.add('pmid:' + pmid.group(1))
+    elif host == 'clinicaltrials.gov':
+        nct = NCT_PATTERN.search(canonical)
+        if nct:
+            keys.add('nct:' + nct.group(1).upper())
+    elif host.endswith('ncbi.nlm.nih.gov'):
+        pmc = PMC_PATTERN.search(parts.path)
+        if pmc:
+            keys.add('pmc:' + pmc.group(1).upper())
+
+    # DOIs also appear in publisher paths such as /doi/full/10.1056/...
+    if host == 'doi.org' or '/doi/' in parts.path:
+        doi = normalize_doi(parts.path)
+        if doi:
+            keys.add('doi:' + doi)
+
+    metadata = metadata or {}
+    doi = normalize_doi(metadata.get('doi'))
+    if doi:
+        keys.add('doi:' + doi)
+    if metadata.get('pmid'):
+        keys.add(f"pmid:{metadata['pmid']}")
+    if metadata.get('nct_id'):
+        keys.add(f"nct:{metadata['nct_id'].upper()}")
+    return keys
+
+def simhash(text):
+    """
+    Compute a 64-bit SimHash fingerprint of a text from its word shingles.
+
+    Returns None for texts shorter than SIMHASH_MIN_WORDS.
+    """
+    import numpy as np
+
+    words = re.findall(r'[a-z0-9]+', text.lower())[:SIMHASH_MAX_WORDS]
+    if len(words) < SIMHASH_MIN_WORDS:
+        return None
+    shingles = {' '.join(words[i:i+SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)}
+    hashes = np.fromiter(
+        (int.from_bytes(hashlib.blake2b(s.encode('utf-8'), digest_size=8).digest(), 'little') for s in shingles),
+        dtype=np.uint64, count=len(shingles)
+    )
+    # Each bit of the fingerprint is set if most shingle hashes have it set
+    bit_shifts = np.arange(64, dtype=np.uint64)
+    bits = (hashes[:, None] >> bit_shifts) & np.uint64(1)
+    votes = bits.sum(axis=0) * 2 > len(hashes)
+    return int(np.sum(votes.astype(np.uint64) << bit_shifts))
+
+def hamming_distance(a, b):
+    """Number of differing bits between two fingerprints."""
+    return bin(a ^ b).count('1')
+
+class ArticleDeduplicator:
+    """
+    Thread-safe record of the articles seen during one search.
+
+    seen_item() drops candidates whose URL or identifiers were already
+    queued, before anything is downloaded. seen_content() drops extracted
+    articles that share a DOI with, or are near-duplicates of, an article
+    already kept, before they are summarized and embedded.
+    """
+
+    def __init__(self, max_distance=SIMHASH_MAX_DISTANCE):
+        self.max_distance = max_distance
+        self._queued = set()
+        self._kept_dois = {}
+        self._fingerprints = []
+        self._lock = threading.Lock()
+
+    def seen_item(self, url, metadata=None):
+        """Record a candidate; returns True if it duplicates an earlier one."""
+        keys = article_keys(url, metadata)
+        with self._lock:
+            if keys & self._queued:
+                return True
+            self._queued |= keys
+            return False
+
+    def seen_content(self, url, content, metadata=None):
+        """Record an extracted article; returns True if it duplicates an article already kept."""
+        fingerprint = simhash(content) if content else None
+        doi = normalize_doi((metadata or {}).get('doi'))
+        with self._lock:
+            if doi and self._kept_dois.get(doi, url) != url:
+                return True
+            if fingerprint is not None:
+                if any(hamming_distance(fingerprint, other) <= self.max_distance for other in self._fingerprints):
+                    return True
+                self._fingerprints.append(fingerprint)
+            if doi:
+                self._kept_dois[doi] = url
+            return False
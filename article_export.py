@@ -0,0 +1,153 @@
+import io
+import os
+import atexit
+import tempfile
+import threading
+
+import pandas as pd
+
+from article_store import ARTICLE_COLUMNS, LISTING_COLUMNS
+
+# Parquet compression codec for exported results (zstd, snappy, gzip or none)
+EXPORT_COMPRESSION = os.getenv("EXPORT_COMPRESSION", "zstd")
+
+# Rows per Parquet row group; smaller groups let readers skip more when loading a few articles
+EXPORT_ROW_GROUP_SIZE = int(os.getenv("EXPORT_ROW_GROUP_SIZE", "1000"))
+
+# Uploaded Parquet files on disk, removed when replaced or when the process exits
+_upload_paths = set()
+_upload_lock = threading.Lock()
+
+def export_csv(df):
+    """Serialize results to CSV bytes."""
+    return df.to_csv(index=False).encode('utf-8')
+
+def export_json(df):
+    """Serialize results to JSON bytes, one record per article."""
+    return df.to_json(orient='records', indent=2, date_format='iso').encode('utf-8')
+
+def export_parquet(df, compression=EXPORT_COMPRESSION):
+    """
+    Serialize results to compressed Parquet bytes.
+
+    Content is written as the last column so that readers that skip it
+    never touch its pages.
+
+    Args:
+        df (pd.DataFrame): Search results
+        compression (str): Parquet compression codec
+
+    Returns:
+        bytes: Parquet file content
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    columns = [column for column in df.columns if column != 'Content']
+    if 'Content' in df.columns:
+        columns.append('Content')
+    table = pa.Table.from_pandas(df[columns], preserve_index=False)
+
+    buffer = io.BytesIO()
+    pq.write_table(
+        table,
+        buffer,
+        compression=None if compression == 'none' else compression,
+        row_group_size=EXPORT_ROW_GROUP_SIZE
+    )
+    return buffer.getvalue()
+
+def import_parquet(path, columns=None):
+    """
+    Read exported results from a Parquet file without the article content.
+
+    The file is memory-mapped and only the requested columns are decoded,
+    so the large Content column stays on disk until load_parquet_content()
+    asks for it.
+
+    Args:
+        path (str): Parquet file written by export_parquet
+        columns (list, optional): Columns to read, defaults to LISTING_COLUMNS
+
+    Returns:
+        pd.DataFrame: Results with the requested columns that exist in the file
+    """
+    import pyarrow.parquet as pq
+
+    available = pq.read_schema(path, memory_map=True).names
+    columns = [column for column in (columns or LISTING_COLUMNS) if column in available]
+    df = pq.read_table(path, columns=columns, memory_map=True).to_pandas()
+    if 'Publication_Date' in df.columns:
+        df['Publication_Date'] = pd.to_datetime(df['Publication_Date'], errors='coerce')
+    return df
+
+def load_parquet_content(path, urls):
+    """
+    Load the Content of some articles from an exported Parquet file.
+
+    Args:
+        path (str): Parquet file written by export_parquet
+        urls (list): URLs of the articles whose content is needed
+
+    Returns:
+        dict: URL to content, for the URLs found in the file
+    """
+    import pyarrow.parquet as pq
+
+    urls = list(urls)
+    if not urls:
+        return {}
+    # The filter is pushed down, so row groups without any of the URLs are not decoded
+    table = pq.read_table(path, columns=['URL', 'Content'], filters=[('URL', 'in', urls)], memory_map=True)
+    return dict(zip(table.column('URL').to_pylist(), table.column('Content').to_pylist()))
+
+def save_upload(data):
+    """
+    Write an uploaded Parquet file to a temporary file.
+
+    The file stays on disk so that import_parquet() can memory-map it and
+    load_parquet_content() can read article content on demand. Call
+    remove_upload() once the results are replaced; files still present
+    when the process exits are removed then.
+
+    Args:
+        data (bytes): Uploaded file content
+
+    Returns:
+        str: Path of the temporary file
+    """
+    fd, path = tempfile.mkstemp(suffix=".parquet")
+    with os.fdopen(fd, "wb") as f:
+        f.write(data)
+    with _upload_lock:
+        _upload_paths.add(path)
+    return path
+
+def remove_upload(path):
+    """Delete a file written by save_upload()."""
+    if not path:
+        return
+    with _upload_lock:
+        _upload_paths.discard(path)
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+@atexit.register
+def _remove_uploads():
+    for path in list(_upload_paths):
+        remove_upload(path)
+
+def with_content(df, parquet_path=None):
+    """
+    Return results with a Content column, loading it from the Parquet file results were imported from.
+
+    Results that already have Content are returned unchanged.
+    """
+    if 'Content' in df.columns or not parquet_path:
+        return df
+    content = load_parquet_content(parquet_path, df['URL'])
+    df = df.copy()
+    df['Content'] = df['URL'].map(content)
+    return df[[column for column in ARTICLE_COLUMNS if column in df.columns]]
@@ -0,0 +1,236 @@
+import os
+import time
+import sqlite3
+
+import pandas as pd
+
+from article_dedup import canonicalize_url
+
+# Location of the local article database that accumulates search results
+ARTICLE_STORE_PATH = os.getenv(
+    "ARTICLE_STORE_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "articles.db")
+)
+
+# Stored article columns, named like the search results DataFrame columns
+ARTICLE_COLUMNS = ['URL', 'Title', 'File_Type', 'Content', 'Summary', 'Abstract', 'Publication_Date', 'Authors', 'Journal', 'DOI', 'Source_Type', 'Development_Phase', 'Study_Type']
+
+# Everything except the full article text, for pages that only display or summarize articles
+LISTING_COLUMNS = [column for column in ARTICLE_COLUMNS if column != 'Content']
+
+# Columns indexed for full-text search
+FTS_COLUMNS = ['Title', 'Abstract', 'Summary', 'Content']
+
+# Largest number of URLs bound in one IN (...) query
+MAX_QUERY_PARAMS = 500
+
+def get_store_connection(path=None):
+    """Open the article database, creating tables, the full-text index and its triggers if needed."""
+    conn = sqlite3.connect(path or ARTICLE_STORE_PATH, timeout=30)
+    columns = ',\n'.join(f"{column} TEXT" for column in ARTICLE_COLUMNS[1:])
+    conn.executescript(f"""
+        CREATE TABLE IF NOT EXISTS articles (
+            URL TEXT PRIMARY KEY,
+            {columns},
+            query TEXT,
+            first_seen REAL,
+            last_seen REAL
+        );
+        CREATE TABLE IF NOT EXISTS selection (
+            position INTEGER PRIMARY KEY,
+            URL TEXT NOT NULL
+        );
+    """)
+    try:
+        conn.executescript(f"""
+            CREATE VIRTUAL TABLE IF NOT EXISTS articles_fts USING fts5(
+                {', '.join(FTS_COLUMNS)}, content='articles', content_rowid='rowid'
+            );
+            CREATE TRIGGER IF NOT EXISTS articles_ai AFTER INSERT ON articles BEGIN
+                INSERT INTO articles_fts(rowid, {', '.join(FTS_COLUMNS)})
+                VALUES (new.rowid, {', '.join('new.' + c for c in FTS_COLUMNS)});
+            END;
+            CREATE TRIGGER IF NOT EXISTS articles_ad AFTER DELETE ON articles BEGIN
+                INSERT INTO articles_fts(articles_fts, rowid, {', '.join(FTS_COLUMNS)})
+                VALUES ('delete', old.rowid, {', '.join('old.' + c for c in FTS_COLUMNS)});
+            END;
+            CREATE TRIGGER IF NOT EXISTS articles_au AFTER UPDATE ON articles BEGIN
+                INSERT INTO articles_fts(articles_fts, rowid, {', '.join(FTS_COLUMNS)})
+                VALUES ('delete', old.rowid, {', '.join('old.' + c for c in FTS_COLUMNS)});
+                INSERT INTO articles_fts(rowid, {', '.join(FTS_COLUMNS)})
+                VALUES (new.rowid, {', '.join('new.' + c for c in FTS_COLUMNS)});
+            END;
+        """)
+    except sqlite3.OperationalError as e:
+        # SQLite built without FTS5: the store works, full-text search does not
+        print(f"Full-text search unavailable in article store: {str(e)}")
+    return conn
+
+def _to_db_value(value):
+    """Convert a DataFrame cell to a value SQLite can store; missing values become NULL."""
+    if value is None:
+        return None
+    if isinstance(value, (list, tuple, set)):
+        return '; '.join(str(v) for v in value)
+    try:
+        if pd.isna(value):
+            return None
+    except (TypeError, ValueError):
+        pass
+    if isinstance(value, pd.Timestamp):
+        return value.isoformat()
+    return str(value)
+
+def upsert_articles(articles, query=None, path=None):
+    """
+    Insert new articles and update existing ones, keyed by canonical URL.
+
+    Fields missing from an incoming article keep their stored value, so a
+    later search without e.g. a summary does not erase an earlier one.
+
+    Args:
+        articles (pd.DataFrame or list): Article rows with the ARTICLE_COLUMNS
+        query (str, optional): Search query that found the articles
+        path (str, optional): Database file, defaults to ARTICLE_STORE_PATH
+
+    Returns:
+        int: Number of articles written
+    """
+    if isinstance(articles, pd.DataFrame):
+        articles = articles.to_dict('records')
+
+    now = time.time()
+    rows = []
+    for article in articles:
+        if not article.get('URL'):
+            continue
+        values = [canonicalize_url(article['URL'])]
+        values += [_to_db_value(article.get(column)) for column in ARTICLE_COLUMNS[1:]]
+        rows.append(values + [query, now, now])
+    if not rows:
+        return 0
+
+    updates = ',\n'.join(f"{column} = COALESCE(excluded.{column}, articles.{column})" for column in ARTICLE_COLUMNS[1:])
+    conn = get_store_connection(path)
+    try:
+        conn.executemany(
+            f"""
+            INSERT INTO articles ({', '.join(ARTICLE_COLUMNS)}, query, first_seen, last_seen)
+            VALUES ({', '.join('?' * (len(ARTICLE_COLUMNS) + 3))})
+            ON CONFLICT(URL) DO UPDATE SET
+                {updates},
+                query = COALESCE(excluded.query, articles.query),
+                last_seen = excluded.last_seen
+            """,
+            rows
+        )
+        conn.commit()
+    finally:
+        conn.close()
+    return len(rows)
+
+def _parse_dates(df):
+    """Convert stored ISO dates back to timestamps, like results_to_dataframe does."""
+    if 'Publication_Date' in df.columns:
+        df['Publication_Date'] = pd.to_datetime(df['Publication_Date'], format='ISO8601', errors='coerce', utc=True).dt.tz_convert(None)
+    return df
+
+def _read_articles(conn, sql, params, columns):
+    """Run an article query and return the requested columns."""
+    return _parse_dates(pd.read_sql_query(sql, conn, params=params))[columns]
+
+def load_articles(urls=None, columns=None, path=None):
+    """
+    Load stored articles, optionally only some URLs and columns.
+
+    Args:
+        urls (list, optional): Article URLs, returned in this order; all articles if None
+        columns (list, optional): Columns to load, defaults to ARTICLE_COLUMNS
+        path (str, optional): Database file, defaults to ARTICLE_STORE_PATH
+
+    Returns:
+        pd.DataFrame: One row per stored article
+    """
+    columns = list(columns or ARTICLE_COLUMNS)
+    select = ', '.join(dict.fromkeys(['URL'] + columns))
+    conn = get_store_connection(path)
+    try:
+        if urls is None:
+            return _read_articles(conn, f"SELECT {select} FROM articles ORDER BY last_seen DESC", [], columns)
+
+        urls = [canonicalize_url(url) for url in urls]
+        frames = []
+        for i in range(0, len(urls), MAX_QUERY_PARAMS):
+            batch = urls[i:i+MAX_QUERY_PARAMS]
+            frames.append(pd.read_sql_query(
+                f"SELECT {select} FROM articles WHERE URL IN ({', '.join('?' * len(batch))})", conn, params=batch
+            ))
+        df = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=['URL'] + columns)
+        order = {url: i for i, url in enumerate(urls)}
+        df = df.sort_values('URL', key=lambda s: s.map(order)).reset_index(drop=True)
+        return _parse_dates(df)[columns]
+    finally:
+        conn.close()
+
+def search_stored_articles(text, columns=None, limit=50, path=None):
+    """
+    Full-text search over stored titles, abstracts, summaries and content.
+
+    Args:
+        text (str): FTS5 query, e.g. 'dasiglucagon AND pump'
+        columns (list, optional): Columns to load, defaults to LISTING_COLUMNS
+        limit (int): Maximum number of articles, best matches first
+        path (str, optional): Database file, defaults to ARTICLE_STORE_PATH
+
+    Returns:
+        pd.DataFrame: Matching articles
+    """
+    columns = list(columns or LISTING_COLUMNS)
+    select = ', '.join(f"articles.{column}" for column in columns)
+    conn = get_store_connection(path)
+    try:
+        return _read_articles(
+            conn,
+            f"""
+            SELECT {select} FROM articles_fts
+            JOIN articles ON articles.rowid = articles_fts.rowid
+            WHERE articles_fts MATCH ?
+            ORDER BY rank LIMIT ?
+            """,
+            [text, limit],
+            columns
+        )
+    finally:
+        conn.close()
+
+def save_selection(urls, path=None):
+    """Replace the current article selection with these URLs, in order."""
+    conn = get_store_connection(path)
+    try:
+        conn.execute("DELETE FROM selection")
+        conn.executemany(
+            "INSERT INTO selection (position, URL) VALUES (?, ?)",
+            [(i, canonicalize_url(url)) for i, url in enumerate(urls)]
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+def load_selection(columns=None, path=None):
+    """Load the selected articles, with only the requested columns (default LISTING_COLUMNS)."""
+    columns = list(columns or LISTING_COLUMNS)
+    select = ', '.join(f"articles.{column}" for column in columns)
+    conn = get_store_connection(path)
+    try:
+        return _read_articles(
+            conn,
+            f"""
+            SELECT {select} FROM selection
+            JOIN articles ON articles.URL = selection.URL
+            ORDER BY selection.position
+            """,
+            [],
+            columns
+        )
+    finally:
+        conn.close()
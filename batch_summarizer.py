@@ -0,0 +1,205 @@
+import os
+import io
+import json
+import time
+
+from content_reducer import reduce_content
+
+# Summarization settings shared by single, packed and batch requests
+SUMMARY_MODEL = "gpt-4o-mini"
+SUMMARY_MAX_TOKENS = 300
+SUMMARY_TEMPERATURE = 0.3
+SUMMARY_SYSTEM_PROMPT = "You are a research assistant specializing in medical and scientific literature. Provide accurate, technical summaries focusing on key findings and developments."
+
+# How many articles go into one packed request, and the content budget of each
+PACK_SIZE = int(os.getenv("SUMMARY_PACK_SIZE", "5"))
+PACK_ARTICLE_TOKEN_BUDGET = int(os.getenv("SUMMARY_PACK_ARTICLE_TOKENS", "1500"))
+
+# Polling of provider batch jobs
+BATCH_POLL_INTERVAL = float(os.getenv("SUMMARY_BATCH_POLL_INTERVAL", "30"))
+BATCH_TIMEOUT = float(os.getenv("SUMMARY_BATCH_TIMEOUT", str(24 * 3600)))
+
+SUMMARY_INSTRUCTIONS = """Please provide a concise summary of this content, focusing specifically on:
+        1. Key information about the topic
+        2. Any clinical findings or research outcomes
+        3. Development status or regulatory updates
+        4. Technical details about methods or mechanisms (if mentioned)
+
+        If the content is not relevant to the topic, indicate that clearly."""
+
+def build_summary_prompt(text, url):
+    """Build the per-article summary prompt."""
+    return f"""
+        URL: {url}
+
+        Content: {text}
+
+        {SUMMARY_INSTRUCTIONS}
+        """
+
+def build_summary_request(text, url):
+    """Build the chat completion parameters for summarizing one article."""
+    return {
+        'model': SUMMARY_MODEL,
+        'messages': [
+            {"role": "system", "content": SUMMARY_SYSTEM_PROMPT},
+            {"role": "user", "content": build_summary_prompt(reduce_content(text), url)}
+        ],
+        'max_tokens': SUMMARY_MAX_TOKENS,
+        'temperature': SUMMARY_TEMPERATURE
+    }
+
+def build_packed_request(articles):
+    """
+    Build one chat completion request that summarizes several articles.
+
+    Args:
+        articles (list): Dictionaries with 'id', 'url' and 'text'
+
+    Returns:
+        dict: Chat completion parameters asking for a JSON object of summaries
+    """
+    prompt = "Summarize each of the following articles separately.\n\n"
+    for article in articles:
+        text = reduce_content(article['text'], PACK_ARTICLE_TOKEN_BUDGET)
+        prompt += f"ARTICLE {article['id']}:\nURL: {article['url']}\nContent: {text}\n\n"
+    prompt += """For each article, provide a concise summary focusing on key information about the topic, any clinical findings or research outcomes, development status or regulatory updates, and technical details about methods or mechanisms (if mentioned). If an article is not relevant to the topic, indicate that clearly in its summary.
+
+Respond with a JSON object of the form {"summaries": [{"id": "<article id>", "summary": "<summary>"}]} containing one entry per article."""
+
+    return {
+        'model': SUMMARY_MODEL,
+        'messages': [
+            {"role": "system", "content": SUMMARY_SYSTEM_PROMPT},
+            {"role": "user", "content": prompt}
+        ],
+        'max_tokens': SUMMARY_MAX_TOKENS * len(articles),
+        'temperature': SUMMARY_TEMPERATURE,
+        'response_format': {"type": "json_object"}
+    }
+
+def parse_packed_response(content):
+    """Map article ids to summaries from a packed JSON response."""
+    data = json.loads(content)
+    return {
+        str(entry['id']): entry['summary'].strip()
+        for entry in data.get('summaries', [])
+        if entry.get('id') is not None and entry.get('summary')
+    }
+
+def summarize_single(client, article):
+    """Summarize one article with its own request."""
+    try:
+        response = client.chat.completions.create(**build_summary_request(article['text'], article['url']))
+        return response.choices[0].message.content.strip()
+    except Exception as e:
+        return f"Error generating summary: {str(e)}"
+
+def summarize_packed(client, articles, pack_size=PACK_SIZE):
+    """
+    Summarize articles several at a time in structured multi-article requests.
+
+    Articles missing from a packed response are summarized individually.
+
+    Args:
+        client: OpenAI client
+        articles (list): Dictionaries with 'id', 'url' and 'text'
+        pack_size (int): Articles per request
+
+    Returns:
+        dict: Article id to summary
+    """
+    summaries = {}
+    for i in range(0, len(articles), pack_size):
+        pack = articles[i:i+pack_size]
+        try:
+            response = client.chat.completions.create(**build_packed_request(pack))
+            summaries.update(parse_packed_response(response.choices[0].message.content))
+        except Exception as e:
+            print(f"Error generating packed summaries, falling back to single requests: {str(e)}")
+
+        for article in pack:
+            if str(article['id']) not in summaries:
+                summaries[str(article['id'])] = summarize_single(client, article)
+    return summaries
+
+def summarize_with_batch_api(client, articles, poll_interval=BATCH_POLL_INTERVAL, timeout=BATCH_TIMEOUT):
+    """
+    Summarize articles through a provider batch job.
+
+    Writes one chat completion request per article to a JSONL file, submits it
+    as a batch and waits for the output file.
+
+    Args:
+        client: OpenAI client
+        articles (list): Dictionaries with 'id', 'url' and 'text'
+        poll_interval (float): Seconds between status checks
+        timeout (float): Seconds to wait for the batch to finish
+
+    Returns:
+        dict: Article id to summary
+    """
+    lines = []
+    for article in articles:
+        lines.append(json.dumps({
+            'custom_id': str(article['id']),
+            'method': 'POST',
+            'url': '/v1/chat/completions',
+            'body': build_summary_request(article['text'], article['url'])
+        }))
+    batch_input = io.BytesIO('\n'.join(lines).encode('utf-8'))
+
+    input_file = client.files.create(file=('summaries.jsonl', batch_input), purpose='batch')
+    batch = client.batches.create(
+        input_file_id=input_file.id,
+        endpoint='/v1/chat/completions',
+        completion_window='24h'
+    )
+    print(f"Submitted summary batch {batch.id} with {len(articles)} articles")
+
+    start = time.monotonic()
+    while batch.status not in ('completed', 'failed', 'expired', 'cancelled'):
+        if time.monotonic() - start > timeout:
+            raise TimeoutError(f"Summary batch {batch.id} did not finish within {timeout}s")
+        time.sleep(poll_interval)
+        batch = client.batches.retrieve(batch.id)
+
+    summaries = {}
+    if batch.output_file_id:
+        output = client.files.content(batch.output_file_id).text
+        for line in output.splitlines():
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            response = record.get('response') or {}
+            if response.get('status_code') == 200:
+                content = response['body']['choices'][0]['message']['content']
+                summaries[record['custom_id']] = content.strip()
+            else:
+                error = record.get('error') or response.get('body', {}).get('error')
+                summaries[record['custom_id']] = f"Error generating summary: {error}"
+
+    for article in articles:
+        summaries.setdefault(str(article['id']), f"Error generating summary: batch {batch.status}")
+    return summaries
+
+def summarize_articles(client, articles, mode='pack'):
+    """
+    Summarize a group of articles with one of the batch strategies.
+
+    Args:
+        client: OpenAI client
+        articles (list): Dictionaries with 'id', 'url' and 'text'
+        mode (str): 'pack' for multi-article requests, 'batch' for the provider batch API
+
+    Returns:
+        dict: Article id to summary
+    """
+    if not articles:
+        return {}
+    if mode == 'batch':
+        try:
+            return summarize_with_batch_api(client, articles)
+        except Exception as e:
+            print(f"Error running summary batch, falling back to packed requests: {str(e)}")
+    return summarize_packed(client, articles)
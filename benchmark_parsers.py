@@ -0,0 +1,75 @@
+import os
+import sys
+import glob
+import time
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+from html_parser import available_parsers
+from search_articles import extract_text_from_html
+
+# Saved pages used for the benchmark
+CORPUS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmark_pages")
+
+def load_corpus(corpus_dir=CORPUS_DIR):
+    """Load saved HTML pages from the corpus directory."""
+    pages = {}
+    for path in sorted(glob.glob(os.path.join(corpus_dir, "*.html"))):
+        with open(path, encoding="utf-8") as f:
+            pages[os.path.basename(path)] = f.read()
+    return pages
+
+def benchmark_backend(pages, backend, repeats=20):
+    """
+    Time parse + extract for every page with one parser backend.
+
+    Args:
+        pages (dict): Page name to HTML markup
+        backend (str): Parser backend name
+        repeats (int): Number of runs per page
+
+    Returns:
+        dict: Page name to mean milliseconds per run
+    """
+    timings = {}
+    for name, html in pages.items():
+        start = time.perf_counter()
+        for _ in range(repeats):
+            extract_text_from_html(html, name, backend)
+        timings[name] = (time.perf_counter() - start) * 1000 / repeats
+    return timings
+
+def main():
+    corpus_dir = sys.argv[1] if len(sys.argv) > 1 else CORPUS_DIR
+    pages = load_corpus(corpus_dir)
+    if not pages:
+        print(f"No .html pages found in {corpus_dir}")
+        return
+
+    backends = available_parsers()
+    print(f"Benchmarking {len(pages)} pages from {corpus_dir} with: {', '.join(backends)}")
+
+    results = {backend: benchmark_backend(pages, backend) for backend in backends}
+
+    # One row per page, one column per backend (ms per page)
+    width = max(len(name) for name in pages)
+    print(f"\n{'Page':<{width}}  " + "  ".join(f"{backend:>12}" for backend in backends))
+    for name in pages:
+        print(f"{name:<{width}}  " + "  ".join(f"{results[backend][name]:>10.2f}ms" for backend in backends))
+    print(f"{'Mean':<{width}}  " + "  ".join(
+        f"{sum(results[backend].values()) / len(pages):>10.2f}ms" for backend in backends))
+
+    # Check that every backend extracts the same text and metadata
+    reference = backends[-1]
+    for backend in backends[:-1]:
+        mismatches = [name for name, html in pages.items()
+                      if extract_text_from_html(html, name, backend) != extract_text_from_html(html, name, reference)]
+        if mismatches:
+            print(f"\nWarning: {backend} output differs from {reference} for: {', '.join(mismatches)}")
+        else:
+            print(f"\n{backend} output matches {reference} on all pages")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+import os
+import re
+from functools import lru_cache
+
+# Token budget for article content sent to the per-article summary prompt
+SUMMARY_TOKEN_BUDGET = int(os.getenv("SUMMARY_TOKEN_BUDGET", "3000"))
+
+# Section headings in order of importance for a summary (lower is kept first)
+SECTION_PRIORITIES = [
+    (re.compile(r'^(abstract|summary|objectives?|purpose)\b', re.IGNORECASE), 0),
+    (re.compile(r'^(results?|findings|outcomes?|efficacy|safety)\b', re.IGNORECASE), 1),
+    (re.compile(r'^(conclusions?|interpretation|discussion|implications)\b', re.IGNORECASE), 2),
+    (re.compile(r'^(background|introduction|methods?|study design|research design)\b', re.IGNORECASE), 3)
+]
+DEFAULT_PRIORITY = 4
+
+# Phrases that mark a short line as page furniture rather than article content
+BOILERPLATE_PATTERN = re.compile(
+    r'\b(cookies?|all rights reserved|copyright|privacy policy|terms of (use|service)|subscribe)\b|©',
+    re.IGNORECASE
+)
+
+# Navigation links, only dropped when they are the whole line ("analog insulin" is not "log in")
+NAVIGATION_PATTERN = re.compile(
+    r'^\W*(sign in|log in|create an account|share this( article)?|download pdf|advertisement|'
+    r'skip to (main )?content)\W*$',
+    re.IGNORECASE
+)
+
+# Headings are short; longer lines that start with a section word are labelled paragraphs
+MAX_HEADING_WORDS = 6
+
+@lru_cache(maxsize=1)
+def _get_encoding():
+    try:
+        import tiktoken
+        return tiktoken.get_encoding("cl100k_base")  # OpenAI's encoding
+    except Exception:
+        return None
+
+def count_tokens(text):
+    """Count tokens with tiktoken, or estimate them when it is unavailable."""
+    encoding = _get_encoding()
+    if encoding is None:
+        return len(text) // 4 + 1
+    return len(encoding.encode(text))
+
+def _section_priority(line):
+    """Priority of the section a line opens, or None if it is not a section start."""
+    for pattern, priority in SECTION_PRIORITIES:
+        if pattern.match(line):
+            return priority
+    return None
+
+def is_section_heading(line):
+    """Whether a line is a section heading such as "Results" or "Study design"."""
+    return _section_priority(line) is not None and len(line.split()) <= MAX_HEADING_WORDS
+
+def is_boilerplate(line):
+    """Whether a line is page furniture (cookie notices, copyright, navigation links)."""
+    return bool(NAVIGATION_PATTERN.match(line)) or (
+        len(line.split()) < 30 and bool(BOILERPLATE_PATTERN.search(line))
+    )
+
+def _line_signature(line):
+    """Order-insensitive signature used to detect near-duplicate lines."""
+    return frozenset(re.findall(r'[a-z0-9]+', line.lower()))
+
+def reduce_content(text, token_budget=SUMMARY_TOKEN_BUDGET):
+    """
+    Reduce article text to a token budget, keeping the most informative parts.
+
+    Boilerplate and near-duplicate lines are removed first. If the text still
+    exceeds the budget, lines are ranked by section (abstract, results and
+    conclusions before background and methods, the title always first) and by
+    position, and the best ranked lines that fit are returned in their original order.
+
+    Args:
+        text (str): Extracted article text, one paragraph per line
+        token_budget (int): Maximum number of tokens to keep
+
+    Returns:
+        str: Reduced text
+    """
+    if not text:
+        return text
+
+    lines = []
+    seen = set()
+    section = DEFAULT_PRIORITY
+    for position, line in enumerate(text.split('\n')):
+        line = line.strip()
+        if not line or is_boilerplate(line):
+            continue
+
+        signature = _line_signature(line)
+        if not signature or signature in seen:
+            continue
+        seen.add(signature)
+
+        # Headings switch the current section; "RESULTS: ..." style lines only rank themselves
+        priority = _section_priority(line)
+        if is_section_heading(line):
+            section = priority
+        elif priority is None:
+            priority = section
+        if position == 0:
+            priority = -1  # Title
+
+        lines.append((priority, position, line))
+
+    tokens = {position: count_tokens(line) for _, position, line in lines}
+    if sum(tokens.values()) <= token_budget:
+        return '\n'.join(line for _, _, line in lines)
+
+    kept = []
+    used = 0
+    for priority, position, line in sorted(lines):
+        if used + tokens[position] > token_budget:
+            continue
+        kept.append((position, line))
+        used += tokens[position]
+
+    return '\n'.join(line for _, line in sorted(kept))
@@ -0,0 +1,174 @@
+import os
+import threading
+import multiprocessing
+from io import BytesIO
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+
+from article_dedup import normalize_doi
+
+# Limits for document parsing
+PDF_MAX_PAGES = int(os.getenv("PDF_MAX_PAGES", "50"))
+DOCUMENT_MAX_CHARS = int(os.getenv("DOCUMENT_MAX_CHARS", "200000"))
+DOCUMENT_MAX_BYTES = int(os.getenv("DOCUMENT_MAX_BYTES", str(25 * 1024 * 1024)))
+DOCUMENT_TIMEOUT = float(os.getenv("DOCUMENT_TIMEOUT", "60"))
+DOCUMENT_WORKERS = int(os.getenv("DOCUMENT_WORKERS", "2"))
+
+# Process pool shared by all fetch threads, created on first use
+_process_pool = None
+_process_pool_lock = threading.Lock()
+
+def get_document_type(content_type, url):
+    """Return 'PDF' or 'DOCX' for documents we can parse, otherwise None."""
+    content_type = (content_type or '').lower()
+    path = url.lower().split('?')[0]
+    if 'application/pdf' in content_type or path.endswith('.pdf'):
+        return 'PDF'
+    if 'wordprocessingml' in content_type or path.endswith('.docx'):
+        return 'DOCX'
+    return None
+
+def _empty_metadata():
+    return {
+        'title': None,
+        'publication_date': None,
+        'authors': None,
+        'journal': None,
+        'doi': None,
+        'abstract': None
+    }
+
+def extract_text_from_pdf(pdf_data, max_pages=PDF_MAX_PAGES, max_chars=DOCUMENT_MAX_CHARS):
+    """
+    Extract text from a PDF page by page, stopping at the page or character cap.
+
+    Args:
+        pdf_data (bytes): PDF file content
+        max_pages (int): Maximum number of pages to read
+        max_chars (int): Stop once this many characters have been extracted
+
+    Returns:
+        tuple: (text, metadata)
+    """
+    from pypdf import PdfReader
+
+    reader = PdfReader(BytesIO(pdf_data))
+    pages = []
+    total_chars = 0
+    for i, page in enumerate(reader.pages):
+        if i >= max_pages or total_chars >= max_chars:
+            break
+        page_text = page.extract_text() or ''
+        pages.append(page_text)
+        total_chars += len(page_text)
+    text = '\n'.join(pages)[:max_chars]
+
+    metadata = _empty_metadata()
+    info = reader.metadata
+    if info:
+        metadata['title'] = info.title
+        metadata['authors'] = info.author
+        try:
+            if info.creation_date:
+                metadata['publication_date'] = info.creation_date.date().isoformat()
+        except Exception:
+            pass
+    metadata['doi'] = normalize_doi(text[:5000])
+    return text, metadata
+
+def extract_text_from_docx(docx_data, max_chars=DOCUMENT_MAX_CHARS):
+    """
+    Extract text from a Word document paragraph by paragraph, stopping at the character cap.
+
+    Args:
+        docx_data (bytes): DOCX file content
+        max_chars (int): Stop once this many characters have been extracted
+
+    Returns:
+        tuple: (text, metadata)
+    """
+    from docx import Document
+
+    document = Document(BytesIO(docx_data))
+    paragraphs = []
+    total_chars = 0
+    for paragraph in document.paragraphs:
+        if total_chars >= max_chars:
+            break
+        paragraphs.append(paragraph.text)
+        total_chars += len(paragraph.text) + 1
+    text = '\n'.join(paragraphs)[:max_chars]
+
+    metadata = _empty_metadata()
+    properties = document.core_properties
+    metadata['title'] = properties.title or None
+    metadata['authors'] = properties.author or None
+    if properties.created:
+        metadata['publication_date'] = properties.created.date().isoformat()
+    metadata['doi'] = normalize_doi(text[:5000])
+    return text, metadata
+
+def _extract_document(data, document_type):
+    """Run the extractor for a document type; executed in a worker process."""
+    if document_type == 'PDF':
+        return extract_text_from_pdf(data)
+    return extract_text_from_docx(data)
+
+def get_process_pool():
+    """Get the process pool used for CPU-heavy document parsing."""
+    global _process_pool
+    with _process_pool_lock:
+        if _process_pool is None:
+            # spawn avoids forking a process that is running fetch threads
+            _process_pool = ProcessPoolExecutor(
+                max_workers=DOCUMENT_WORKERS,
+                mp_context=multiprocessing.get_context('spawn')
+            )
+        return _process_pool
+
+def reset_process_pool(pool, terminate=False):
+    """
+    Shut down a broken pool so that get_process_pool() creates a fresh one.
+
+    Only the given pool is replaced; if another thread already replaced it,
+    the newer pool is kept. terminate=True also kills its worker processes,
+    which a shutdown alone leaves parsing until their current file is done.
+    """
+    global _process_pool
+    with _process_pool_lock:
+        if _process_pool is pool:
+            _process_pool = None
+    if terminate:
+        for process in list((getattr(pool, '_processes', None) or {}).values()):
+            process.terminate()
+    pool.shutdown(wait=False, cancel_futures=True)
+
+def extract_document_text(data, document_type):
+    """
+    Extract text and metadata from a PDF or DOCX in the document process pool.
+
+    Args:
+        data (bytes): Document content
+        document_type (str): 'PDF' or 'DOCX'
+
+    Returns:
+        tuple: (text, metadata), or (None, None) if extraction failed
+    """
+    pool = get_process_pool()
+    try:
+        future = pool.submit(_extract_document, data, document_type)
+        return future.result(timeout=DOCUMENT_TIMEOUT)
+    except FutureTimeoutError:
+        # The worker keeps parsing a file after its caller gives up, so kill the
+        # pool rather than let a few slow files occupy every worker
+        print(f"Timed out extracting text from {document_type}, restarting pool")
+        reset_process_pool(pool, terminate=True)
+        return None, None
+    except BrokenProcessPool as e:
+        # A worker died (e.g. on a malformed file); start a fresh pool next time
+        print(f"Document worker crashed, restarting pool: {str(e)}")
+        reset_process_pool(pool)
+        return None, None
+    except Exception as e:
+        print(f"Error extracting text from {document_type}: {str(e)}")
+        return None, None
@@ -0,0 +1,40 @@
+import os
+import importlib.util
+
+# BeautifulSoup tree builders; the first is the default. lxml is opt-in through
+# HTML_PARSER, as benchmark_parsers.py showed no consistent speedup on saved pages.
+PARSER_BACKENDS = ['html.parser', 'lxml']
+
+# Modules each backend needs in addition to BeautifulSoup
+BACKEND_MODULES = {
+    'lxml': 'lxml',
+    'html.parser': None
+}
+
+def available_parsers():
+    """List the parser backends that can be used in this environment."""
+    return [
+        backend for backend in PARSER_BACKENDS
+        if BACKEND_MODULES[backend] is None or importlib.util.find_spec(BACKEND_MODULES[backend])
+    ]
+
+def get_parser_backend():
+    """
+    Get the parser backend to use for HTML pages.
+
+    The HTML_PARSER environment variable selects a backend explicitly; otherwise
+    the built-in html.parser is used.
+    """
+    backends = available_parsers()
+    requested = os.getenv("HTML_PARSER")
+    if requested:
+        if requested in backends:
+            return requested
+        print(f"HTML parser '{requested}' is not available, using {backends[0]}")
+    return backends[0]
+
+def make_soup(markup, backend=None):
+    """Parse HTML markup with the selected backend."""
+    from bs4 import BeautifulSoup
+
+    return BeautifulSoup(markup, backend or get_parser_backend())
@@ -0,0 +1,150 @@
+import os
+import time
+import sqlite3
+import hashlib
+
+from article_dedup import canonicalize_url
+
+# Location of the per-chunk ingestion manifest
+INGESTION_MANIFEST_PATH = os.getenv(
+    "INGESTION_MANIFEST_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "ingestion_manifest.db")
+)
+
+# Chunk states: pending (not embedded yet), embedded (embedding saved, not in the index) and upserted
+PENDING = 'pending'
+EMBEDDED = 'embedded'
+UPSERTED = 'upserted'
+
+def get_manifest_connection(path=None):
+    """Open the manifest database, creating the table if needed."""
+    conn = sqlite3.connect(path or INGESTION_MANIFEST_PATH, timeout=30)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS chunks (
+            vector_id TEXT PRIMARY KEY,
+            URL TEXT NOT NULL,
+            chunk_index INTEGER NOT NULL,
+            content_hash TEXT NOT NULL,
+            state TEXT NOT NULL,
+            embedding BLOB,
+            attempts INTEGER DEFAULT 0,
+            error TEXT,
+            updated_at REAL
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS chunks_url ON chunks (URL)")
+    return conn
+
+def make_vector_id(url, chunk_index):
+    """Deterministic vector id, so re-ingesting an article overwrites its vectors instead of duplicating them."""
+    digest = hashlib.sha1(canonicalize_url(url).encode('utf-8')).hexdigest()[:24]
+    return f"{digest}-{chunk_index}"
+
+def content_hash(text):
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+def sync_article(conn, url, chunks, text_hash):
+    """
+    Make the manifest match the current chunks of an article.
+
+    Chunks whose article content changed since they were recorded start
+    over. Chunks that no longer exist are removed from the manifest, except
+    upserted ones: they stay until remove_chunks() is called after their
+    vectors are deleted from the index, so a failed delete is retried.
+
+    Args:
+        conn: Manifest connection
+        url (str): Article URL
+        chunks (list): Chunk texts
+        text_hash (str): content_hash() of the chunked text
+
+    Returns:
+        tuple: (states, stale_ids) where states maps chunk index to state and
+            stale_ids are upserted vectors that must be deleted from the index
+    """
+    url = canonicalize_url(url)
+    now = time.time()
+    existing = {
+        row[0]: row[1:]
+        for row in conn.execute("SELECT chunk_index, content_hash, state FROM chunks WHERE URL = ?", (url,))
+    }
+
+    stale_ids = [
+        make_vector_id(url, i) for i, (_, state) in existing.items()
+        if i >= len(chunks) and state == UPSERTED
+    ]
+    conn.execute(
+        "DELETE FROM chunks WHERE URL = ? AND chunk_index >= ? AND state != ?",
+        (url, len(chunks), UPSERTED)
+    )
+
+    states = {}
+    for i in range(len(chunks)):
+        if i in existing and existing[i][0] == text_hash:
+            states[i] = existing[i][1]
+            continue
+        conn.execute(
+            """
+            INSERT OR REPLACE INTO chunks (vector_id, URL, chunk_index, content_hash, state, embedding, attempts, error, updated_at)
+            VALUES (?, ?, ?, ?, ?, NULL, 0, NULL, ?)
+            """,
+            (make_vector_id(url, i), url, i, text_hash, PENDING, now)
+        )
+        states[i] = PENDING
+    conn.commit()
+    return states, stale_ids
+
+def save_embedding(conn, vector_id, embedding):
+    """Checkpoint a chunk's embedding so it is not recomputed if the upsert fails."""
+    import numpy as np
+
+    conn.execute(
+        "UPDATE chunks SET state = ?, embedding = ?, error = NULL, updated_at = ? WHERE vector_id = ?",
+        (EMBEDDED, np.asarray(embedding, dtype=np.float32).tobytes(), time.time(), vector_id)
+    )
+    conn.commit()
+
+def load_embeddings(conn, vector_ids):
+    """Get saved embeddings by vector id."""
+    import numpy as np
+
+    embeddings = {}
+    for vector_id in vector_ids:
+        row = conn.execute("SELECT embedding FROM chunks WHERE vector_id = ?", (vector_id,)).fetchone()
+        if row and row[0] is not None:
+            embeddings[vector_id] = np.frombuffer(row[0], dtype=np.float32).tolist()
+    return embeddings
+
+def mark_upserted(conn, vector_ids):
+    """Record chunks as stored in the index; their embeddings are no longer needed."""
+    now = time.time()
+    conn.executemany(
+        "UPDATE chunks SET state = ?, embedding = NULL, error = NULL, updated_at = ? WHERE vector_id = ?",
+        [(UPSERTED, now, vector_id) for vector_id in vector_ids]
+    )
+    conn.commit()
+
+def mark_failed(conn, vector_ids, error):
+    """Record a failed attempt; the chunks keep their state and are retried."""
+    now = time.time()
+    conn.executemany(
+        "UPDATE chunks SET attempts = attempts + 1, error = ?, updated_at = ? WHERE vector_id = ?",
+        [(str(error), now, vector_id) for vector_id in vector_ids]
+    )
+    conn.commit()
+
+def remove_chunks(conn, vector_ids):
+    """Forget chunks whose vectors were deleted from the index."""
+    conn.executemany("DELETE FROM chunks WHERE vector_id = ?", [(vector_id,) for vector_id in vector_ids])
+    conn.commit()
+
+def article_progress(url, path=None):
+    """Count an article's chunks by state."""
+    conn = get_manifest_connection(path)
+    try:
+        rows = conn.execute(
+            "SELECT state, COUNT(*) FROM chunks WHERE URL = ? GROUP BY state", (canonicalize_url(url),)
+        ).fetchall()
+        return dict(rows)
+    finally:
+        conn.close()
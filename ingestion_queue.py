@@ -0,0 +1,350 @@
+import os
+import time
+import sqlite3
+import threading
+
+# Location of the ingestion job table and how often the worker checks for new jobs
+INGESTION_QUEUE_PATH = os.getenv(
+    "INGESTION_QUEUE_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "ingestion_jobs.db")
+)
+INGESTION_POLL_INTERVAL = float(os.getenv("INGESTION_POLL_INTERVAL", "5"))
+
+# Job states that still have work; running jobs are queued again when the worker restarts
+ACTIVE_STATES = ('queued', 'running')
+
+# Worker thread shared by all sessions of this process
+_worker = None
+_worker_lock = threading.Lock()
+_wake_worker = threading.Event()
+_stop_worker = threading.Event()
+
+def get_queue_connection(path=None):
+    """Open the ingestion job database, creating the tables if needed."""
+    conn = sqlite3.connect(path or INGESTION_QUEUE_PATH, timeout=30)
+    conn.row_factory = sqlite3.Row
+    conn.executescript("""
+        CREATE TABLE IF NOT EXISTS jobs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            status TEXT NOT NULL,
+            total_articles INTEGER NOT NULL,
+            done_articles INTEGER DEFAULT 0,
+            failed_articles INTEGER DEFAULT 0,
+            total_chunks INTEGER DEFAULT 0,
+            current_article TEXT,
+            error TEXT,
+            created_at REAL,
+            started_at REAL,
+            finished_at REAL
+        );
+        CREATE TABLE IF NOT EXISTS job_articles (
+            job_id INTEGER NOT NULL,
+            position INTEGER NOT NULL,
+            URL TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'pending',
+            chunks INTEGER DEFAULT 0,
+            error TEXT,
+            updated_at REAL,
+            PRIMARY KEY (job_id, position)
+        );
+    """)
+    return conn
+
+def enqueue_ingestion(urls, path=None):
+    """
+    Queue the articles with these URLs for storage in the vector database.
+
+    The articles must already be in the article store. Call start_worker()
+    to make sure the queue is being processed.
+
+    Args:
+        urls (list): Article URLs, processed in this order
+        path (str, optional): Job database file, defaults to INGESTION_QUEUE_PATH
+
+    Returns:
+        int: Job id
+    """
+    urls = list(urls)
+    conn = get_queue_connection(path)
+    try:
+        cursor = conn.execute(
+            "INSERT INTO jobs (status, total_articles, created_at) VALUES ('queued', ?, ?)",
+            (len(urls), time.time())
+        )
+        job_id = cursor.lastrowid
+        conn.executemany(
+            "INSERT INTO job_articles (job_id, position, URL) VALUES (?, ?, ?)",
+            [(job_id, i, url) for i, url in enumerate(urls)]
+        )
+        conn.commit()
+    finally:
+        conn.close()
+    _wake_worker.set()
+    return job_id
+
+def _job_dict(row):
+    """Convert a job row to a dictionary with elapsed time and throughput."""
+    job = dict(row)
+    end = job['finished_at'] or time.time()
+    elapsed = end - job['started_at'] if job['started_at'] else 0
+    processed = job['done_articles'] + job['failed_articles']
+    job['elapsed'] = elapsed
+    job['articles_per_minute'] = processed / elapsed * 60 if elapsed else 0
+    job['chunks_per_second'] = job['total_chunks'] / elapsed if elapsed else 0
+    job['progress'] = processed / job['total_articles'] if job['total_articles'] else 1
+    return job
+
+def get_job(job_id, path=None):
+    """Get the status of a job, or None if it does not exist."""
+    conn = get_queue_connection(path)
+    try:
+        row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return _job_dict(row) if row else None
+    finally:
+        conn.close()
+
+def list_jobs(limit=10, active_only=False, path=None):
+    """List the most recent jobs, newest first."""
+    conn = get_queue_connection(path)
+    try:
+        if active_only:
+            rows = conn.execute(
+                "SELECT * FROM jobs WHERE status IN (?, ?) ORDER BY id DESC LIMIT ?", (*ACTIVE_STATES, limit)
+            ).fetchall()
+        else:
+            rows = conn.execute("SELECT * FROM jobs ORDER BY id DESC LIMIT ?", (limit,)).fetchall()
+        return [_job_dict(row) for row in rows]
+    finally:
+        conn.close()
+
+def cancel_job(job_id, path=None):
+    """Cancel a queued or running job; a running job stops after its current article."""
+    conn = get_queue_connection(path)
+    try:
+        conn.execute(
+            "UPDATE jobs SET status = 'cancelled', finished_at = ? WHERE id = ? AND status IN (?, ?)",
+            (time.time(), job_id, *ACTIVE_STATES)
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+def retry_failed_articles(job_id, path=None):
+    """
+    Queue the failed articles of a finished job again.
+
+    Chunks stored before the failure are recorded in the ingestion
+    manifest, so only the missing ones are embedded and upserted.
+
+    Returns:
+        int: Number of articles queued again
+    """
+    conn = get_queue_connection(path)
+    try:
+        retried = conn.execute(
+            "UPDATE job_articles SET status = 'pending', error = NULL WHERE job_id = ? AND status = 'failed'",
+            (job_id,)
+        ).rowcount
+        if retried:
+            conn.execute(
+                """
+                UPDATE jobs SET status = 'queued', failed_articles = failed_articles - ?, error = NULL, finished_at = NULL
+                WHERE id = ? AND status NOT IN (?, ?)
+                """,
+                (retried, job_id, *ACTIVE_STATES)
+            )
+        conn.commit()
+    finally:
+        conn.close()
+    if retried:
+        _wake_worker.set()
+    return retried
+
+def format_job_status(job):
+    """One-line description of a job for status displays."""
+    processed = job['done_articles'] + job['failed_articles']
+    status = f"Ingestion job {job['id']} {job['status']}: {processed}/{job['total_articles']} articles, {job['total_chunks']} chunks"
+    if job['failed_articles']:
+        status += f", {job['failed_articles']} failed"
+    if job['status'] == 'running' and job['elapsed']:
+        status += f" ({job['articles_per_minute']:.1f} articles/min)"
+    if job['error']:
+        status += f" - {job['error']}"
+    return status
+
+def _default_ingest():
+    """Connect to the vector store and return a function that stores one article."""
+    from vector_store import get_pinecone_index, reset_pinecone_index, is_connection_error, store_article_chunks
+
+    # Fail the job early if Pinecone is unreachable; the handle is shared with the pages
+    get_pinecone_index()
+
+    def ingest(article):
+        try:
+            return store_article_chunks(article, get_pinecone_index())
+        except Exception as e:
+            # The next article connects again if the connection broke; other
+            # errors (embedding failures, rejected requests) keep the handle
+            if is_connection_error(e):
+                reset_pinecone_index()
+            raise
+    return ingest
+
+def run_job(job_id, ingest_factory=_default_ingest, path=None, store_path=None):
+    """
+    Process the pending articles of a job, checkpointing after each one.
+
+    Articles already marked done or failed are skipped, so a job interrupted
+    by a crash or restart continues where it stopped.
+
+    Args:
+        job_id (int): Job to run
+        ingest_factory (function): Returns a function that stores one article
+            dictionary and returns its number of chunks
+        path (str, optional): Job database file
+        store_path (str, optional): Article store file
+    """
+    # Imported here so that pages showing job status do not load pandas
+    from article_store import load_articles
+
+    conn = get_queue_connection(path)
+    try:
+        conn.execute(
+            "UPDATE jobs SET status = 'running', started_at = COALESCE(started_at, ?) WHERE id = ?",
+            (time.time(), job_id)
+        )
+        conn.commit()
+
+        try:
+            ingest = ingest_factory()
+        except Exception as e:
+            # Fail the pending articles too, so that retry_failed_articles can queue them again
+            failed = conn.execute(
+                "UPDATE job_articles SET status = 'failed', error = ?, updated_at = ? WHERE job_id = ? AND status = 'pending'",
+                (str(e), time.time(), job_id)
+            ).rowcount
+            conn.execute(
+                "UPDATE jobs SET status = 'failed', failed_articles = failed_articles + ?, error = ?, finished_at = ? WHERE id = ?",
+                (failed, str(e), time.time(), job_id)
+            )
+            conn.commit()
+            return
+
+        pending = conn.execute(
+            "SELECT position, URL FROM job_articles WHERE job_id = ? AND status = 'pending' ORDER BY position",
+            (job_id,)
+        ).fetchall()
+        for position, url in pending:
+            if conn.execute("SELECT status FROM jobs WHERE id = ?", (job_id,)).fetchone()[0] == 'cancelled':
+                return
+
+            conn.execute("UPDATE jobs SET current_article = ? WHERE id = ?", (url, job_id))
+            conn.commit()
+
+            chunks, error = 0, None
+            try:
+                articles = load_articles([url], path=store_path)
+                if articles.empty:
+                    raise ValueError(f"Article not found in article store: {url}")
+                chunks = ingest(articles.iloc[0].to_dict())
+            except Exception as e:
+                error = str(e)
+                print(f"Error ingesting {url}: {error}")
+
+            # Checkpoint the article and the job counters together
+            conn.execute(
+                "UPDATE job_articles SET status = ?, chunks = ?, error = ?, updated_at = ? WHERE job_id = ? AND position = ?",
+                ('failed' if error else 'done', chunks, error, time.time(), job_id, position)
+            )
+            conn.execute(
+                """
+                UPDATE jobs SET
+                    done_articles = done_articles + ?,
+                    failed_articles = failed_articles + ?,
+                    total_chunks = total_chunks + ?
+                WHERE id = ?
+                """,
+                (0 if error else 1, 1 if error else 0, chunks, job_id)
+            )
+            conn.commit()
+
+        conn.execute(
+            "UPDATE jobs SET status = 'completed', current_article = NULL, finished_at = ? WHERE id = ? AND status = 'running'",
+            (time.time(), job_id)
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+def _next_job_id(path=None):
+    """Oldest job that still has work, running jobs (interrupted by a restart) first."""
+    conn = get_queue_connection(path)
+    try:
+        row = conn.execute(
+            "SELECT id FROM jobs WHERE status IN (?, ?) ORDER BY status = 'running' DESC, id LIMIT 1",
+            ACTIVE_STATES
+        ).fetchone()
+        return row[0] if row else None
+    finally:
+        conn.close()
+
+def requeue_interrupted_jobs(path=None):
+    """
+    Mark jobs left running by a process that stopped mid-job as queued again.
+
+    Only call this when no worker is running jobs from the same database.
+    Their articles that were not checkpointed are still pending.
+
+    Returns:
+        int: Number of jobs queued again
+    """
+    conn = get_queue_connection(path)
+    try:
+        requeued = conn.execute(
+            "UPDATE jobs SET status = 'queued', current_article = NULL WHERE status = 'running'"
+        ).rowcount
+        conn.commit()
+        return requeued
+    finally:
+        conn.close()
+
+def _worker_loop(ingest_factory, path, store_path):
+    while not _stop_worker.is_set():
+        _wake_worker.clear()
+        try:
+            job_id = _next_job_id(path)
+            if job_id is not None:
+                run_job(job_id, ingest_factory, path, store_path)
+                continue
+        except Exception as e:
+            print(f"Error in ingestion worker: {str(e)}")
+        _wake_worker.wait(INGESTION_POLL_INTERVAL)
+
+def start_worker(ingest_factory=_default_ingest, path=None, store_path=None):
+    """Start the background ingestion worker of this process if it is not running."""
+    global _worker
+    with _worker_lock:
+        if _worker is None or not _worker.is_alive():
+            # Jobs marked running belong to a worker that is gone, such as one that died with its process
+            requeued = requeue_interrupted_jobs(path)
+            if requeued:
+                print(f"Requeued {requeued} interrupted ingestion jobs")
+            _stop_worker.clear()
+            _worker = threading.Thread(
+                target=_worker_loop,
+                args=(ingest_factory, path, store_path),
+                name="ingestion-worker",
+                daemon=True
+            )
+            _worker.start()
+        return _worker
+
+def stop_worker(timeout=None):
+    """Stop the background ingestion worker after its current job."""
+    global _worker
+    with _worker_lock:
+        if _worker is not None:
+            _stop_worker.set()
+            _wake_worker.set()
+            _worker.join(timeout)
+            _worker = None
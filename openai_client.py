@@ -0,0 +1,18 @@
+from functools import lru_cache
+
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+@lru_cache(maxsize=None)
+def get_openai_client():
+    """
+    Get the OpenAI client shared by this process, created on first use.
+
+    The openai package takes a large part of a page's cold start, so it is
+    only imported when a summary, embedding or chat answer is needed.
+    """
+    from openai import OpenAI
+
+    return OpenAI()
@@ -1,27 +1,17 @@
 import streamlit as st
-from openai import OpenAI
 import time
 import sys
 import os
 
 # Add parent directory to path to import vector_store
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from vector_store import initialize_pinecone, get_relevant_context
+from openai_client import get_openai_client
+from vector_store import get_pinecone_error, get_relevant_context
+from ingestion_queue import list_jobs, format_job_status
 
 # Set page config
 st.set_page_config(page_title="Medical Research Q&A Chat", layout="wide")
 
-# Initialize OpenAI client
-client = OpenAI()
-
-# Initialize Pinecone
-try:
-    pinecone_index = initialize_pinecone()
-    pinecone_initialized = True
-except Exception as e:
-    pinecone_initialized = False
-    pinecone_error = str(e)
-
 # Initialize session state for chat history
 if "messages" not in st.session_state:
     st.session_state.messages = [
@@ -33,9 +23,10 @@ def generate_response(prompt):
     try:
         # Get relevant context from vector database if initialized
         context = ""
-        if pinecone_initialized:
+        pinecone_error = get_pinecone_error()
+        if pinecone_error is None:
             with st.spinner("Searching knowledge base..."):
-                context = get_relevant_context(prompt, pinecone_index)
+                context = get_relevant_context(prompt)
         
         # If no context is found, return a message indicating no information is available
         if not context:
@@ -69,7 +60,7 @@ Here is the information from our knowledge base:
         ] + st.session_state.messages  # Include chat history
         
         # Call OpenAI API
-        response = client.chat.completions.create(
+        response = get_openai_client().chat.completions.create(
             model="gpt-4o-mini",
             messages=messages,
             max_tokens=1000,  # Further increased for longer responses with detailed citations
@@ -78,7 +69,7 @@ Here is the information from our knowledge base:
         
         return response.choices[0].message.content
     except Exception as e:
-        if not pinecone_initialized:
+        if pinecone_error is not None:
             return f"An error occurred: Vector database is not initialized. Please check your Pinecone API key. Error: {pinecone_error}"
         return f"An error occurred: {str(e)}"
 
@@ -100,13 +91,18 @@ def main():
     This AI assistant can help you understand complex medical concepts and find relevant information.
     """)
     
-    # Display vector database status
-    if pinecone_initialized:
+    # Display vector database status; the connection is made once per process and reused
+    pinecone_error = get_pinecone_error()
+    if pinecone_error is None:
         st.success("✅ Connected to knowledge base")
     else:
         st.error(f"❌ Not connected to knowledge base: {pinecone_error}")
         st.info("Please add PINECONE_API_KEY to your .env file to enable knowledge base search.")
     
+    # Articles still being stored in the background are not searchable yet
+    for job in list_jobs(limit=3, active_only=True):
+        st.sidebar.info(format_job_status(job))
+    
     # Chat interface
     chat_container = st.container()
     
@@ -1,29 +1,23 @@
 import streamlit as st
-import pandas as pd
 import sys
 import os
 import time
 from datetime import datetime
 import io
-from openai import OpenAI
 
 # Add parent directory to path to import vector_store
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from vector_store import initialize_pinecone, query_similar_chunks
+from openai_client import get_openai_client
+from vector_store import get_pinecone_error, query_similar_chunks
+from summary_cache import make_summary_key, get_cached_summary, store_cached_summary
+from article_store import load_selection
+from ingestion_queue import list_jobs, format_job_status
 
 # Set page config
 st.set_page_config(page_title="Research Summary Generator", layout="wide")
 
-# Initialize OpenAI client
-client = OpenAI()
-
-# Initialize Pinecone
-try:
-    pinecone_index = initialize_pinecone()
-    pinecone_initialized = True
-except Exception as e:
-    pinecone_initialized = False
-    pinecone_error = str(e)
+# Model used for research summaries (part of the summary cache key)
+SUMMARY_MODEL = "gpt-4o-mini"
 
 def load_selected_articles():
     """Load articles that were selected in the main app."""
@@ -34,16 +28,10 @@ def load_selected_articles():
         
         # Check if a search has been performed in the current session
         if 'search_complete' in st.session_state and st.session_state.search_complete:
-            # Only try to load from saved files if a search has been completed
-            try:
-                df = pd.read_json('search_results.json')
-                return df
-            except:
-                try:
-                    df = pd.read_csv('search_results.csv')
-                    return df
-                except:
-                    return None
+            # Only load the stored selection if a search has been completed,
+            # without the full article content the summary does not use
+            df = load_selection()
+            return df if not df.empty else None
         else:
             # No search has been performed in the current session
             return None
@@ -105,19 +93,29 @@ def create_summary_prompt(article_data, focus_areas, summary_type):
     
     return prompt
 
-def generate_research_summary(articles, focus_areas, summary_type="comprehensive"):
+def generate_research_summary(articles, focus_areas, summary_type="comprehensive", regenerate=False):
     """
     Generate comprehensive research summary using OpenAI.
     
+    Summaries are cached across sessions by article set, focus areas,
+    summary type and model.
+    
     Args:
         articles (pd.DataFrame): DataFrame containing article information
         focus_areas (list): List of areas to focus on in the summary
         summary_type (str): Type of summary to generate
+        regenerate (bool): Ignore any cached summary and call OpenAI again
         
     Returns:
         str: Generated summary
     """
     try:
+        cache_key = make_summary_key(articles, focus_areas, summary_type, SUMMARY_MODEL)
+        if not regenerate:
+            cached_summary = get_cached_summary(cache_key)
+            if cached_summary:
+                return cached_summary
+        
         # Prepare article data for the prompt
         article_data = []
         for _, article in articles.iterrows():
@@ -135,8 +133,8 @@ def generate_research_summary(articles, focus_areas, summary_type="comprehensive
         prompt = create_summary_prompt(article_data, focus_areas, summary_type)
         
         # Generate summary using OpenAI
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
+        response = get_openai_client().chat.completions.create(
+            model=SUMMARY_MODEL,
             messages=[
                 {"role": "system", "content": "You are a medical research assistant specializing in creating comprehensive research summaries. Your summaries are well-structured, insightful, and highlight key findings, methodologies, and gaps in the research."},
                 {"role": "user", "content": prompt}
@@ -145,7 +143,16 @@ def generate_research_summary(articles, focus_areas, summary_type="comprehensive
             temperature=0.5
         )
         
-        return response.choices[0].message.content
+        summary = response.choices[0].message.content
+        store_cached_summary(
+            cache_key,
+            summary,
+            model=SUMMARY_MODEL,
+            summary_type=summary_type,
+            focus_areas=focus_areas,
+            article_count=len(articles)
+        )
+        return summary
     except Exception as e:
         return f"Error generating summary: {str(e)}"
 
@@ -167,13 +174,18 @@ def main():
     This tool analyzes the selected articles and creates a structured summary highlighting key findings, methodologies, and research gaps.
     """)
     
-    # Display vector database status
-    if pinecone_initialized:
+    # Display vector database status; the connection is made once per process and reused
+    pinecone_error = get_pinecone_error()
+    if pinecone_error is None:
         st.success("✅ Connected to knowledge base")
     else:
         st.error(f"❌ Not connected to knowledge base: {pinecone_error}")
         st.info("Please add PINECONE_API_KEY to your .env file to enable knowledge base search.")
     
+    # Articles still being stored in the background are not searchable yet
+    for job in list_jobs(limit=3, active_only=True):
+        st.sidebar.info(format_job_status(job))
+    
     # Load articles
     articles = load_selected_articles()
     
@@ -205,6 +217,12 @@ def main():
             help="Select areas to focus on in the summary"
         )
     
+    regenerate = st.checkbox(
+        "Regenerate summary",
+        value=False,
+        help="Ignore any cached summary for this selection and generate a new one"
+    )
+    
     # Generate summary button
     if st.button("Generate Research Summary", type="primary"):
         if not focus_areas:
@@ -216,7 +234,8 @@ def main():
             summary = generate_research_summary(
                 articles, 
                 focus_areas, 
-                summary_type.lower()
+                summary_type.lower(),
+                regenerate=regenerate
             )
             
             # Store in session state
@@ -1,21 +1,130 @@
 import os
 from dotenv import load_dotenv
-import pandas as pd
 import requests
-from bs4 import BeautifulSoup
-from openai import OpenAI
+from html_parser import make_soup
+from batch_summarizer import build_summary_request, summarize_articles, PACK_SIZE
+from document_extractors import get_document_type, extract_document_text, DOCUMENT_MAX_BYTES
+from article_dedup import ArticleDeduplicator
+from content_reducer import is_section_heading
+from openai_client import get_openai_client
 from datetime import datetime, timedelta
 import mimetypes
 import time
-from googlesearch import search
 import re
 import random
+import asyncio
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+import math
+import json
+from functools import lru_cache
+from urllib.parse import urlparse
+import xml.etree.ElementTree as ET
 
 # Load environment variables
 load_dotenv()
 
-# Initialize OpenAI client
-client = OpenAI()
+# Overall search deadline and per-source deadlines in seconds
+SEARCH_DEADLINE = float(os.getenv("SEARCH_DEADLINE", "45"))
+SOURCE_DEADLINES = {
+    'pubmed': float(os.getenv("PUBMED_DEADLINE", "30")),
+    'clinicaltrials': float(os.getenv("CLINICALTRIALS_DEADLINE", "30")),
+    'journal_api': float(os.getenv("JOURNAL_API_DEADLINE", "20")),
+    'domain_search': float(os.getenv("DOMAIN_SEARCH_DEADLINE", "20"))
+}
+
+# Download limits for web pages
+MAX_DOWNLOAD_BYTES = int(os.getenv("MAX_DOWNLOAD_BYTES", str(5 * 1024 * 1024)))
+DOWNLOAD_TIMEOUT = float(os.getenv("DOWNLOAD_TIMEOUT", "30"))
+
+# How articles are summarized: 'single', 'pack' or 'batch' (see iter_search_articles)
+SUMMARY_MODE = os.getenv("SUMMARY_MODE", "single")
+
+# Number of articles fetched and summarized in parallel
+FETCH_WORKERS = int(os.getenv("FETCH_WORKERS", "4"))
+
+# How many candidate URLs to request per wanted result, and how to split them across sources
+CANDIDATE_FACTOR = float(os.getenv("CANDIDATE_FACTOR", "1.5"))
+SOURCE_WEIGHTS = {
+    'pubmed': 4,
+    'clinicaltrials': 3,
+    'journal_api': 1,
+    'domain_search': 1
+}
+
+# Month abbreviations used in PubMed dates
+MONTHS = {month: f"{i:02d}" for i, month in enumerate(
+    ['jan', 'feb', 'mar', 'apr', 'may', 'jun', 'jul', 'aug', 'sep', 'oct', 'nov', 'dec'], 1)}
+
+# Fields requested from the ClinicalTrials.gov v2 API
+CLINICALTRIALS_FIELDS = [
+    'NCTId', 'BriefTitle', 'OfficialTitle', 'OverallStatus', 'StartDate',
+    'PrimaryCompletionDate', 'CompletionDate', 'LeadSponsorName', 'CollaboratorName',
+    'ResponsiblePartyInvestigatorFullName', 'Phase', 'StudyType', 'DesignAllocation',
+    'Condition', 'BriefSummary', 'DetailedDescription'
+]
+
+# ClinicalTrials.gov v2 enumerations mapped to the labels used in the results
+CLINICALTRIALS_PHASES = {
+    'EARLY_PHASE1': 'Early Phase 1',
+    'PHASE1': 'Phase 1',
+    'PHASE2': 'Phase 2',
+    'PHASE3': 'Phase 3',
+    'PHASE4': 'Phase 4'
+}
+CLINICALTRIALS_STUDY_TYPES = {
+    'INTERVENTIONAL': 'Interventional',
+    'OBSERVATIONAL': 'Observational',
+    'EXPANDED_ACCESS': 'Expanded Access'
+}
+
+# Medical and academic domains by source type
+DEFAULT_SEARCH_DOMAINS = {
+    'Research Paper': [
+        'pubmed.ncbi.nlm.nih.gov',
+        'pmc.ncbi.nlm.nih.gov',
+        'nejm.org',
+        'thelancet.com',
+        'jamanetwork.com',
+        'diabetesjournals.org',
+        'onlinelibrary.wiley.com',
+        'academic.oup.com',
+        'sciencedirect.com'
+    ],
+    'Clinical Trial': [
+        'clinicaltrials.gov',
+        'clinicaltrialsregister.eu'
+    ],
+    'Regulatory Document': [
+        'fda.gov',
+        'ema.europa.eu',
+        'who.int'
+    ],
+    'Company Document': [
+        'zealandpharma.com',
+        'novonordisk.com',
+        'lilly.com',
+        'sanofi.com'
+    ],
+    'News': [
+        'biospace.com',
+        'fiercebiotech.com',
+        'medscape.com',
+        'globenewswire.com',
+        'prnewswire.com'
+    ]
+}
+
+# Legacy NCBI paths that now have their own hosts, by host and first path segment
+NCBI_PATH_HOSTS = {
+    ('www.ncbi.nlm.nih.gov', 'pmc'): 'pmc.ncbi.nlm.nih.gov',
+    ('www.ncbi.nlm.nih.gov', 'pubmed'): 'pubmed.ncbi.nlm.nih.gov'
+}
+
+# Hosts queried through their own APIs rather than website search
+DIRECT_API_HOSTS = {'pubmed.ncbi.nlm.nih.gov', 'clinicaltrials.gov'}
+
+# Columns of the search results DataFrame
+RESULT_COLUMNS = ['URL', 'Title', 'File_Type', 'Content', 'Summary', 'Abstract', 'Publication_Date', 'Authors', 'Journal', 'DOI', 'Source_Type', 'Development_Phase', 'Study_Type']
 
 def get_file_type(url):
     """Determine the file type from URL."""
@@ -36,6 +145,40 @@ def get_file_type(url):
             return 'TEXT'
     return 'HTML'
 
+def _is_meta_or_schema_author(tag):
+    """Match <meta> tags and schema.org author elements."""
+    return tag.name == 'meta' or (tag.name in ('span', 'div', 'a') and tag.get('itemprop') == 'author')
+
+def collect_meta_tags(soup):
+    """
+    Collect <meta> name/property/content values and schema.org author elements in one pass.
+    
+    Returns:
+        dict: 'name' and 'property' map each attribute value to the list of
+        (position, content) pairs in document order; 'schema_authors' lists
+        the elements marked itemprop="author"
+    """
+    meta_tags = {'name': {}, 'property': {}, 'schema_authors': []}
+    for position, tag in enumerate(soup.find_all(_is_meta_or_schema_author)):
+        if tag.name != 'meta':
+            meta_tags['schema_authors'].append(tag)
+            continue
+        content = tag.get('content')
+        for attr in ('name', 'property'):
+            key = tag.get(attr)
+            if key:
+                meta_tags[attr].setdefault(key, []).append((position, content))
+    return meta_tags
+
+def _meta_matches(meta_tags, names, attr='name'):
+    """All (position, content) pairs whose attribute is one of names, in document order."""
+    return sorted(match for key in names for match in meta_tags[attr].get(key, []))
+
+def _first_meta(meta_tags, names, attr='name'):
+    """Content of the first meta tag in document order whose attribute is one of names."""
+    matches = _meta_matches(meta_tags, names, attr)
+    return matches[0][1] if matches else None
+
 def extract_metadata(soup, url):
     """Extract metadata from webpage."""
     metadata = {
@@ -48,11 +191,12 @@ def extract_metadata(soup, url):
     }
     
     try:
+        # Gather every meta tag once, then resolve each field from it
+        meta_tags = collect_meta_tags(soup)
+        
         # Try to find title
         # First check meta tags
-        title_meta = soup.find('meta', {'name': ['title', 'og:title', 'twitter:title', 'citation_title', 'dc.title']})
-        if title_meta:
-            metadata['title'] = title_meta.get('content')
+        metadata['title'] = _first_meta(meta_tags, ['title', 'og:title', 'twitter:title', 'citation_title', 'dc.title'])
         
         # If not found in meta tags, try title tag
         if not metadata['title'] and soup.title:
@@ -63,26 +207,22 @@ def extract_metadata(soup, url):
             metadata['title'] = soup.h1.get_text().strip()
             
         # Try to find publication date
-        date_meta = soup.find('meta', {'name': ['date', 'citation_publication_date', 'dc.date', 'article:published_time']})
-        if date_meta:
-            metadata['publication_date'] = date_meta.get('content')
+        metadata['publication_date'] = _first_meta(meta_tags, ['date', 'citation_publication_date', 'dc.date', 'article:published_time'])
         
         # Try to find authors
         authors = []
         
         # Check meta tags with various author-related attributes
-        author_meta = soup.find_all('meta', {'name': ['author', 'citation_author', 'dc.creator', 'article:author', 'DCSext.author']})
-        for author in author_meta:
-            authors.append(author.get('content'))
+        for _, content in _meta_matches(meta_tags, ['author', 'citation_author', 'dc.creator', 'article:author', 'DCSext.author']):
+            authors.append(content)
             
         # Check for OpenGraph author tags
-        og_author = soup.find('meta', {'property': 'og:author'})
-        if og_author and og_author.get('content'):
-            authors.append(og_author.get('content'))
+        og_author = _first_meta(meta_tags, ['og:author'], attr='property')
+        if og_author:
+            authors.append(og_author)
             
         # Check for schema.org author markup
-        schema_authors = soup.find_all(['span', 'div', 'a'], {'itemprop': 'author'})
-        for author in schema_authors:
+        for author in meta_tags['schema_authors']:
             name_elem = author.find({'itemprop': 'name'})
             if name_elem:
                 authors.append(name_elem.get_text().strip())
@@ -98,22 +238,16 @@ def extract_metadata(soup, url):
             metadata['authors'] = '; '.join(unique_authors)
         
         # Try to find journal name
-        journal_meta = soup.find('meta', {'name': ['citation_journal_title', 'dc.source']})
-        if journal_meta:
-            metadata['journal'] = journal_meta.get('content')
+        metadata['journal'] = _first_meta(meta_tags, ['citation_journal_title', 'dc.source'])
         
         # Try to find DOI
-        doi_meta = soup.find('meta', {'name': ['citation_doi', 'dc.identifier']})
-        if doi_meta:
-            metadata['doi'] = doi_meta.get('content')
+        metadata['doi'] = _first_meta(meta_tags, ['citation_doi', 'dc.identifier'])
             
         # Try to find abstract
         # First check meta tags
-        abstract_meta = soup.find('meta', {'name': ['description', 'og:description', 'twitter:description', 'citation_abstract', 'dc.description', 'abstract']})
-        if abstract_meta:
-            metadata['abstract'] = abstract_meta.get('content')
-            
-        # If not found in meta tags, look for common abstract elements
+        metadata['abstract'] = _first_meta(meta_tags, ['description', 'og:description', 'twitter:description', 'citation_abstract', 'dc.description', 'abstract'])
+        
+        # Fall back to page structure heuristics only for fields still missing
         if not metadata['abstract']:
             # Look for elements with abstract-related classes or IDs
             abstract_elements = soup.find_all(['div', 'p', 'section'], 
@@ -194,98 +328,183 @@ def extract_text_from_url(url):
         # Create a session to maintain cookies
         session = requests.Session()
         
-        # Some sites need an initial visit to set cookies
-        session.get(url, headers=headers, timeout=5)
+        # Some sites need an initial visit to set cookies; only the headers are needed
+        session.get(url, headers=headers, timeout=5, stream=True).close()
         
         # Then make the actual request
-        response = session.get(url, headers=headers, timeout=15)
+        response = session.get(url, headers=headers, timeout=15, stream=True)
         response.raise_for_status()
         
-        # For HTML pages
-        soup = BeautifulSoup(response.text, 'html.parser')
+        content_type = response.headers.get('content-type', '')
+        document_type = get_document_type(content_type, response.url or url)
+        if not document_type and not is_text_content_type(content_type):
+            response.close()
+            print(f"Skipping {url}: unsupported content type {content_type}")
+            return None, None
         
-        # Remove unwanted elements
-        for element in soup(["script", "style", "nav", "footer", "header", "aside", "noscript"]):
-            element.decompose()
+        # PDFs and Word documents are parsed in the document process pool
+        if document_type:
+            data = read_response_body(response, DOCUMENT_MAX_BYTES, truncate=False)
+            if data is None:
+                print(f"Skipping {url}: {document_type} larger than {DOCUMENT_MAX_BYTES} bytes or too slow to download")
+                return None, None
+            text, metadata = extract_document_text(data, document_type)
+            if not text:
+                return None, None
+            return clean_text_lines(text), metadata
         
-        # Try to find main content
-        main_content = None
-        for tag in ["article", "main", ".content", "#content", ".post", ".article"]:
-            main_content = soup.select_one(tag)
-            if main_content:
-                break
-        
-        if main_content:
-            text = main_content.get_text(separator='\n')
+        # Web pages beyond the cap are truncated; the start of the page holds the metadata
+        data = read_response_body(response, MAX_DOWNLOAD_BYTES, truncate=True)
+        if not data:
+            return None, None
+        if 'charset=' in content_type.lower() and response.encoding:
+            html = data.decode(response.encoding, errors='replace')
         else:
-            text = soup.get_text(separator='\n')
-            
-        # Clean and process text
-        lines = []
-        for line in text.split('\n'):
-            line = line.strip()
-            if line and len(line) > 20:  # Only keep meaningful lines
-                lines.append(line)
-        
-        text = '\n'.join(lines)
-        metadata = extract_metadata(soup, url)
-        return text, metadata
+            # No declared charset, let the parser detect it from the page itself
+            html = data
+        return extract_text_from_html(html, url)
     except Exception as e:
         print(f"Error extracting text from {url}: {str(e)}")
         return None, None
 
+def is_text_content_type(content_type):
+    """Check whether a Content-Type header describes a page we can parse as text."""
+    content_type = (content_type or '').lower()
+    if not content_type:
+        return True  # Unknown, let the parser try
+    return content_type.startswith('text/') or 'html' in content_type or 'xml' in content_type
+
+def read_response_body(response, max_bytes, truncate=True):
+    """
+    Read a streamed response body up to a byte cap and a total download time.
+    
+    Args:
+        response (requests.Response): Response opened with stream=True
+        max_bytes (int): Maximum number of bytes to read
+        truncate (bool): Return the first max_bytes when the body is larger,
+            instead of giving up
+    
+    Returns:
+        bytes: Body content, or None if it exceeded the limits and truncate is False
+    """
+    try:
+        # Refuse early when the server announces an oversized body; the
+        # header is only a hint, the cap below applies whatever it says
+        declared = response.headers.get('content-length') or ''
+        if declared.isdigit() and int(declared) > max_bytes and not truncate:
+            return None
+        
+        data = bytearray()
+        start = time.monotonic()
+        for chunk in response.iter_content(chunk_size=64 * 1024):
+            data.extend(chunk)
+            if len(data) > max_bytes:
+                if not truncate:
+                    return None
+                del data[max_bytes:]
+                break
+            if time.monotonic() - start > DOWNLOAD_TIMEOUT:
+                print(f"Download of {response.url} exceeded {DOWNLOAD_TIMEOUT}s")
+                if not truncate:
+                    return None
+                break
+        return bytes(data)
+    finally:
+        response.close()
+
+def extract_text_from_html(html, url, backend=None):
+    """
+    Extract main text content and metadata from an HTML page.
+    
+    Args:
+        html (str or bytes): Page markup
+        url (str): Page URL
+        backend (str, optional): Parser backend, see html_parser.get_parser_backend
+    
+    Returns:
+        tuple: (text, metadata)
+    """
+    soup = make_soup(html, backend)
+    
+    # Remove unwanted elements
+    for element in soup(["script", "style", "nav", "footer", "header", "aside", "noscript"]):
+        element.decompose()
+    
+    # Try to find main content
+    main_content = None
+    for tag in ["article", "main", ".content", "#content", ".post", ".article"]:
+        main_content = soup.select_one(tag)
+        if main_content:
+            break
+    
+    if main_content:
+        text = main_content.get_text(separator='\n')
+    else:
+        text = soup.get_text(separator='\n')
+        
+    text = clean_text_lines(text)
+    metadata = extract_metadata(soup, url)
+    return text, metadata
+
+def clean_text_lines(text):
+    """
+    Strip lines and drop the short ones that carry no content.
+
+    Section headings are kept although they are short, since content
+    reduction ranks the lines below them by section.
+    """
+    lines = []
+    for line in text.split('\n'):
+        line = line.strip()
+        if line and (len(line) > 20 or is_section_heading(line)):  # Only keep meaningful lines
+            lines.append(line)
+    
+    return '\n'.join(lines)
+
 def generate_summary(text, url, metadata):
     """Generate summary using OpenAI's GPT model."""
     try:
         if not text:
             return "Could not access or extract content from the webpage."
             
-        if len(text) > 15000:
-            text = text[:15000]
-        
-        prompt = f"""
-        URL: {url}
-        
-        Content: {text}
-        
-        Please provide a concise summary of this content, focusing specifically on:
-        1. Key information about the topic
-        2. Any clinical findings or research outcomes
-        3. Development status or regulatory updates
-        4. Technical details about methods or mechanisms (if mentioned)
-        
-        If the content is not relevant to the topic, indicate that clearly.
-        """
-            
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": "You are a research assistant specializing in medical and scientific literature. Provide accurate, technical summaries focusing on key findings and developments."},
-                {"role": "user", "content": prompt}
-            ],
-            max_tokens=300,
-            temperature=0.3
-        )
+        # The request keeps the most informative sections within the prompt token budget
+        response = get_openai_client().chat.completions.create(**build_summary_request(text, url))
         return response.choices[0].message.content.strip()
     except Exception as e:
         return f"Error generating summary: {str(e)}"
 
 def get_source_metadata(url):
-    """Get source type and development phase based on URL and content."""
-    source_type = "Other"
-    
-    if "clinicaltrials.gov" in url:
-        source_type = "Clinical Trial"
-    elif any(domain in url for domain in ['pubmed.ncbi.nlm.nih.gov', 'pmc.ncbi.nlm.nih.gov', 'nejm.org', 'thelancet.com', 'jamanetwork.com', 'diabetesjournals.org', 'onlinelibrary.wiley.com', 'academic.oup.com']):
-        source_type = "Research Paper"
-    elif any(domain in url for domain in ['fda.gov', 'ema.europa.eu', 'who.int']):
-        source_type = "Regulatory Document"
-    elif any(domain in url for domain in ['zealandpharma.com', 'novonordisk.com', 'lilly.com', 'sanofi.com']):
-        source_type = "Company Document"
-    elif any(domain in url for domain in ['biospace.com', 'fiercebiotech.com', 'medscape.com', 'globenewswire.com', 'prnewswire.com']):
-        source_type = "News"
-    
-    return source_type
+    """Get source type based on the URL's host name."""
+    parsed = urlparse(url)
+    hostname = (parsed.hostname or '').rstrip('.')
+    section = parsed.path.lstrip('/').split('/', 1)[0].lower()
+    return classify_host(NCBI_PATH_HOSTS.get((hostname, section), hostname))
+
+# Phase mentions such as "Phase 3", "phase-II" or "Phase 2/3", with an optional second phase.
+# Longer numerals come first and must end at a word boundary, so "Phase III" is not read as "Phase I".
+PHASE_NUMERAL = r"(IV|III|II|I|[1-4])\b"
+PHASE_PATTERN = re.compile(rf"\bphase[\s-]*{PHASE_NUMERAL}(?:\s*/\s*(?:phase[\s-]*)?{PHASE_NUMERAL})?", re.IGNORECASE)
+# Phases are labelled like the ClinicalTrials.gov results ("Phase 3", "Phase 2/Phase 3")
+PHASE_NUMBERS = {'1': '1', '2': '2', '3': '3', '4': '4', 'i': '1', 'ii': '2', 'iii': '3', 'iv': '4'}
+
+def format_phase(first, second=None):
+    """Label a phase from its numerals, e.g. ('III', 'iv') -> 'Phase 3/Phase 4'."""
+    phase = f"Phase {PHASE_NUMBERS[first.lower()]}"
+    if second:
+        phase += f"/Phase {PHASE_NUMBERS[second.lower()]}"
+    return phase
+
+# Study types in order of precedence, each with the lowercase phrases that identify it.
+# A study type matches when any phrase occurs in the lowercased text, which is what the
+# former patterns (e.g. r"randomized(?:\s+controlled)?(?:\s+trial)?") matched as well.
+STUDY_TYPE_KEYWORDS = [
+    ('RCT', ['randomized']),
+    ('Observational', ['observational study']),
+    ('Meta-Analysis', ['meta-analysis']),
+    ('Review', ['systematic review']),
+    ('Case Study', ['case study', 'case report']),
+    ('Preclinical', ['preclinical', 'in vitro', 'in vivo'])
+]
 
 def extract_phase_info(text):
     """Extract development phase information from content."""
@@ -293,77 +512,136 @@ def extract_phase_info(text):
     study_type = None
     
     if text:
-        # Look for phase information
-        phase_patterns = [
-            r"[Pp]hase (?:1|2|3|4|I|II|III|IV)",
-            r"[Pp]hase-(?:1|2|3|4|I|II|III|IV)",
-        ]
-        
-        # Look for study type
-        study_patterns = {
-            'RCT': r"randomized(?:\s+controlled)?(?:\s+trial)?",
-            'Observational': r"observational study",
-            'Meta-Analysis': r"meta-analysis",
-            'Review': r"systematic review",
-            'Case Study': r"case study|case report",
-            'Preclinical': r"preclinical|in vitro|in vivo"
-        }
+        # Lowercase once; substring checks run in C and gate the regex work
+        lowered = text.lower()
         
         # Find phase
-        for pattern in phase_patterns:
-            match = re.search(pattern, text)
+        if 'phase' in lowered:
+            match = PHASE_PATTERN.search(text)
             if match:
-                phase = match.group(0)
-                break
+                phase = format_phase(*match.groups())
         
         # Find study type
-        for study_type_name, pattern in study_patterns.items():
-            if re.search(pattern, text, re.IGNORECASE):
+        for study_type_name, keywords in STUDY_TYPE_KEYWORDS:
+            if any(keyword in lowered for keyword in keywords):
                 study_type = study_type_name
                 break
     
     return phase, study_type
 
+def classify_phase_column(texts):
+    """
+    Classify a whole column of texts at once.
+    
+    Vectorized counterpart of extract_phase_info for re-classifying stored results.
+    
+    Args:
+        texts (pd.Series): Article contents
+    
+    Returns:
+        tuple: (phases, study_types) as pd.Series aligned with texts, None where nothing matched
+    """
+    import pandas as pd
+
+    texts = texts.fillna('').astype(str)
+    lowered = texts.str.lower()
+    
+    found = texts.str.extract(PHASE_PATTERN)
+    first = found[0].str.lower().map(PHASE_NUMBERS)
+    second = found[1].str.lower().map(PHASE_NUMBERS)
+    phases = ('Phase ' + first).where(second.isna(), 'Phase ' + first + '/Phase ' + second)
+    
+    # Apply study types from lowest to highest precedence so that the first match wins
+    study_types = pd.Series(None, index=texts.index, dtype=object)
+    for label, keywords in reversed(STUDY_TYPE_KEYWORDS):
+        matches = lowered.str.contains('|'.join(re.escape(keyword) for keyword in keywords))
+        study_types = study_types.mask(matches, label)
+    phases = phases.astype(object)
+    return phases.where(phases.notna(), None), study_types.where(study_types.notna(), None)
+
+def reclassify_results(df, overwrite=False):
+    """
+    Recompute Development_Phase and Study_Type from the Content column.
+    
+    Args:
+        df (pd.DataFrame): Search results
+        overwrite (bool): Replace existing values, not only missing ones (values
+            from ClinicalTrials.gov structured data would be lost)
+    
+    Returns:
+        pd.DataFrame: Copy of df with updated classification
+    """
+    df = df.copy()
+    phases, study_types = classify_phase_column(df['Content'])
+    if overwrite:
+        df['Development_Phase'] = phases
+        df['Study_Type'] = study_types
+    else:
+        df['Development_Phase'] = df['Development_Phase'].where(df['Development_Phase'].notna(), phases)
+        df['Study_Type'] = df['Study_Type'].where(df['Study_Type'].notna(), study_types)
+    return df
+
 def get_search_domains():
-    """Get list of medical and academic domains to search."""
-    return {
-        'Research Paper': [
-            'pubmed.ncbi.nlm.nih.gov',
-            'pmc.ncbi.nlm.nih.gov',
-            'nejm.org',
-            'thelancet.com',
-            'jamanetwork.com',
-            'diabetesjournals.org',
-            'onlinelibrary.wiley.com',
-            'academic.oup.com',
-            'sciencedirect.com'
-        ],
-        'Clinical Trial': [
-            'clinicaltrials.gov',
-            'clinicaltrialsregister.eu'
-        ],
-        'Regulatory Document': [
-            'fda.gov',
-            'ema.europa.eu',
-            'who.int'
-        ],
-        'Company Document': [
-            'zealandpharma.com',
-            'novonordisk.com',
-            'lilly.com',
-            'sanofi.com'
-        ],
-        'News': [
-            'biospace.com',
-            'fiercebiotech.com',
-            'medscape.com',
-            'globenewswire.com',
-            'prnewswire.com'
-        ]
-    }
+    """Get list of medical and academic domains to search, including domains added in SEARCH_DOMAINS_FILE."""
+    domains = {source_type: list(hosts) for source_type, hosts in DEFAULT_SEARCH_DOMAINS.items()}
+    for source_type, hosts in load_extra_domains().items():
+        existing = domains.setdefault(source_type, [])
+        existing.extend(host for host in hosts if host not in existing)
+    return domains
 
-def get_pubmed_results(query, max_results=5):
-    """Get results directly from PubMed's E-utilities."""
+@lru_cache(maxsize=1)
+def load_extra_domains():
+    """Load user-defined domains from the JSON file named by SEARCH_DOMAINS_FILE ({source type: [domains]})."""
+    path = os.getenv("SEARCH_DOMAINS_FILE")
+    if not path:
+        return {}
+    try:
+        with open(path) as f:
+            data = json.load(f)
+        if not isinstance(data, dict) or not all(
+            isinstance(hosts, list) and all(isinstance(host, str) for host in hosts) for hosts in data.values()
+        ):
+            raise ValueError("expected a JSON object mapping source types to lists of domains")
+        return {source_type: [host.lower().strip() for host in hosts] for source_type, hosts in data.items()}
+    except Exception as e:
+        print(f"Error loading search domains from {path}: {str(e)}")
+        return {}
+
+@lru_cache(maxsize=1)
+def get_source_index():
+    """Map each search domain to its source type, built once from get_search_domains()."""
+    index = {}
+    for source_type, hosts in get_search_domains().items():
+        for host in hosts:
+            # First source type listing a host wins
+            index.setdefault(host, source_type)
+    return index
+
+def classify_host(hostname):
+    """
+    Get the source type of a host name by suffix lookup in the source index.
+    
+    'www.nejm.org' and 'classic.clinicaltrials.gov' match 'nejm.org' and
+    'clinicaltrials.gov'; 'notfda.gov' does not match 'fda.gov'.
+    
+    Args:
+        hostname (str): Host name, e.g. from urlparse(url).hostname
+    
+    Returns:
+        str: Source type, or "Other" for unknown hosts
+    """
+    if not hostname:
+        return "Other"
+    index = get_source_index()
+    labels = hostname.lower().rstrip('.').split('.')
+    for i in range(len(labels) - 1):
+        source_type = index.get('.'.join(labels[i:]))
+        if source_type:
+            return source_type
+    return "Other"
+
+def get_pubmed_results(query, max_results=5, start_date=None, end_date=None):
+    """Get results directly from PubMed's E-utilities, optionally limited to a publication date window."""
     try:
         # Add API key if available
         api_key = os.getenv('NCBI_API_KEY')
@@ -378,6 +656,10 @@ def get_pubmed_results(query, max_results=5):
             'retmode': 'json',
             'usehistory': 'y'
         }
+        if start_date:
+            params['datetype'] = 'pdat'
+            params['mindate'] = start_date.strftime('%Y/%m/%d')
+            params['maxdate'] = (end_date or datetime.now()).strftime('%Y/%m/%d')
         if api_key:
             params['api_key'] = api_key
             
@@ -393,47 +675,28 @@ def get_pubmed_results(query, max_results=5):
         if not ids:
             return []
             
-        # Then get details using summary API
-        efetch_url = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/esummary.fcgi"
-        fetch_params = {
-            'db': 'pubmed',
-            'id': ','.join(ids),
-            'retmode': 'json',
-            'webenv': webenv,
-            'query_key': query_key
-        }
-        if api_key:
-            fetch_params['api_key'] = api_key
-            
-        response = requests.get(efetch_url, params=fetch_params)
-        response.raise_for_status()
-        details = response.json()
+        # Then get abstracts and bibliographic details for all IDs in one EFetch call
+        try:
+            articles = fetch_pubmed_articles(webenv, query_key, len(ids), api_key)
+        except Exception as e:
+            print(f"Error fetching PubMed abstracts, falling back to page scraping: {str(e)}")
+            articles = {}
         
-        # Extract URLs, titles, and authors
         results = []
         for pmid in ids:
             url = f"https://pubmed.ncbi.nlm.nih.gov/{pmid}/"
-            
-            # Try to get title and authors from the summary results
-            title = None
-            authors = None
-            if 'result' in details and pmid in details['result']:
-                title = details['result'][pmid].get('title', '')
-                
-                # Extract authors if available
-                if 'authors' in details['result'][pmid]:
-                    author_list = details['result'][pmid]['authors']
-                    author_names = []
-                    for author in author_list:
-                        if 'name' in author:
-                            author_names.append(author['name'])
-                    if author_names:
-                        authors = '; '.join(author_names)
+            article = articles.get(pmid)
+            if not article:
+                results.append({'url': url, 'title': None, 'authors': None})
+                continue
             
             results.append({
                 'url': url,
-                'title': title,
-                'authors': authors
+                'title': article['title'],
+                'authors': article['authors'],
+                'file_type': 'TEXT',
+                'content': pubmed_article_text(article),
+                'metadata': article
             })
             
         return results
@@ -441,303 +704,710 @@ def get_pubmed_results(query, max_results=5):
         print(f"Error fetching from PubMed: {str(e)}")
         return []
 
-def get_clinicaltrials_results(query, max_results=5):
-    """Get results directly from ClinicalTrials.gov API."""
+def _element_text(element):
+    """Get all text inside an XML element, including inline markup."""
+    if element is None:
+        return None
+    text = ''.join(element.itertext()).strip()
+    return text or None
+
+def _pubmed_date(article_element):
+    """Get the best available publication date of a PubmedArticle element."""
+    # Electronic publication date is the most precise
+    date = article_element.find('MedlineCitation/Article/ArticleDate')
+    if date is None:
+        date = article_element.find('MedlineCitation/Article/Journal/JournalIssue/PubDate')
+    if date is None:
+        return None
+    
+    year = date.findtext('Year')
+    if not year:
+        # e.g. <MedlineDate>2023 Jan-Feb</MedlineDate>
+        match = re.match(r'(\d{4})', date.findtext('MedlineDate') or '')
+        return match.group(1) if match else None
+    
+    month = date.findtext('Month')
+    if not month:
+        return year
+    month = MONTHS.get(month[:3].lower(), month).zfill(2)
+    day = date.findtext('Day')
+    return f"{year}-{month}-{day.zfill(2)}" if day else f"{year}-{month}"
+
+def parse_pubmed_article(element):
+    """Convert a PubmedArticle XML element into an article dictionary."""
+    citation = element.find('MedlineCitation')
+    article = citation.find('Article')
+    
+    # Structured abstracts have one AbstractText per labelled section
+    sections = []
+    for abstract_text in article.findall('Abstract/AbstractText'):
+        text = _element_text(abstract_text)
+        if text:
+            label = abstract_text.get('Label')
+            sections.append(f"{label}: {text}" if label else text)
+    
+    authors = []
+    for author in article.findall('AuthorList/Author'):
+        if author.findtext('CollectiveName'):
+            authors.append(author.findtext('CollectiveName'))
+        elif author.findtext('LastName'):
+            first = author.findtext('ForeName') or author.findtext('Initials') or ''
+            authors.append(f"{first} {author.findtext('LastName')}".strip())
+    
+    doi = None
+    for article_id in element.findall('PubmedData/ArticleIdList/ArticleId'):
+        if article_id.get('IdType') == 'doi':
+            doi = article_id.text
+            break
+    if not doi:
+        for location in article.findall('ELocationID'):
+            if location.get('EIdType') == 'doi':
+                doi = location.text
+                break
+    
+    return {
+        'pmid': citation.findtext('PMID'),
+        'title': _element_text(article.find('ArticleTitle')),
+        'abstract': '\n'.join(sections) or None,
+        'authors': '; '.join(authors) or None,
+        'journal': article.findtext('Journal/Title'),
+        'doi': doi,
+        'publication_date': _pubmed_date(element),
+        'publication_types': [_element_text(pt) for pt in article.findall('PublicationTypeList/PublicationType')]
+    }
+
+def fetch_pubmed_articles(webenv, query_key, count, api_key=None):
+    """
+    Fetch abstracts and bibliographic details for an ESearch result set in one EFetch call.
+    
+    The XML response is parsed incrementally, one PubmedArticle at a time.
+    
+    Args:
+        webenv (str): WebEnv returned by ESearch
+        query_key (str): Query key returned by ESearch
+        count (int): Number of records to fetch
+        api_key (str, optional): NCBI API key
+    
+    Returns:
+        dict: PMID to article dictionary
+    """
+    efetch_url = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/efetch.fcgi"
+    params = {
+        'db': 'pubmed',
+        'WebEnv': webenv,
+        'query_key': query_key,
+        'retstart': 0,
+        'retmax': count,
+        'retmode': 'xml'
+    }
+    if api_key:
+        params['api_key'] = api_key
+    
+    articles = {}
+    with requests.get(efetch_url, params=params, stream=True, timeout=30) as response:
+        response.raise_for_status()
+        response.raw.decode_content = True
+        for _, element in ET.iterparse(response.raw, events=('end',)):
+            if element.tag == 'PubmedArticle':
+                article = parse_pubmed_article(element)
+                if article['pmid']:
+                    articles[article['pmid']] = article
+                element.clear()
+    return articles
+
+def pubmed_article_text(article):
+    """Build the article content from PubMed title, publication types and abstract."""
+    lines = [article['title'] or '']
+    if article['publication_types']:
+        lines.append(f"Publication Type: {', '.join(pt for pt in article['publication_types'] if pt)}")
+    if article['abstract']:
+        lines.append(article['abstract'])
+    return '\n'.join(line for line in lines if line)
+
+def iter_clinicaltrials_studies(query, max_results=5, start_date=None):
+    """
+    Yield studies from the ClinicalTrials.gov v2 API, one page at a time.
+    
+    Only the fields in CLINICALTRIALS_FIELDS are requested. Pages are followed
+    through nextPageToken until max_results studies have been yielded.
+    
+    Args:
+        query (str): Search query
+        max_results (int): Maximum number of studies to yield
+        start_date (datetime, optional): Only include studies starting on or after this date
+    
+    Yields:
+        dict: Study record as returned by the API
+    """
+    api_url = "https://clinicaltrials.gov/api/v2/studies"
+    params = {
+        'query.term': query,
+        'fields': ','.join(CLINICALTRIALS_FIELDS),
+        'pageSize': min(max_results, 100),
+        'format': 'json'
+    }
+    if start_date:
+        params['filter.advanced'] = f"AREA[StartDate]RANGE[{start_date.strftime('%Y-%m-%d')},MAX]"
+    
+    yielded = 0
+    while yielded < max_results:
+        response = requests.get(api_url, params=params, timeout=30)
+        response.raise_for_status()
+        data = response.json()
+        
+        for study in data.get('studies', []):
+            yield study
+            yielded += 1
+            if yielded >= max_results:
+                return
+        
+        next_page = data.get('nextPageToken')
+        if not next_page:
+            return
+        params['pageToken'] = next_page
+
+def parse_clinicaltrials_study(study):
+    """Convert a ClinicalTrials.gov v2 study record into a search result dictionary."""
+    protocol = study.get('protocolSection', {})
+    identification = protocol.get('identificationModule', {})
+    status = protocol.get('statusModule', {})
+    sponsors = protocol.get('sponsorCollaboratorsModule', {})
+    design = protocol.get('designModule', {})
+    description = protocol.get('descriptionModule', {})
+    
+    nct_id = identification.get('nctId')
+    title = identification.get('briefTitle') or identification.get('officialTitle')
+    start_date = status.get('startDateStruct', {}).get('date')
+    completion_date = (status.get('primaryCompletionDateStruct') or status.get('completionDateStruct') or {}).get('date')
+    
+    # Phases come as e.g. ['PHASE2', 'PHASE3'] or ['NA']
+    phases = [CLINICALTRIALS_PHASES[phase] for phase in design.get('phases', []) if phase in CLINICALTRIALS_PHASES]
+    phase = '/'.join(phases) or None
+    
+    study_type = design.get('studyType')
+    if study_type == 'INTERVENTIONAL' and design.get('designInfo', {}).get('allocation') == 'RANDOMIZED':
+        study_type = 'RCT'
+    else:
+        study_type = CLINICALTRIALS_STUDY_TYPES.get(study_type)
+    
+    lead_sponsor = sponsors.get('leadSponsor', {}).get('name')
+    collaborators = [c.get('name') for c in sponsors.get('collaborators', []) if c.get('name')]
+    sponsor_names = [name for name in [lead_sponsor] + collaborators if name]
+    
+    # Try to get investigator name first, then sponsor as fallback
+    investigator = sponsors.get('responsibleParty', {}).get('investigatorFullName')
+    if investigator:
+        authors = investigator
+    elif sponsor_names:
+        authors = f"Sponsor: {'; '.join(sponsor_names)}"
+    else:
+        authors = None
+    
+    lines = [
+        title,
+        identification.get('officialTitle') if identification.get('officialTitle') != title else None,
+        f"Status: {status.get('overallStatus')}" if status.get('overallStatus') else None,
+        f"Phase: {phase}" if phase else None,
+        f"Study Type: {design.get('studyType')}" if design.get('studyType') else None,
+        f"Start Date: {start_date}" if start_date else None,
+        f"Completion Date: {completion_date}" if completion_date else None,
+        f"Sponsors: {'; '.join(sponsor_names)}" if sponsor_names else None,
+        f"Conditions: {', '.join(protocol.get('conditionsModule', {}).get('conditions', []))}"
+            if protocol.get('conditionsModule', {}).get('conditions') else None,
+        description.get('briefSummary'),
+        description.get('detailedDescription')
+    ]
+    
+    return {
+        'url': f"https://clinicaltrials.gov/study/{nct_id}",
+        'title': title,
+        'authors': authors,
+        'file_type': 'TEXT',
+        'content': '\n'.join(line.strip() for line in lines if line and line.strip()),
+        'phase': phase,
+        'study_type': study_type,
+        'metadata': {
+            'title': title,
+            'publication_date': start_date,
+            'authors': authors,
+            'journal': None,
+            'doi': None,
+            'abstract': description.get('briefSummary'),
+            'nct_id': nct_id,
+            'completion_date': completion_date,
+            'sponsors': sponsor_names
+        }
+    }
+
+def get_clinicaltrials_results(query, max_results=5, start_date=None):
+    """Get results directly from the ClinicalTrials.gov v2 API, optionally limited to studies started after start_date."""
+    results = []
     try:
-        # First try the new API endpoint
-        api_url = "https://classic.clinicaltrials.gov/api/query/study_fields"
-        params = {
-            'expr': query,
-            'fields': 'NCTId,BriefTitle,StartDate,LeadSponsorName,ResponsiblePartyInvestigatorFullName',
-            'min_rnk': 1,
-            'max_rnk': max_results,
-            'fmt': 'json'
+        for study in iter_clinicaltrials_studies(query, max_results, start_date):
+            result = parse_clinicaltrials_study(study)
+            if not result['metadata']['nct_id']:
+                continue
+            results.append(result)
+    except Exception as e:
+        print(f"Error fetching from ClinicalTrials.gov: {str(e)}")
+    return results
+
+def get_journal_api_results(domain, api_info, max_results=2):
+    """Get article URLs from a journal's search API."""
+    urls = []
+    try:
+        headers = {
+            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+            'Accept': 'application/json'
+        }
+        response = requests.get(api_info['url'], params=api_info['params'], headers=headers, timeout=30)
+        if response.status_code == 200:
+            try:
+                data = response.json()
+                if isinstance(data, dict) and 'results' in data:
+                    for result in data['results'][:max_results]:
+                        if 'url' in result:
+                            urls.append(result['url'])
+            except:
+                pass  # Skip if JSON parsing fails
+    except Exception as e:
+        print(f"Error accessing {domain} API: {str(e)}")
+    return urls
+
+def get_domain_search_results(domain, query, max_results=2):
+    """Get article URLs from a website's own search page."""
+    urls = []
+    try:
+        search_url = f"https://{domain}/search"
+        params = {'q': query}
+        headers = {
+            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         }
         
-        try:
-            response = requests.get(api_url, params=params, timeout=30)
-            response.raise_for_status()
-            data = response.json()
-            
-            results = []
-            for study in data.get('StudyFieldsResponse', {}).get('StudyFields', []):
-                if 'NCTId' in study and study['NCTId']:
-                    nct_id = study['NCTId'][0]
-                    url = f"https://classic.clinicaltrials.gov/study/{nct_id}"
-                    
-                    # Extract title and authors if available
-                    title = None
-                    authors = None
-                    
-                    if 'BriefTitle' in study and study['BriefTitle']:
-                        title = study['BriefTitle'][0]
-                    
-                    # Try to get investigator name first, then sponsor as fallback
-                    if 'ResponsiblePartyInvestigatorFullName' in study and study['ResponsiblePartyInvestigatorFullName']:
-                        authors = study['ResponsiblePartyInvestigatorFullName'][0]
-                    elif 'LeadSponsorName' in study and study['LeadSponsorName']:
-                        authors = f"Sponsor: {study['LeadSponsorName'][0]}"
-                    
-                    results.append({
-                        'url': url,
-                        'title': title,
-                        'authors': authors
-                    })
-            return results
-            
-        except requests.exceptions.RequestException:
-            # If API fails, try web search as fallback
-            search_url = "https://classic.clinicaltrials.gov/ct2/results"
-            params = {
-                'term': query,
-                'recrs': 'abdef',  # All studies except withdrawn
-                'age_v': 'all',
-                'gndr': 'all',
-                'type': 'all',
-                'rslt': 'all',
-                'Search': 'Apply'
-            }
-            
-            response = requests.get(search_url, params=params, timeout=30)
-            response.raise_for_status()
-            
-            # Parse HTML response
-            soup = BeautifulSoup(response.text, 'html.parser')
-            results = []
-            
-            # Find study links and titles
+        response = requests.get(search_url, params=params, headers=headers, timeout=30)
+        if response.status_code == 200:
+            soup = make_soup(response.text)
             for link in soup.find_all('a', href=True):
                 href = link['href']
-                if '/show/' in href and 'NCT' in href:
-                    nct_id = href.split('/')[-1]
-                    url = f"https://classic.clinicaltrials.gov/study/{nct_id}"
-                    
-                    # Try to extract title from link text
-                    title = link.get_text().strip() if link.get_text().strip() else None
-                    
-                    results.append({
-                        'url': url,
-                        'title': title
-                    })
-                    
-                    if len(results) >= max_results:
+                if any(x in href.lower() for x in ['/article/', '/full/', '/study/']):
+                    full_url = f"https://{domain}{href}" if href.startswith('/') else href
+                    urls.append(full_url)
+                    if len(urls) >= max_results:
                         break
-                        
-            return results
-            
     except Exception as e:
-        print(f"Error fetching from ClinicalTrials.gov: {str(e)}")
-        return []
+        print(f"Error searching {domain}: {str(e)}")
+    return urls
+
+async def _run_source(executor, source, deadline):
+    """Run one blocking source query in the executor, bounded by its own deadline."""
+    name, func, args = source
+    loop = asyncio.get_running_loop()
+    try:
+        return await asyncio.wait_for(loop.run_in_executor(executor, func, *args), timeout=deadline)
+    except asyncio.TimeoutError:
+        print(f"{name} did not respond within {deadline}s, skipping")
     except Exception as e:
-        print(f"Error fetching from ClinicalTrials.gov: {str(e)}")
-        return []
+        print(f"Error querying {name}: {str(e)}")
+    return []
 
-def search_articles(query, num_results=10, years_back=5, source_types=None, status_callback=None):
-    """Search and analyze articles based on query parameters."""
-    results = []
-    processed_urls = set()
-    
-    # Calculate date for years_back
-    years_ago = (datetime.now() - timedelta(days=years_back*365)).year
+async def _gather_sources(sources, status_callback=None):
+    """Query all sources concurrently and return whatever arrived before the global deadline."""
+    executor = ThreadPoolExecutor(max_workers=max(len(sources), 1))
+    try:
+        tasks = {}
+        for source in sources:
+            deadline = min(SOURCE_DEADLINES.get(source[0].split(':')[0], SEARCH_DEADLINE), SEARCH_DEADLINE)
+            tasks[asyncio.ensure_future(_run_source(executor, source, deadline))] = source[0]
+        
+        results = {}
+        pending = set(tasks)
+        loop = asyncio.get_running_loop()
+        end_time = loop.time() + SEARCH_DEADLINE
+        while pending:
+            remaining = end_time - loop.time()
+            if remaining <= 0:
+                break
+            done, pending = await asyncio.wait(pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                results[tasks[task]] = task.result()
+                if status_callback:
+                    status_callback(f"Searched {tasks[task].split(':')[-1]} ({len(results)}/{len(tasks)} sources)",
+                                    int(20 * len(results) / len(tasks)))
+        
+        for task in pending:
+            print(f"Search deadline reached, dropping {tasks[task]}")
+            task.cancel()
+        return results
+    finally:
+        # Do not wait for sources that missed their deadline
+        executor.shutdown(wait=False, cancel_futures=True)
+
+def plan_search_budget(num_results, sources):
+    """
+    Distribute the number of candidate URLs to request across search sources.
     
-    # Get domains to search based on source types
-    domains = get_search_domains()
-    if source_types:
-        search_domains = [domain for type_ in source_types for domain in domains.get(type_, [])]
-    else:
-        search_domains = [domain for domains_list in domains.values() for domain in domains_list]
+    Some candidates fail to download or fall outside the date window, so the
+    planner asks for CANDIDATE_FACTOR times num_results in total, split by
+    SOURCE_WEIGHTS with at least one candidate per source.
     
-    # Shuffle domains to randomize access pattern
-    random.shuffle(search_domains)
+    Args:
+        num_results (int): Number of articles the user asked for
+        sources (list): Source names such as 'pubmed' or 'domain_search:fda.gov'
     
-    print(f"\nSearching for: {query}")
-    all_urls = []
+    Returns:
+        dict: Source name to number of candidates
+    """
+    if not sources:
+        return {}
     
-    # First try direct API access for major sources
-    if status_callback:
-        status_callback("Searching PubMed...", 20)
-    pubmed_results = get_pubmed_results(query, max_results=5)
-    if pubmed_results:
-        print(f"Found {len(pubmed_results)} PubMed results")
-        all_urls.extend(pubmed_results)
-        time.sleep(3)  # Respect API rate limits
+    candidates = max(math.ceil(num_results * CANDIDATE_FACTOR), len(sources))
+    weights = {source: SOURCE_WEIGHTS.get(source.split(':')[0], 1) for source in sources}
+    total_weight = sum(weights.values())
     
-    if status_callback:
-        status_callback("Searching ClinicalTrials.gov...", 40)
-    ct_results = get_clinicaltrials_results(query, max_results=5)
-    if ct_results:
-        print(f"Found {len(ct_results)} Clinical Trial results")
-        all_urls.extend(ct_results)
-        time.sleep(3)  # Respect API rate limits
-    
-    # Remove duplicates from all_urls while preserving order
-    # Create a set of URLs to track duplicates
-    seen_urls = set()
-    unique_urls = []
-    for item in all_urls:
-        # Handle both string URLs and dictionary items
-        if isinstance(item, dict):
-            url = item['url']
-        else:
-            url = item
-            
-        if url not in seen_urls:
-            seen_urls.add(url)
-            unique_urls.append(item)
+    # Largest remainder allocation, never below one candidate per source
+    shares = {source: candidates * weight / total_weight for source, weight in weights.items()}
+    budget = {source: max(int(share), 1) for source, share in shares.items()}
+    leftover = candidates - sum(budget.values())
+    for source in sorted(shares, key=lambda source: shares[source] - int(shares[source]), reverse=True):
+        if leftover <= 0:
+            break
+        budget[source] += 1
+        leftover -= 1
+    # Raising small shares to one can overshoot; take the excess from the most over-allocated sources
+    while leftover < 0:
+        source = max((source for source in budget if budget[source] > 1), key=lambda source: budget[source] - shares[source])
+        budget[source] -= 1
+        leftover += 1
+    return budget
+
+def gather_search_urls(query, search_domains, status_callback=None, num_results=10, start_date=None):
+    """
+    Query PubMed, ClinicalTrials.gov, journal APIs and domain search pages concurrently.
     
-    all_urls = unique_urls
-            
-    if status_callback:
-        status_callback("Searching journal databases...", 60)
+    Args:
+        query (str): Search query
+        search_domains (list): Domains selected for the search
+        status_callback (function, optional): Callback function for status updates
+        num_results (int): Number of articles requested, distributed across sources
+        start_date (datetime, optional): Start of the publication date window
     
-    # Try direct access to journal APIs
+    Returns:
+        list: URL strings and result dictionaries, in source order
+    """
+    # Journals with a search API
     journal_apis = {
         'diabetesjournals.org': {
             'url': 'https://diabetesjournals.org/api/search',
-            'params': {'q': query, 'size': 2}
+            'params': {'q': query}
         },
         'nejm.org': {
             'url': 'https://www.nejm.org/api/search',
-            'params': {'q': query, 'page': 1, 'size': 2}
+            'params': {'q': query, 'page': 1}
         }
     }
     
+    # For remaining domains, try direct website search
+    remaining_domains = [d for d in search_domains[:3]  # Only try top 3 remaining domains
+                        if d not in DIRECT_API_HOSTS and d not in journal_apis]
+    
+    # Split the result budget across all sources
+    source_names = ['pubmed:PubMed', 'clinicaltrials:ClinicalTrials.gov']
+    source_names += [f"journal_api:{domain}" for domain in journal_apis if domain in search_domains]
+    source_names += [f"domain_search:{domain}" for domain in remaining_domains]
+    budget = plan_search_budget(num_results, source_names)
+    
+    # Direct API access for major sources first, then journals and websites
+    sources = [
+        ('pubmed:PubMed', get_pubmed_results, (query, budget['pubmed:PubMed'], start_date)),
+        ('clinicaltrials:ClinicalTrials.gov', get_clinicaltrials_results,
+         (query, budget['clinicaltrials:ClinicalTrials.gov'], start_date))
+    ]
     for domain, api_info in journal_apis.items():
         if domain in search_domains:
-            try:
-                headers = {
-                    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-                    'Accept': 'application/json'
-                }
-                response = requests.get(api_info['url'], params=api_info['params'], headers=headers, timeout=30)
-                if response.status_code == 200:
-                    try:
-                        data = response.json()
-                        if isinstance(data, dict) and 'results' in data:
-                            for result in data['results'][:2]:  # Limit to 2 results per domain
-                                if 'url' in result:
-                                    all_urls.append(result['url'])
-                    except:
-                        pass  # Skip if JSON parsing fails
-            except Exception as e:
-                print(f"Error accessing {domain} API: {str(e)}")
-            time.sleep(5)  # Brief delay between API calls
+            name = f"journal_api:{domain}"
+            api_info['params']['size'] = budget[name]
+            sources.append((name, get_journal_api_results, (domain, api_info, budget[name])))
+    sources += [(f"domain_search:{domain}", get_domain_search_results,
+                 (domain, query, budget[f"domain_search:{domain}"]))
+                for domain in remaining_domains]
     
     if status_callback:
-        status_callback("Searching additional sources...", 80)
+        status_callback(f"Searching {len(sources)} sources...", 0)
+    results = asyncio.run(_gather_sources(sources, status_callback))
     
-    # For remaining domains, try direct website search
-    remaining_domains = [d for d in search_domains[:3]  # Only try top 3 remaining domains
-                        if not any(x in d for x in ['pubmed', 'clinicaltrials.gov']) 
-                        and d not in journal_apis]
+    # Keep the source order stable regardless of which source answered first
+    all_urls = []
+    for name, _, _ in sources:
+        source_results = results.get(name) or []
+        if source_results:
+            print(f"Found {len(source_results)} results from {name.split(':')[-1]}")
+        all_urls.extend(source_results)
+    return all_urls
+
+def process_search_result(item, summarize=True, dedup=None, start_date=None):
+    """
+    Fetch, summarize and classify a single search result.
     
-    for domain in remaining_domains:
-        try:
-            search_url = f"https://{domain}/search"
-            params = {'q': query}
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-            }
+    summarize=False leaves Summary empty for batch summarization. Articles
+    published before start_date and, with an ArticleDeduplicator, articles that
+    duplicate one already kept are dropped before they are summarized.
+    """
+    # Handle both string URLs and dictionary items
+    if isinstance(item, dict):
+        url = item['url']
+        api_title = item.get('title')
+        api_authors = item.get('authors')
+    else:
+        url = item
+        item = {}
+        api_title = None
+        api_authors = None
+    
+    try:
+        print(f"\nProcessing: {url}")
+        
+        if item.get('content'):
+            # Content already provided by the source API, no need to scrape the page
+            file_type = item.get('file_type', 'TEXT')
+            content = item['content']
+            metadata = item.get('metadata', {})
+        else:
+            # Get file type
+            file_type = get_file_type(url)
+            print(f"File type: {file_type}")
             
-            response = requests.get(search_url, params=params, headers=headers, timeout=30)
-            if response.status_code == 200:
-                soup = BeautifulSoup(response.text, 'html.parser')
-                for link in soup.find_all('a', href=True):
-                    href = link['href']
-                    if any(x in href.lower() for x in ['/article/', '/full/', '/study/']):
-                        full_url = f"https://{domain}{href}" if href.startswith('/') else href
-                        all_urls.append(full_url)
-                        if len(all_urls) >= 2:  # Limit to 2 results per domain
-                            break
-        except Exception as e:
-            print(f"Error searching {domain}: {str(e)}")
+            # Extract text and metadata
+            content, metadata = extract_text_from_url(url)
+        if not content:
+            print("Could not extract content")
+            return None
+        
+        if not is_within_date_window(metadata.get('publication_date'), start_date):
+            print(f"Skipping {url}: published before {start_date.year}")
+            return None
+        
+        if dedup and dedup.seen_content(url, content, metadata):
+            print(f"Skipping {url}: duplicate of an article already found")
+            return None
+        
+        # Generate summary
+        summary = None
+        if summarize:
+            print("Generating summary...")
+            summary = generate_summary(content, url, metadata)
+        
+        # Extract phase and study type from content, unless the source API provided them
+        phase, study_type = extract_phase_info(content)
+        phase = item.get('phase') or phase
+        study_type = item.get('study_type') or study_type
         
-        time.sleep(5)  # Brief delay between domains
+        # Get source type
+        source_type = get_source_metadata(url)
         
-    # Process all collected URLs
+        # Use API-provided title and authors if available and metadata is not
+        title = metadata.get('title', '')
+        if not title and api_title:
+            title = api_title
+            
+        authors = metadata.get('authors', '')
+        if not authors and api_authors:
+            authors = api_authors
+        
+        return {
+            'URL': url,
+            'Title': title,
+            'File_Type': file_type,
+            'Content': content,  # Store the full article content
+            'Summary': summary,
+            'Abstract': metadata.get('abstract', ''),  # Store the extracted abstract
+            'Publication_Date': metadata.get('publication_date', ''),
+            'Authors': authors,
+            'Journal': metadata.get('journal', ''),
+            'DOI': metadata.get('doi', ''),
+            'Source_Type': source_type,
+            'Development_Phase': phase,
+            'Study_Type': study_type
+        }
+    except Exception as e:
+        print(f"Error processing {url}: {str(e)}")
+        return None
+
+def is_within_date_window(publication_date, start_date):
+    """Check whether a publication date falls inside the search window; unknown dates qualify."""
+    import pandas as pd
+
+    if not publication_date or start_date is None:
+        return True
+    try:
+        published = pd.to_datetime(publication_date)
+    except Exception:
+        return True
+    if pd.isna(published):
+        return True
+    if published.tzinfo is not None:
+        published = published.tz_convert(None)
+    return published >= pd.Timestamp(start_date)
+
+def summarize_rows(rows, mode):
+    """Fill in the Summary of several result rows with one batch summarization."""
+    articles = [{'id': str(i), 'url': row['URL'], 'text': row['Content']} for i, row in enumerate(rows)]
+    print(f"Generating {len(rows)} summaries ({mode} mode)...")
+    summaries = summarize_articles(get_openai_client(), articles, mode)
+    for i, row in enumerate(rows):
+        row['Summary'] = summaries.get(str(i), "Error generating summary: no summary returned")
+    return rows
+
+def iter_search_articles(query, num_results=10, years_back=5, source_types=None, status_callback=None, summary_mode=None):
+    """
+    Search for articles and yield each analyzed article as soon as it is ready.
+    
+    Stops fetching and summarizing once num_results articles published within
+    the last years_back years have been produced.
+    
+    Args:
+        query (str): Search query
+        num_results (int): Number of results requested
+        years_back (int): Number of years to look back
+        source_types (list, optional): Source types to search
+        status_callback (function, optional): Callback function for status updates
+        summary_mode (str, optional): 'single' for one request per article,
+            'pack' to summarize PACK_SIZE articles per request as they arrive, or
+            'batch' to summarize everything in one provider batch job at the end.
+            Defaults to the SUMMARY_MODE environment variable.
+    
+    Yields:
+        dict: Article row with the columns of RESULT_COLUMNS
+    """
+    # Start of the publication date window
+    start_date = datetime.now() - timedelta(days=years_back*365)
+    
+    # Get domains to search based on source types
+    domains = get_search_domains()
+    if source_types:
+        search_domains = [domain for type_ in source_types for domain in domains.get(type_, [])]
+    else:
+        search_domains = [domain for domains_list in domains.values() for domain in domains_list]
+    
+    # Shuffle domains to randomize access pattern
+    random.shuffle(search_domains)
+    
+    print(f"\nSearching for: {query}")
+    all_urls = gather_search_urls(query, search_domains, status_callback, num_results, start_date)
+    
+    # Remove candidates that point to the same article, preserving order. Duplicates are
+    # matched on canonical URLs, but each article is fetched from the URL its source returned.
+    dedup = ArticleDeduplicator()
+    unique_items = []
     for item in all_urls:
-            # Handle both string URLs and dictionary items
-            if isinstance(item, dict):
-                url = item['url']
-                api_title = item.get('title')
-                api_authors = item.get('authors')
-            else:
-                url = item
-                api_title = None
-                api_authors = None
+        if isinstance(item, dict):
+            if dedup.seen_item(item['url'], item.get('metadata')):
+                continue
+        elif dedup.seen_item(item):
+            continue
+        unique_items.append(item)
+    
+    total = len(unique_items)
+    if not total:
+        return
+    if status_callback:
+        status_callback(f"Processing up to {min(total, num_results)} of {total} candidate articles...", 20)
+    
+    summary_mode = summary_mode or SUMMARY_MODE
+    summarize = summary_mode == 'single'
+    unsummarized = []
+    
+    # Process URLs in parallel, keeping only FETCH_WORKERS in flight so that
+    # no work is started once enough articles have been produced
+    executor = ThreadPoolExecutor(max_workers=FETCH_WORKERS)
+    try:
+        queue = iter(unique_items)
+        pending = {}
+        for item in queue:
+            pending[executor.submit(process_search_result, item, summarize, dedup, start_date)] = item
+            if len(pending) >= FETCH_WORKERS:
+                break
+        
+        processed = 0
+        produced = 0
+        while pending and produced < num_results:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                item = pending.pop(future)
+                url = item['url'] if isinstance(item, dict) else item
+                processed += 1
                 
-            if url not in processed_urls:
-                processed_urls.add(url)
-                try:
-                    print(f"\nProcessing: {url}")
-                    
-                    # Get file type
-                    file_type = get_file_type(url)
-                    print(f"File type: {file_type}")
-                    
-                    # Extract text and metadata
-                    content, metadata = extract_text_from_url(url)
-                    if not content:
-                        print("Could not extract content")
-                        continue
-                    
-                    # Generate summary
-                    print("Generating summary...")
-                    summary = generate_summary(content, url, metadata)
-                    
-                    # Extract phase and study type from content
-                    phase, study_type = extract_phase_info(content)
-                    
-                    # Get source type
-                    source_type = get_source_metadata(url)
-                    
-                    # Use API-provided title and authors if available and metadata is not
-                    title = metadata.get('title', '')
-                    if not title and api_title:
-                        title = api_title
-                        
-                    authors = metadata.get('authors', '')
-                    if not authors and api_authors:
-                        authors = api_authors
-                    
-                    result = {
-                        'URL': url,
-                        'Title': title,
-                        'File_Type': file_type,
-                        'Content': content,  # Store the full article content
-                        'Summary': summary,
-                        'Abstract': metadata.get('abstract', ''),  # Store the extracted abstract
-                        'Publication_Date': metadata.get('publication_date', ''),
-                        'Authors': authors,
-                        'Journal': metadata.get('journal', ''),
-                        'DOI': metadata.get('doi', ''),
-                        'Source_Type': source_type,
-                        'Development_Phase': phase,
-                        'Study_Type': study_type
-                    }
-                    results.append(result)
-                    
-                    # Add delay between requests
-                    time.sleep(5)
-                    
-                except Exception as e:
-                    print(f"Error processing {url}: {str(e)}")
-                    continue
+                result = future.result()
+                if result and produced < num_results:
+                    produced += 1
+                    if summarize:
+                        yield result
+                    else:
+                        unsummarized.append(result)
+                
+                # Packed summaries are generated as soon as a pack is full
+                if summary_mode == 'pack' and len(unsummarized) >= PACK_SIZE:
+                    yield from summarize_rows(unsummarized, summary_mode)
+                    unsummarized = []
+                
+                if status_callback:
+                    fraction = max(processed / total, produced / num_results)
+                    status_callback(f"Processed {processed}/{total}, kept {produced}/{num_results}: {url}",
+                                    20 + int(80 * min(fraction, 1)))
+                
+                # Refill the worker pool
+                if produced < num_results:
+                    for next_item in queue:
+                        pending[executor.submit(process_search_result, next_item, summarize, dedup, start_date)] = next_item
+                        break
+        
+        if unsummarized:
+            if status_callback:
+                status_callback(f"Summarizing {len(unsummarized)} articles...", 99)
+            yield from summarize_rows(unsummarized, summary_mode)
+    finally:
+        # Stop outstanding work if enough results were found or the caller stopped early
+        executor.shutdown(wait=False, cancel_futures=True)
+
+def parse_publication_dates(values):
+    """
+    Convert publication dates of mixed precision ("2023", "2023-05", "2023-05-14") to timestamps.
+    
+    Dates that are not ISO 8601, such as "May 14, 2023" from page metadata,
+    are parsed one by one; unparseable dates become NaT.
     
+    Args:
+        values (pd.Series): Publication date strings
+    
+    Returns:
+        pd.Series: Timezone-naive UTC timestamps
+    """
+    import pandas as pd
+
+    dates = pd.to_datetime(values, format='ISO8601', errors='coerce', utc=True)
+    missing = dates.isna() & values.notna() & (values.astype(str).str.strip() != '')
+    if missing.any():
+        dates[missing] = pd.to_datetime(values[missing], format='mixed', errors='coerce', utc=True)
+    return dates.dt.tz_convert(None)
+
+def results_to_dataframe(results):
+    """Build the results DataFrame, sorted by publication date."""
+    import pandas as pd
+
     # Create DataFrame with explicit columns
-    columns = ['URL', 'Title', 'File_Type', 'Content', 'Summary', 'Abstract', 'Publication_Date', 'Authors', 'Journal', 'DOI', 'Source_Type', 'Development_Phase', 'Study_Type']
-    df = pd.DataFrame(results, columns=columns)
+    df = pd.DataFrame(results, columns=RESULT_COLUMNS)
     
     # Sort by publication date if available
     if 'Publication_Date' in df.columns and not df.empty:
-        try:
-            df['Publication_Date'] = pd.to_datetime(df['Publication_Date'])
-        except Exception as e:
-            print(f"Warning: Could not parse some publication dates: {str(e)}")
+        df['Publication_Date'] = parse_publication_dates(df['Publication_Date'])
         df = df.sort_values('Publication_Date', ascending=False, na_position='last')
     
     return df
 
+def search_articles(query, num_results=10, years_back=5, source_types=None, status_callback=None, summary_mode=None):
+    """Search and analyze articles based on query parameters."""
+    results = list(iter_search_articles(query, num_results, years_back, source_types, status_callback, summary_mode))
+    return results_to_dataframe(results)
+
 def main():
     query = "Dasiglucagon delivery systems"
     print(f"Searching for: {query}")
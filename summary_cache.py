@@ -0,0 +1,140 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+
+# Location and limits of the persistent research summary cache
+SUMMARY_CACHE_PATH = os.getenv(
+    "SUMMARY_CACHE_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "summary_cache.db")
+)
+SUMMARY_CACHE_MAX_ENTRIES = int(os.getenv("SUMMARY_CACHE_MAX_ENTRIES", "200"))
+SUMMARY_CACHE_TTL_DAYS = float(os.getenv("SUMMARY_CACHE_TTL_DAYS", "30"))
+
+# Article fields that end up in the summary prompt
+PROMPT_FIELDS = ['Title', 'Authors', 'Publication_Date', 'Source_Type', 'Summary', 'Abstract']
+
+def get_cache_connection(path=None):
+    """Open the summary cache database, creating the table if needed."""
+    conn = sqlite3.connect(path or SUMMARY_CACHE_PATH, timeout=30)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS summaries (
+            cache_key TEXT PRIMARY KEY,
+            summary TEXT NOT NULL,
+            model TEXT,
+            summary_type TEXT,
+            focus_areas TEXT,
+            article_count INTEGER,
+            created_at REAL,
+            last_accessed REAL
+        )
+    """)
+    return conn
+
+def article_fingerprint(article):
+    """Hash the fields of an article that influence the generated summary."""
+    values = [str(article.get(field, '')) for field in PROMPT_FIELDS]
+    return hashlib.sha256('\x1f'.join(values).encode('utf-8')).hexdigest()
+
+def make_summary_key(articles, focus_areas, summary_type, model):
+    """
+    Build the cache key for a research summary request.
+
+    Args:
+        articles (pd.DataFrame): Selected articles
+        focus_areas (list): Focus areas chosen by the user
+        summary_type (str): Type of summary
+        model (str): Model used to generate the summary
+
+    Returns:
+        str: Hex digest identifying the request
+    """
+    article_keys = sorted(
+        (str(article.get('URL', '')), article_fingerprint(article))
+        for _, article in articles.iterrows()
+    )
+    payload = {
+        'articles': article_keys,
+        'focus_areas': sorted(area.lower() for area in focus_areas),
+        'summary_type': summary_type,
+        'model': model
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode('utf-8')).hexdigest()
+
+def get_cached_summary(cache_key, path=None):
+    """Return the cached summary for a key, or None if missing or expired."""
+    try:
+        conn = get_cache_connection(path)
+        try:
+            row = conn.execute(
+                "SELECT summary, created_at FROM summaries WHERE cache_key = ?",
+                (cache_key,)
+            ).fetchone()
+            if not row:
+                return None
+
+            summary, created_at = row
+            if SUMMARY_CACHE_TTL_DAYS and time.time() - created_at > SUMMARY_CACHE_TTL_DAYS * 86400:
+                conn.execute("DELETE FROM summaries WHERE cache_key = ?", (cache_key,))
+                conn.commit()
+                return None
+
+            conn.execute(
+                "UPDATE summaries SET last_accessed = ? WHERE cache_key = ?",
+                (time.time(), cache_key)
+            )
+            conn.commit()
+            return summary
+        finally:
+            conn.close()
+    except Exception as e:
+        print(f"Error reading summary cache: {str(e)}")
+        return None
+
+def store_cached_summary(cache_key, summary, model=None, summary_type=None, focus_areas=None, article_count=0, path=None):
+    """Store a generated summary and evict old entries."""
+    try:
+        conn = get_cache_connection(path)
+        try:
+            now = time.time()
+            conn.execute(
+                """
+                INSERT OR REPLACE INTO summaries
+                (cache_key, summary, model, summary_type, focus_areas, article_count, created_at, last_accessed)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                (cache_key, summary, model, summary_type, json.dumps(focus_areas or []), article_count, now, now)
+            )
+            evict_summaries(conn)
+            conn.commit()
+        finally:
+            conn.close()
+    except Exception as e:
+        print(f"Error writing summary cache: {str(e)}")
+
+def evict_summaries(conn, max_entries=None, ttl_days=None):
+    """Drop expired entries, then the least recently used ones above the limit."""
+    max_entries = SUMMARY_CACHE_MAX_ENTRIES if max_entries is None else max_entries
+    ttl_days = SUMMARY_CACHE_TTL_DAYS if ttl_days is None else ttl_days
+
+    if ttl_days:
+        conn.execute("DELETE FROM summaries WHERE created_at < ?", (time.time() - ttl_days * 86400,))
+
+    conn.execute(
+        """
+        DELETE FROM summaries WHERE cache_key NOT IN (
+            SELECT cache_key FROM summaries ORDER BY last_accessed DESC LIMIT ?
+        )
+        """,
+        (max_entries,)
+    )
+
+def clear_summary_cache(path=None):
+    """Remove every cached summary."""
+    conn = get_cache_connection(path)
+    try:
+        conn.execute("DELETE FROM summaries")
+        conn.commit()
+    finally:
+        conn.close()
@@ -0,0 +1,63 @@
+import random
+
+from article_dedup import ArticleDeduplicator, canonicalize_url, article_keys, simhash, hamming_distance
+
+WORDS = ("dasiglucagon glucagon hypoglycemia insulin trial patients dose glucose recovery minutes "
+         "placebo randomized efficacy safety adverse events plasma rescue treatment study").split()
+
+def make_text(seed, n=400):
+    rng = random.Random(seed)
+    return ' '.join(rng.choice(WORDS) for _ in range(n))
+
+def test_canonicalize_url():
+    assert canonicalize_url("HTTPS://WWW.NEJM.org/doi/full/10.1056/NEJMoa123?utm_source=x&b=2&a=1#refs") == \
+        "https://www.nejm.org/doi/full/10.1056/NEJMoa123?a=1&b=2"
+    assert canonicalize_url("https://classic.clinicaltrials.gov/ct2/show/NCT04667299?term=x") == \
+        "https://clinicaltrials.gov/study/NCT04667299"
+    assert canonicalize_url("https://www.ncbi.nlm.nih.gov/pubmed/33397400") == \
+        "https://pubmed.ncbi.nlm.nih.gov/33397400/"
+    assert canonicalize_url("http://dx.doi.org/10.2337/DC20-2995") == "https://doi.org/10.2337/dc20-2995"
+    # Only clear trackers are dropped; generic parameters may select content
+    assert canonicalize_url("https://example.com/news?ref=home&gclid=abc&src=rss") == \
+        "https://example.com/news?ref=home&src=rss"
+
+def test_url_keys_keep_path_case():
+    assert article_keys("HTTPS://WWW.Example.com/Reports/A") == {'url:https://example.com/Reports/A'}
+    assert not article_keys("https://example.com/Reports/A") & article_keys("https://example.com/reports/a")
+
+def test_identifiers_link_different_urls():
+    pubmed = article_keys("https://pubmed.ncbi.nlm.nih.gov/33397400/", {'pmid': '33397400', 'doi': '10.2337/dc20-2995'})
+    doi_link = article_keys("https://doi.org/10.2337/dc20-2995")
+    publisher = article_keys("https://diabetesjournals.org/care/article/doi/10.2337/dc20-2995")
+    assert pubmed & doi_link
+    assert doi_link & publisher
+
+    dedup = ArticleDeduplicator()
+    assert not dedup.seen_item("https://pubmed.ncbi.nlm.nih.gov/33397400/?utm_campaign=rss")
+    assert dedup.seen_item("https://www.ncbi.nlm.nih.gov/pubmed/33397400")
+    assert not dedup.seen_item("https://clinicaltrials.gov/study/NCT04667299")
+    assert dedup.seen_item("https://classic.clinicaltrials.gov/ct2/show/NCT04667299")
+
+def test_near_duplicate_content():
+    text = make_text(1)
+    edited = text.replace(WORDS[0], "Dasiglucagon (Zegalogue)", 2) + " All rights reserved."
+    assert hamming_distance(simhash(text), simhash(edited)) <= 3
+    assert hamming_distance(simhash(text), simhash(make_text(2))) > 3
+    assert simhash("too short") is None
+
+    dedup = ArticleDeduplicator()
+    assert not dedup.seen_content("https://a.example/1", text)
+    assert dedup.seen_content("https://b.example/1", edited)
+    assert not dedup.seen_content("https://c.example/1", make_text(2))
+
+    # A DOI kept for one URL makes other pages with that DOI duplicates, but not the same URL
+    assert not dedup.seen_content("https://pubmed.ncbi.nlm.nih.gov/1/", "abstract", {'doi': '10.1056/NEJMoa2030000'})
+    assert not dedup.seen_content("https://pubmed.ncbi.nlm.nih.gov/1/", "abstract", {'doi': '10.1056/nejmoa2030000'})
+    assert dedup.seen_content("https://journal.example/article", "full text", {'doi': 'https://doi.org/10.1056/NEJMoa2030000'})
+
+if __name__ == "__main__":
+    test_canonicalize_url()
+    test_url_keys_keep_path_case()
+    test_identifiers_link_different_urls()
+    test_near_duplicate_content()
+    print("All deduplication tests passed!")
@@ -0,0 +1,46 @@
+import os
+import tempfile
+
+import pandas as pd
+
+import article_export
+from article_export import export_parquet, import_parquet, load_parquet_content, with_content, save_upload, remove_upload
+
+RESULTS = pd.DataFrame([
+    {'URL': f"https://example.com/article/{i}", 'Title': f"Article {i}", 'Content': f"Full text of article {i}. " * 50,
+     'Summary': f"Summary {i}", 'Publication_Date': pd.Timestamp('2022-06-01'), 'Source_Type': 'Research Paper'}
+    for i in range(20)
+])
+
+def test_parquet_round_trip_loads_content_on_demand():
+    path = os.path.join(tempfile.mkdtemp(), "results.parquet")
+    with open(path, "wb") as f:
+        f.write(export_parquet(RESULTS))
+
+    df = import_parquet(path)
+    assert 'Content' not in df.columns
+    assert list(df['Title']) == list(RESULTS['Title'])
+    assert df['Publication_Date'].iloc[0] == pd.Timestamp('2022-06-01')
+
+    content = load_parquet_content(path, ["https://example.com/article/3", "https://example.com/missing"])
+    assert content == {"https://example.com/article/3": RESULTS['Content'].iloc[3]}
+
+    selected = with_content(df.iloc[[5, 7]], path)
+    assert list(selected['Content']) == list(RESULTS['Content'].iloc[[5, 7]])
+
+def test_uploads_are_removed_when_replaced_and_at_exit():
+    replaced = save_upload(export_parquet(RESULTS))
+    current = save_upload(export_parquet(RESULTS))
+    assert len(import_parquet(current)) == len(RESULTS)
+
+    remove_upload(replaced)
+    assert not os.path.exists(replaced)
+
+    article_export._remove_uploads()
+    assert not os.path.exists(current)
+    assert not article_export._upload_paths
+
+if __name__ == "__main__":
+    test_parquet_round_trip_loads_content_on_demand()
+    test_uploads_are_removed_when_replaced_and_at_exit()
+    print("All export tests passed!")
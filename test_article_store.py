@@ -0,0 +1,50 @@
+import os
+import tempfile
+
+import pandas as pd
+
+from article_store import upsert_articles, load_articles, search_stored_articles, save_selection, load_selection
+
+ARTICLES = pd.DataFrame([
+    {'URL': 'https://pubmed.ncbi.nlm.nih.gov/33397400/', 'Title': 'Dasiglucagon for severe hypoglycemia',
+     'Content': 'Dasiglucagon restored plasma glucose within ten minutes.', 'Summary': 'Rapid glucose recovery.',
+     'Publication_Date': pd.Timestamp('2021-03-01'), 'Source_Type': 'Research Paper'},
+    {'URL': 'https://clinicaltrials.gov/study/NCT04667299', 'Title': 'Dasiglucagon pump trial',
+     'Content': 'Bihormonal pump study.', 'Summary': None,
+     'Publication_Date': pd.NaT, 'Source_Type': 'Clinical Trial'}
+])
+
+def test_upsert_keeps_one_row_per_canonical_url():
+    path = os.path.join(tempfile.mkdtemp(), "articles.db")
+    upsert_articles(ARTICLES, "dasiglucagon", path=path)
+    # Same article through a tracking link, without a summary this time
+    upsert_articles([{'URL': 'https://pubmed.ncbi.nlm.nih.gov/33397400/?utm_source=rss', 'Title': 'Updated title'}], path=path)
+
+    df = load_articles(path=path)
+    assert len(df) == 2
+    row = df[df['URL'] == 'https://pubmed.ncbi.nlm.nih.gov/33397400/'].iloc[0]
+    assert row['Title'] == 'Updated title'
+    assert row['Summary'] == 'Rapid glucose recovery.'
+    assert row['Publication_Date'] == pd.Timestamp('2021-03-01')
+
+    df = load_articles(['https://clinicaltrials.gov/study/NCT04667299', 'https://pubmed.ncbi.nlm.nih.gov/33397400/'],
+                       columns=['Title'], path=path)
+    assert list(df.columns) == ['Title']
+    assert list(df['Title']) == ['Dasiglucagon pump trial', 'Updated title']
+
+def test_full_text_search_and_selection():
+    path = os.path.join(tempfile.mkdtemp(), "articles.db")
+    upsert_articles(ARTICLES, path=path)
+
+    df = search_stored_articles('pump', columns=['URL'], path=path)
+    assert list(df['URL']) == ['https://clinicaltrials.gov/study/NCT04667299']
+
+    save_selection(['https://pubmed.ncbi.nlm.nih.gov/33397400/'], path=path)
+    selected = load_selection(path=path)
+    assert list(selected['Title']) == ['Dasiglucagon for severe hypoglycemia']
+    assert 'Content' not in selected.columns
+
+if __name__ == "__main__":
+    test_upsert_keeps_one_row_per_canonical_url()
+    test_full_text_search_and_selection()
+    print("All article store tests passed!")
@@ -0,0 +1,86 @@
+import re
+import json
+
+from batch_summarizer import summarize_articles, summarize_packed, summarize_single, summarize_with_batch_api
+from tests.local_batch_client import LocalBatchClient
+
+ARTICLES = [
+    {'id': str(i), 'url': f"https://example.com/article/{i}", 'text': f"Dasiglucagon trial {i} reported glucose recovery within ten minutes."}
+    for i in range(7)
+]
+
+def respond(body):
+    """Answer packed requests with JSON and single requests with plain text."""
+    prompt = body['messages'][-1]['content']
+    if body.get('response_format'):
+        ids = re.findall(r'ARTICLE (\d+):', prompt)
+        return json.dumps({'summaries': [{'id': i, 'summary': f"Packed summary {i}"} for i in ids]})
+    url = re.search(r'URL: (\S+)', prompt).group(1)
+    return f"Summary of {url}"
+
+def test_packed_summaries_fan_back_to_articles():
+    client = LocalBatchClient(respond)
+    summaries = summarize_packed(client, ARTICLES, pack_size=3)
+
+    assert summaries == {a['id']: f"Packed summary {a['id']}" for a in ARTICLES}
+    assert len(client.requests) == 3  # 7 articles in packs of 3
+
+def test_packed_falls_back_for_missing_articles():
+    def drop_last(body):
+        data = json.loads(respond(body))
+        data['summaries'] = data['summaries'][:-1]
+        return json.dumps(data)
+
+    client = LocalBatchClient(lambda body: drop_last(body) if body.get('response_format') else respond(body))
+    summaries = summarize_packed(client, ARTICLES[:3], pack_size=3)
+
+    assert summaries['0'] == "Packed summary 0"
+    assert summaries['2'] == "Summary of https://example.com/article/2"
+
+def test_batch_api_round_trip():
+    client = LocalBatchClient(respond)
+    summaries = summarize_with_batch_api(client, ARTICLES, poll_interval=0)
+
+    assert summaries == {a['id']: f"Summary of {a['url']}" for a in ARTICLES}
+    assert all(not request.get('response_format') for request in client.requests)
+
+def summarize_content(url, content):
+    """Deterministic "model": the summary depends only on the article's URL and content."""
+    return f"{url} | {len(content.split())} words | {content.splitlines()[-1][:40]}"
+
+def respond_from_content(body):
+    """Summarize from the content each prompt actually sent, in either request format."""
+    prompt = body['messages'][-1]['content']
+    if body.get('response_format'):
+        articles = re.findall(r'ARTICLE (\d+):\nURL: (\S+)\nContent: (.*?)\n\n(?=ARTICLE|For each)', prompt, re.DOTALL)
+        return json.dumps({'summaries': [{'id': i, 'summary': summarize_content(url, content)} for i, url, content in articles]})
+    url = re.search(r'URL: (\S+)', prompt).group(1)
+    content = re.search(r'Content: (.*?)\n\n\s+Please provide', prompt, re.DOTALL).group(1)
+    return summarize_content(url, content)
+
+def test_pack_and_single_modes_agree():
+    articles = [
+        {'id': str(i), 'url': f"https://example.com/article/{i}",
+         'text': f"Trial {i} title\nSkip to main content\nResults\nGlucose recovered in {i + 8} minutes.\nSign in"}
+        for i in range(7)
+    ]
+    client = LocalBatchClient(respond_from_content)
+
+    packed = summarize_packed(client, articles, pack_size=3)
+    single = {article['id']: summarize_single(client, article) for article in articles}
+    assert packed == single
+    assert packed['4'] == "https://example.com/article/4 | 9 words | Glucose recovered in 12 minutes."
+
+def test_summarize_articles_modes():
+    client = LocalBatchClient(respond)
+    assert summarize_articles(client, [], mode='pack') == {}
+    assert summarize_articles(client, ARTICLES[:2], mode='batch')['1'] == "Summary of https://example.com/article/1"
+    assert summarize_articles(client, ARTICLES[:2], mode='pack')['1'] == "Packed summary 1"
+
+if __name__ == "__main__":
+    test_packed_summaries_fan_back_to_articles()
+    test_packed_falls_back_for_missing_articles()
+    test_batch_api_round_trip()
+    test_pack_and_single_modes_agree()
+    test_summarize_articles_modes()
+    print("All batch summarizer tests passed!")
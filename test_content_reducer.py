@@ -0,0 +1,67 @@
+import pytest
+
+import content_reducer
+from content_reducer import reduce_content, is_boilerplate
+from search_articles import clean_text_lines
+
+CLINICAL_LINES = [
+    "Patients switched to a rapid-acting analog insulin before meals.",
+    "The trial used a crossover design in adults with type 1 diabetes.",
+    "Most participants subscribed to the continuous glucose monitoring service.",
+    "Quality of life was assessed with copyrighted questionnaires licensed by the sponsor.",
+]
+
+BOILERPLATE_LINES = [
+    "Sign in",
+    "Log in",
+    "Share this article",
+    "Skip to main content",
+    "We use cookies to improve your experience.",
+    "© 2024 Example Publisher. All rights reserved.",
+    "Subscribe to our newsletter",
+]
+
+ARTICLE = "\n".join([
+    "Dasiglucagon for severe hypoglycemia",
+    "Background",
+    "Severe hypoglycemia is a frequent complication of insulin therapy in type 1 diabetes.",
+    "Methods",
+    "Adults were randomized to dasiglucagon, reconstituted glucagon or placebo.",
+    "Results",
+    "Median time to plasma glucose recovery was 10 minutes with dasiglucagon.",
+    "Conclusions",
+    "Dasiglucagon rapidly reversed insulin-induced hypoglycemia.",
+])
+
+@pytest.fixture(autouse=True)
+def word_tokens(monkeypatch):
+    # Count words instead of tiktoken tokens so budgets are predictable
+    monkeypatch.setattr(content_reducer, "count_tokens", lambda text: len(text.split()))
+
+@pytest.mark.parametrize("line", CLINICAL_LINES)
+def test_clinical_text_is_not_boilerplate(line):
+    assert not is_boilerplate(line)
+    assert reduce_content(line) == line
+
+@pytest.mark.parametrize("line", BOILERPLATE_LINES)
+def test_page_furniture_is_removed(line):
+    assert is_boilerplate(line)
+    assert reduce_content(f"Title\n{line}\n{CLINICAL_LINES[0]}") == f"Title\n{CLINICAL_LINES[0]}"
+
+def test_near_duplicate_lines_are_removed():
+    text = "Title\nGlucose recovered within 10 minutes.\nWithin 10 minutes glucose recovered."
+    assert reduce_content(text) == "Title\nGlucose recovered within 10 minutes."
+
+def test_over_budget_keeps_results_and_conclusions():
+    reduced = reduce_content(ARTICLE, token_budget=30).split("\n")
+    assert reduced[0] == "Dasiglucagon for severe hypoglycemia"
+    assert "Median time to plasma glucose recovery was 10 minutes with dasiglucagon." in reduced
+    assert "Dasiglucagon rapidly reversed insulin-induced hypoglycemia." in reduced
+    assert "Adults were randomized to dasiglucagon, reconstituted glucagon or placebo." not in reduced
+
+def test_cleaning_keeps_headings_for_the_reducer():
+    cleaned = clean_text_lines(ARTICLE + "\nMenu\nHome")
+    assert "Results" in cleaned.split("\n")
+    assert "Conclusions" in cleaned.split("\n")
+    assert "Menu" not in cleaned.split("\n")
+    assert reduce_content(cleaned, token_budget=30) == reduce_content(ARTICLE, token_budget=30)
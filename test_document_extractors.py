@@ -0,0 +1,110 @@
+import io
+import signal
+from concurrent.futures.process import BrokenProcessPool
+
+import document_extractors
+from document_extractors import (
+    get_document_type, extract_text_from_pdf, extract_text_from_docx, extract_document_text, get_process_pool
+)
+
+def make_pdf(pages, title=None):
+    """Build a PDF with one line of Helvetica text per page."""
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>", None, "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for text in pages:
+        stream = f"BT /F1 12 Tf 72 720 Td ({text}) Tj ET"
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+                       f"/Resources << /Font << /F1 3 0 R >> >> /Contents {len(objects)} 0 R >>")
+        kids.append(f"{len(objects)} 0 R")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(kids)} >>"
+    if title:
+        objects.append(f"<< /Title ({title}) >>")
+
+    pdf = b"%PDF-1.4\n"
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(pdf))
+        pdf += f"{number} 0 obj\n{body}\nendobj\n".encode("latin-1")
+    xref = len(pdf)
+    pdf += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    pdf += "".join(f"{offset:010d} 00000 n \n" for offset in offsets).encode()
+    info = f" /Info {len(objects)} 0 R" if title else ""
+    pdf += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R{info} >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    return pdf
+
+def make_docx(paragraphs, title=None, author=None):
+    from docx import Document
+
+    document = Document()
+    for text in paragraphs:
+        document.add_paragraph(text)
+    document.core_properties.title = title
+    document.core_properties.author = author
+    buffer = io.BytesIO()
+    document.save(buffer)
+    return buffer.getvalue()
+
+def test_document_type_detection():
+    assert get_document_type("application/pdf", "https://example.com/download") == 'PDF'
+    assert get_document_type(None, "https://example.com/paper.PDF?version=2") == 'PDF'
+    assert get_document_type("application/vnd.openxmlformats-officedocument.wordprocessingml.document", "x") == 'DOCX'
+    assert get_document_type("text/html", "https://example.com/article") is None
+
+def test_pdf_text_metadata_and_page_cap():
+    pdf = make_pdf(["Dasiglucagon trial doi:10.2337/dc20-2995.", "Second page results"], title="Dasiglucagon")
+    text, metadata = extract_text_from_pdf(pdf)
+    assert "Dasiglucagon trial" in text and "Second page results" in text
+    assert metadata['title'] == "Dasiglucagon"
+    assert metadata['doi'] == "10.2337/dc20-2995"
+
+    text, _ = extract_text_from_pdf(pdf, max_pages=1)
+    assert "Second page" not in text
+
+def test_docx_text_metadata_and_character_cap():
+    docx = make_docx(["Glucagon rescue study.", "A" * 500, "Never reached"], title="Rescue", author="Jane Doe")
+    text, metadata = extract_text_from_docx(docx)
+    assert text.split("\n")[0] == "Glucagon rescue study."
+    assert (metadata['title'], metadata['authors']) == ("Rescue", "Jane Doe")
+
+    text, _ = extract_text_from_docx(docx, max_chars=100)
+    assert len(text) == 100
+    assert "Never reached" not in text
+
+def test_extraction_runs_in_process_pool():
+    text, metadata = extract_document_text(make_docx(["Pooled extraction"]), 'DOCX')
+    assert text == "Pooled extraction"
+    assert extract_document_text(b"not a pdf", 'PDF') == (None, None)
+
+def test_broken_pool_is_shut_down_and_replaced(monkeypatch):
+    class BrokenPool:
+        shutdown_calls = []
+
+        def submit(self, *args):
+            raise BrokenProcessPool("worker died")
+
+        def shutdown(self, wait=True, cancel_futures=False):
+            self.shutdown_calls.append((wait, cancel_futures))
+
+    broken = BrokenPool()
+    monkeypatch.setattr(document_extractors, "_process_pool", broken)
+    assert extract_document_text(b"%PDF", 'PDF') == (None, None)
+    assert broken.shutdown_calls == [(False, True)]
+    assert get_process_pool() is not broken
+
+def test_timed_out_pool_is_terminated_and_replaced(monkeypatch):
+    assert extract_document_text(make_docx(["Warm up"]), 'DOCX')[0] == "Warm up"
+    pool = get_process_pool()
+    processes = list(pool._processes.values())
+
+    # Parsing a long document takes far longer than this
+    monkeypatch.setattr(document_extractors, "DOCUMENT_TIMEOUT", 0.001)
+    assert extract_document_text(make_docx(["Slow paragraph"] * 2000), 'DOCX') == (None, None)
+    for process in processes:
+        process.join(10)
+    # Killed rather than left to finish the file
+    assert processes and all(process.exitcode == -signal.SIGTERM for process in processes)
+    assert get_process_pool() is not pool
+
+    monkeypatch.setattr(document_extractors, "DOCUMENT_TIMEOUT", 60)
+    assert extract_document_text(make_docx(["Next document"]), 'DOCX')[0] == "Next document"
@@ -0,0 +1,37 @@
+from html_parser import available_parsers
+from search_articles import extract_text_from_html
+from benchmark_parsers import load_corpus
+
+def test_backends_extract_identical_output():
+    """Every available parser backend extracts the same text and metadata from the corpus."""
+    pages = load_corpus()
+    assert pages, "benchmark corpus is empty"
+
+    for name, html in pages.items():
+        reference = extract_text_from_html(html, name, 'html.parser')
+        assert reference[0], f"no text extracted from {name}"
+        for backend in available_parsers():
+            assert extract_text_from_html(html, name, backend) == reference, f"{backend} differs on {name}"
+
+def test_corpus_metadata():
+    """Metadata extraction picks up meta tags, bylines and schema.org markup."""
+    pages = load_corpus()
+
+    _, metadata = extract_text_from_html(pages['journal_article.html'], 'journal_article.html')
+    assert metadata['title'].startswith('Dasiglucagon, a Next-Generation')
+    assert metadata['authors'] == 'Thomas R. Pieber; Ramzi A. Ajjan; Bruce W. Bode'
+    assert metadata['doi'] == '10.2337/dc20-2995'
+    assert metadata['journal'] == 'Diabetes Care'
+
+    _, metadata = extract_text_from_html(pages['press_release.html'], 'press_release.html')
+    assert metadata['authors'] == 'GlobeNewswire Staff'
+    assert metadata['publication_date'] == '2021-03-22T20:30:00Z'
+
+    _, metadata = extract_text_from_html(pages['company_page.html'], 'company_page.html')
+    assert metadata['authors'] == 'Corporate Communications'
+    assert metadata['abstract'].startswith('Our glucagon analogue programme')
+
+if __name__ == "__main__":
+    test_backends_extract_identical_output()
+    test_corpus_metadata()
+    print("All HTML parser tests passed!")
@@ -0,0 +1,48 @@
+import os
+import sys
+import subprocess
+
+# Packages that must only be imported when they are first used
+DEFERRED_PACKAGES = ['openai', 'pinecone', 'tiktoken', 'bs4', 'pandas', 'numpy']
+
+def measure_imports(*modules):
+    """
+    Import modules in a fresh interpreter with -X importtime.
+
+    Returns:
+        tuple: (total milliseconds, set of imported top-level packages)
+    """
+    env = dict(os.environ)
+    env.pop("OPENAI_API_KEY", None)  # importing must not need credentials
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {', '.join(modules)}"],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True
+    )
+
+    total_us, packages = 0, set()
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        packages.add(name.strip().split('.')[0])
+        # Nested imports are indented and already counted in their parent's cumulative time
+        if not name.startswith("  "):
+            total_us += int(cumulative)
+    return total_us / 1000, packages
+
+def test_qa_chat_page_imports_are_light():
+    _, packages = measure_imports("openai_client", "vector_store", "ingestion_queue")
+    assert not packages & set(DEFERRED_PACKAGES)
+
+def test_search_module_defers_heavy_imports():
+    _, packages = measure_imports("search_articles")
+    assert not packages & set(DEFERRED_PACKAGES)
+
+if __name__ == "__main__":
+    for modules in [("openai_client", "vector_store", "ingestion_queue"), ("search_articles",)]:
+        elapsed, packages = measure_imports(*modules)
+        print(f"{', '.join(modules)}: {elapsed:.0f} ms")
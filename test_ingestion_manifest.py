@@ -0,0 +1,179 @@
+import os
+import tempfile
+from types import SimpleNamespace
+
+import pytest
+
+import vector_store
+from ingestion_manifest import article_progress, make_vector_id
+from vector_store import UpsertWriter
+
+ARTICLE = {
+    'URL': "https://example.com/article/1",
+    'Title': "Dasiglucagon pharmacokinetics",
+    'Content': "Dasiglucagon reached peak plasma concentration within 35 minutes. " * 300,
+    'Authors': None
+}
+
+class FakeIndex:
+    """Pinecone index stand-in that can fail a number of upserts."""
+
+    def __init__(self, failures=0, delete_failures=0):
+        self.failures = failures
+        self.delete_failures = delete_failures
+        self.vectors = {}
+        self.deleted = []
+        self.batches = []
+
+    def upsert(self, vectors, async_req=False):
+        self.batches.append(len(vectors))
+        error = None
+        if self.failures:
+            self.failures -= 1
+            error = ConnectionError("upsert failed")
+        else:
+            for vector in vectors:
+                self.vectors[vector['id']] = vector
+
+        # Like the client, async requests report errors when the result is collected
+        def get():
+            if error:
+                raise error
+        if not async_req:
+            get()
+        return SimpleNamespace(get=get)
+
+    def delete(self, ids):
+        if self.delete_failures:
+            self.delete_failures -= 1
+            raise ConnectionError("delete failed")
+        self.deleted.extend(ids)
+
+@pytest.fixture
+def manifest_path(monkeypatch):
+    monkeypatch.setattr(vector_store, "INGESTION_MAX_ATTEMPTS", 1)
+    monkeypatch.setattr(vector_store, "INGESTION_RETRY_DELAY", 0)
+    # Fixed-size character chunks instead of tiktoken, whose encoding may need a download
+    monkeypatch.setattr(vector_store, "chunk_text", lambda text: [text[i:i+2000] for i in range(0, len(text), 2000)])
+    return os.path.join(tempfile.mkdtemp(), "manifest.db")
+
+def test_resume_skips_stored_chunks(manifest_path, monkeypatch):
+    embedded = []
+    def embed(text):
+        embedded.append(text)
+        if len(embedded) == 2:
+            raise ConnectionError("embedding failed")
+        return [0.1] * 8
+    monkeypatch.setattr(vector_store, "generate_embedding", embed)
+
+    index = FakeIndex(failures=1)
+    with pytest.raises(RuntimeError):
+        vector_store.store_article_chunks(ARTICLE, index, manifest_path=manifest_path)
+    total = len(vector_store.chunk_text(ARTICLE['Content']))
+    assert article_progress(ARTICLE['URL'], manifest_path) == {'embedded': total - 1, 'pending': 1}
+
+    # The retry embeds only the failed chunk and upserts everything once
+    embedded.clear()
+    assert vector_store.store_article_chunks(ARTICLE, index, manifest_path=manifest_path) == total
+    assert len(embedded) == 1
+    assert article_progress(ARTICLE['URL'], manifest_path) == {'upserted': total}
+    assert sorted(index.vectors) == sorted(make_vector_id(ARTICLE['URL'], i) for i in range(total))
+    assert 'authors' not in index.vectors[make_vector_id(ARTICLE['URL'], 0)]['metadata']
+
+    # Storing the same article again is a no-op
+    embedded.clear()
+    assert vector_store.store_article_chunks(ARTICLE, index, manifest_path=manifest_path) == total
+    assert embedded == []
+
+def test_shorter_content_deletes_stale_vectors(manifest_path, monkeypatch):
+    monkeypatch.setattr(vector_store, "generate_embedding", lambda text: [0.1] * 8)
+    index = FakeIndex()
+    total = vector_store.store_article_chunks(ARTICLE, index, manifest_path=manifest_path)
+
+    shorter = dict(ARTICLE, Content=ARTICLE['Content'][:len(ARTICLE['Content']) // 2])
+    new_total = vector_store.store_article_chunks(shorter, index, manifest_path=manifest_path)
+    assert new_total < total
+    assert sorted(index.deleted) == sorted(make_vector_id(ARTICLE['URL'], i) for i in range(new_total, total))
+
+def test_failed_stale_delete_is_retried(manifest_path, monkeypatch):
+    monkeypatch.setattr(vector_store, "generate_embedding", lambda text: [0.1] * 8)
+    index = FakeIndex(delete_failures=1)
+    total = vector_store.store_article_chunks(ARTICLE, index, manifest_path=manifest_path)
+
+    shorter = dict(ARTICLE, Content=ARTICLE['Content'][:len(ARTICLE['Content']) // 2])
+    with pytest.raises(ConnectionError):
+        vector_store.store_article_chunks(shorter, index, manifest_path=manifest_path)
+    # The manifest still records the vectors that must be deleted
+    shorter_total = len(vector_store.chunk_text(shorter['Content']))
+    assert article_progress(ARTICLE['URL'], manifest_path)['upserted'] == total - shorter_total
+
+    new_total = vector_store.store_article_chunks(shorter, index, manifest_path=manifest_path)
+    assert sorted(index.deleted) == sorted(make_vector_id(ARTICLE['URL'], i) for i in range(new_total, total))
+    assert article_progress(ARTICLE['URL'], manifest_path) == {'upserted': new_total}
+
+def test_upsert_batches_are_sized_by_bytes():
+    index = FakeIndex(failures=1)
+    done, failed = [], []
+    writer = UpsertWriter(index, done.extend, lambda ids, error: failed.extend(ids),
+                          max_bytes=10_000, max_vectors=1000, concurrency=2)
+    for i in range(30):
+        writer.add({"id": str(i), "values": [0.123456] * 100, "metadata": {"chunk_text": "x" * 1000}})
+    writer.close()
+
+    # About 1.9 KB per vector: five fit in 10 KB
+    assert index.batches == [5, 5, 5, 5, 5, 5]
+    assert failed == [str(i) for i in range(5)]
+    assert sorted(done, key=int) == [str(i) for i in range(5, 30)]
+
+def test_index_handle_is_shared_and_reconnects(monkeypatch):
+    handles = []
+    def connect():
+        handles.append(FakeIndex())
+        return handles[-1]
+    monkeypatch.setattr(vector_store, "initialize_pinecone", connect)
+    vector_store.reset_pinecone_index()
+
+    assert vector_store.get_pinecone_index() is vector_store.get_pinecone_index()
+    assert len(handles) == 1
+
+    # A failed request connects again and retries once on the new handle
+    def operation(index):
+        if index is handles[0]:
+            raise ConnectionError("connection reset")
+        return "ok"
+    assert vector_store.with_pinecone_index(operation) == "ok"
+    assert len(handles) == 2
+    assert vector_store.get_pinecone_index() is handles[1]
+    vector_store.reset_pinecone_index()
+
+def test_rejected_requests_are_not_retried(monkeypatch):
+    handles = []
+    def connect():
+        handles.append(FakeIndex())
+        return handles[-1]
+    monkeypatch.setattr(vector_store, "initialize_pinecone", connect)
+    vector_store.reset_pinecone_index()
+
+    calls = []
+    def operation(index):
+        calls.append(index)
+        raise ValueError("vector dimension 8 does not match the dimension of the index 1536")
+    with pytest.raises(ValueError):
+        vector_store.with_pinecone_index(operation)
+    assert len(calls) == 1
+    assert vector_store.get_pinecone_index() is handles[0]
+    vector_store.reset_pinecone_index()
+
+def test_upsert_connection_failure_is_the_cause(manifest_path, monkeypatch):
+    monkeypatch.setattr(vector_store, "generate_embedding", lambda text: [0.1] * 8)
+    with pytest.raises(RuntimeError) as raised:
+        vector_store.store_article_chunks(ARTICLE, FakeIndex(failures=1), manifest_path=manifest_path)
+    assert vector_store.is_connection_error(raised.value)
+
+    def embedding_fails(text):
+        raise ValueError("embedding rejected")
+    monkeypatch.setattr(vector_store, "generate_embedding", embedding_fails)
+    other = dict(ARTICLE, URL="https://example.com/article/2")
+    with pytest.raises(RuntimeError) as raised:
+        vector_store.store_article_chunks(other, FakeIndex(), manifest_path=manifest_path)
+    assert not vector_store.is_connection_error(raised.value)
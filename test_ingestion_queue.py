@@ -0,0 +1,125 @@
+import os
+import time
+import tempfile
+
+from article_store import upsert_articles
+from ingestion_queue import (
+    enqueue_ingestion, run_job, get_job, start_worker, stop_worker, get_queue_connection, requeue_interrupted_jobs,
+    retry_failed_articles
+)
+
+ARTICLES = [
+    {'URL': f"https://example.com/article/{i}", 'Title': f"Article {i}", 'Content': f"Content of article {i}"}
+    for i in range(5)
+]
+
+def make_paths():
+    directory = tempfile.mkdtemp()
+    store_path = os.path.join(directory, "articles.db")
+    upsert_articles(ARTICLES, path=store_path)
+    return os.path.join(directory, "jobs.db"), store_path
+
+def test_job_resumes_after_interruption():
+    path, store_path = make_paths()
+    job_id = enqueue_ingestion([a['URL'] for a in ARTICLES], path=path)
+    ingested = []
+
+    def crashing_factory():
+        def ingest(article):
+            if len(ingested) == 2:
+                raise KeyboardInterrupt  # the process dies mid-job
+            ingested.append(article['URL'])
+            return 3
+        return ingest
+
+    try:
+        run_job(job_id, crashing_factory, path, store_path)
+    except KeyboardInterrupt:
+        pass
+    job = get_job(job_id, path)
+    assert job['status'] == 'running'
+    assert job['done_articles'] == 2
+
+    # A new process queues the job again before its worker starts
+    assert requeue_interrupted_jobs(path) == 1
+    assert get_job(job_id, path)['status'] == 'queued'
+
+    # The restarted job only processes the remaining articles
+    run_job(job_id, lambda: lambda article: ingested.append(article['URL']) or 3, path, store_path)
+    job = get_job(job_id, path)
+    assert job['status'] == 'completed'
+    assert job['done_articles'] == 5 and job['total_chunks'] == 15
+    assert ingested == [a['URL'] for a in ARTICLES]
+
+def test_failed_articles_are_recorded():
+    path, store_path = make_paths()
+    job_id = enqueue_ingestion([ARTICLES[0]['URL'], "https://example.com/missing"], path=path)
+    run_job(job_id, lambda: lambda article: 1, path, store_path)
+
+    job = get_job(job_id, path)
+    assert job['status'] == 'completed'
+    assert (job['done_articles'], job['failed_articles']) == (1, 1)
+    conn = get_queue_connection(path)
+    error = conn.execute("SELECT error FROM job_articles WHERE job_id = ? AND status = 'failed'", (job_id,)).fetchone()[0]
+    conn.close()
+    assert "not found" in error
+
+def test_background_worker_processes_queue():
+    path, store_path = make_paths()
+    job_id = enqueue_ingestion([a['URL'] for a in ARTICLES], path=path)
+    start_worker(lambda: lambda article: 2, path, store_path)
+    try:
+        deadline = time.time() + 10
+        while get_job(job_id, path)['status'] != 'completed' and time.time() < deadline:
+            time.sleep(0.05)
+    finally:
+        stop_worker(timeout=10)
+    job = get_job(job_id, path)
+    assert job['status'] == 'completed'
+    assert job['total_chunks'] == 10
+
+def test_job_can_be_retried_after_connection_failure():
+    path, store_path = make_paths()
+    job_id = enqueue_ingestion([a['URL'] for a in ARTICLES], path=path)
+
+    def unreachable():
+        raise ConnectionError("vector store unreachable")
+    run_job(job_id, unreachable, path, store_path)
+    job = get_job(job_id, path)
+    assert job['status'] == 'failed'
+    assert job['failed_articles'] == 5
+    assert "unreachable" in job['error']
+
+    assert retry_failed_articles(job_id, path) == 5
+    run_job(job_id, lambda: lambda article: 1, path, store_path)
+    job = get_job(job_id, path)
+    assert job['status'] == 'completed'
+    assert (job['done_articles'], job['failed_articles']) == (5, 0)
+
+def test_default_ingest_resets_handle_only_on_connection_errors(monkeypatch):
+    import vector_store
+    import ingestion_queue
+
+    resets = []
+    errors = [ValueError("embedding rejected"), RuntimeError("chunks not stored")]
+    errors[1].__cause__ = ConnectionError("connection reset")
+    def store(article, index):
+        raise errors.pop(0)
+    monkeypatch.setattr(vector_store, "get_pinecone_index", lambda: object())
+    monkeypatch.setattr(vector_store, "reset_pinecone_index", lambda: resets.append(True))
+    monkeypatch.setattr(vector_store, "store_article_chunks", store)
+
+    ingest = ingestion_queue._default_ingest()
+    for _ in range(2):
+        try:
+            ingest(ARTICLES[0])
+        except Exception:
+            pass
+    assert resets == [True]
+
+if __name__ == "__main__":
+    test_job_resumes_after_interruption()
+    test_failed_articles_are_recorded()
+    test_background_worker_processes_queue()
+    test_job_can_be_retried_after_connection_failure()
+    print("All ingestion queue tests passed!")
@@ -0,0 +1,412 @@
+import io
+import os
+import json
+import time
+import asyncio
+import threading
+from datetime import datetime
+
+import pytest
+
+import search_articles
+from search_articles import process_search_result, iter_search_articles
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "test_fixtures")
+
+class FakeResponse:
+    """requests.Response stand-in serving a recorded API response."""
+
+    def __init__(self, body):
+        self.body = body
+        self.raw = io.BytesIO(body)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return json.loads(self.body)
+
+def fixture_bytes(name):
+    with open(os.path.join(FIXTURES_DIR, name), "rb") as f:
+        return f.read()
+
+def make_item(i, publication_date):
+    return {
+        'url': f"https://pubmed.ncbi.nlm.nih.gov/{1000 + i}/",
+        'title': f"Article {i}",
+        'content': f"Distinct findings of study number {i} on glucagon analogues.",
+        'metadata': {'title': f"Article {i}", 'publication_date': publication_date}
+    }
+
+@pytest.fixture
+def summaries(monkeypatch):
+    calls = []
+    def summarize(text, url, metadata):
+        calls.append(url)
+        return f"Summary of {url}"
+    monkeypatch.setattr(search_articles, "generate_summary", summarize)
+    return calls
+
+def test_out_of_window_article_is_not_summarized(summaries):
+    assert process_search_result(make_item(0, "2001-03-01"), start_date=datetime(2020, 1, 1)) is None
+    assert summaries == []
+
+    result = process_search_result(make_item(1, "2022-03-01"), start_date=datetime(2020, 1, 1))
+    assert result['Summary'] == f"Summary of {make_item(1, '')['url']}"
+    assert len(summaries) == 1
+
+def test_search_summarizes_only_kept_articles(summaries, monkeypatch):
+    items = [make_item(i, "2001-03-01" if i % 2 == 0 else "2023-05-14") for i in range(6)]
+    monkeypatch.setattr(search_articles, "gather_search_urls", lambda *args, **kwargs: items)
+
+    results = list(iter_search_articles("glucagon", num_results=3, years_back=5, summary_mode='single'))
+    assert len(results) == 3
+    assert len(summaries) == 3
+
+def test_articles_are_fetched_from_their_source_url(summaries, monkeypatch):
+    links = [
+        "https://www.example.com/News/Story/?ref=rss&utm_source=feed",
+        "https://example.com/News/Story?ref=rss",
+        "https://www.ncbi.nlm.nih.gov/pubmed/33397400",
+        "https://pubmed.ncbi.nlm.nih.gov/33397400/",
+    ]
+    fetched = []
+    def extract(url):
+        fetched.append(url)
+        return f"Findings reported at {url}", {}
+    monkeypatch.setattr(search_articles, "gather_search_urls", lambda *args, **kwargs: links)
+    monkeypatch.setattr(search_articles, "extract_text_from_url", extract)
+
+    results = list(iter_search_articles("glucagon", num_results=5, summary_mode='single'))
+    # Duplicates are matched on canonical URLs, but pages are downloaded as returned
+    assert sorted(fetched) == sorted([links[0], links[2]])
+    assert sorted(result['URL'] for result in results) == sorted(fetched)
+
+def test_mixed_precision_dates_are_parsed_and_sorted():
+    rows = [
+        {'URL': "https://example.com/a", 'Publication_Date': "2023"},
+        {'URL': "https://example.com/b", 'Publication_Date': "2023-05-14"},
+        {'URL': "https://example.com/c", 'Publication_Date': None},
+        {'URL': "https://example.com/d", 'Publication_Date': "2023-05"},
+        {'URL': "https://example.com/e", 'Publication_Date': "2024-01-02T08:00:00Z"},
+        {'URL': "https://example.com/f", 'Publication_Date': "March 3, 2022"},
+    ]
+    df = search_articles.results_to_dataframe(rows)
+
+    assert list(df['URL']) == [f"https://example.com/{c}" for c in "ebdafc"]
+    assert str(df['Publication_Date'].dtype).startswith("datetime64")
+    assert df['Publication_Date'].iloc[0] == datetime(2024, 1, 2, 8)
+    assert df['Publication_Date'].iloc[4] == datetime(2022, 3, 3)
+
+def test_pubmed_efetch_is_parsed(monkeypatch):
+    esearch = {'esearchresult': {'webenv': "MCID_1", 'querykey': "1", 'idlist': ["37184512", "36301122", "33712098", "99999999"]}}
+    requested = []
+    def get(url, params=None, **kwargs):
+        requested.append((url, params))
+        if "esearch" in url:
+            return FakeResponse(json.dumps(esearch).encode())
+        return FakeResponse(fixture_bytes("pubmed_efetch.xml"))
+    monkeypatch.setattr(search_articles.requests, "get", get)
+
+    results = search_articles.get_pubmed_results("dasiglucagon", max_results=4, start_date=datetime(2020, 1, 1))
+    # One ESearch and one batched EFetch for all ids
+    assert [url.rsplit("/", 1)[-1] for url, _ in requested] == ["esearch.fcgi", "efetch.fcgi"]
+    assert requested[1][1]['retmax'] == 4
+    by_pmid = {result['url'].rstrip("/").rsplit("/", 1)[-1]: result for result in results}
+
+    trial = by_pmid["37184512"]['metadata']
+    assert trial['title'] == "Dasiglucagon for the treatment of severe hypoglycemia in adults with type 1 diabetes."
+    assert trial['publication_date'] == "2023-05-04"  # ArticleDate wins over PubDate
+    assert trial['authors'] == "Thomas R Pieber; BW Bode; Dasiglucagon Study Group"
+    assert trial['doi'] == "10.2337/dc23-0001"
+    assert trial['abstract'].split("\n")[1].startswith("RESULTS: Median time")
+    assert "(P < 0.001)" in trial['abstract']
+    assert "Publication Type: Clinical Trial, Phase III, Randomized Controlled Trial" in by_pmid["37184512"]['content']
+
+    # MedlineDate and a month-name PubDate
+    assert by_pmid["36301122"]['metadata']['publication_date'] == "2022"
+    assert by_pmid["36301122"]['metadata']['doi'] is None
+    undated = by_pmid["33712098"]['metadata']
+    assert undated['publication_date'] == "2021-03"
+
+    # Missing abstract: content is the title and publication type, DOI from ELocationID
+    assert undated['abstract'] is None
+    assert undated['doi'] == "10.1177/1932296821999999"
+    assert by_pmid["33712098"]['content'] == "Dasiglucagon autoinjector usability.\nPublication Type: Journal Article"
+
+    # Ids missing from EFetch fall back to scraping the page
+    assert by_pmid["99999999"] == {'url': "https://pubmed.ncbi.nlm.nih.gov/99999999/", 'title': None, 'authors': None}
+
+def test_clinicaltrials_pages_are_followed_and_parsed(monkeypatch):
+    pages = {None: "clinicaltrials_page1.json", "NF0g5JGBlPMuwA": "clinicaltrials_page2.json"}
+    tokens = []
+    def get(url, params=None, **kwargs):
+        tokens.append(params.get('pageToken'))
+        return FakeResponse(fixture_bytes(pages[params.get('pageToken')]))
+    monkeypatch.setattr(search_articles.requests, "get", get)
+
+    results = search_articles.get_clinicaltrials_results("dasiglucagon", max_results=5, start_date=datetime(2018, 1, 1))
+    assert tokens == [None, "NF0g5JGBlPMuwA"]
+    assert [result['metadata']['nct_id'] for result in results] == ["NCT03378635", "NCT04667377", "NCT05123456"]
+
+    rct, open_label, registry = results
+    assert rct['url'] == "https://clinicaltrials.gov/study/NCT03378635"
+    assert (rct['phase'], rct['study_type']) == ("Phase 3", "RCT")
+    assert rct['authors'] == "Thomas Pieber"
+    assert rct['metadata']['completion_date'] == "2018-10"
+    assert "Conditions: Type 1 Diabetes, Hypoglycemia" in rct['content']
+
+    assert (open_label['phase'], open_label['study_type']) == ("Phase 2/Phase 3", "Interventional")
+    assert open_label['authors'] == "Sponsor: Zealand Pharma; Children's Hospital of Philadelphia"
+    assert open_label['metadata']['publication_date'] == "2021-03"
+
+    assert (registry['phase'], registry['study_type']) == (None, "Observational")
+    assert registry['metadata']['abstract'] is None
+
+def test_clinicaltrials_paging_stops_at_max_results(monkeypatch):
+    tokens = []
+    def get(url, params=None, **kwargs):
+        tokens.append(params.get('pageToken'))
+        return FakeResponse(fixture_bytes("clinicaltrials_page1.json"))
+    monkeypatch.setattr(search_articles.requests, "get", get)
+
+    assert len(list(search_articles.iter_clinicaltrials_studies("dasiglucagon", max_results=2))) == 2
+    assert tokens == [None]
+
+PHASE_TEXTS = [
+    ("A Phase III, randomized trial of dasiglucagon", "Phase 3", "RCT"),
+    ("Results of the phase IV extension, a systematic review", "Phase 4", "Review"),
+    ("An open-label Phase III/IV observational study", "Phase 3/Phase 4", "Observational"),
+    ("This phase-2/3 study was randomized", "Phase 2/Phase 3", "RCT"),
+    ("Phase I dose escalation in vitro and in vivo", "Phase 1", "Preclinical"),
+    ("Phase 2 / Phase 3 seamless design", "Phase 2/Phase 3", None),
+    ("Phase Inclusion criteria were reviewed in a case report", None, "Case Study"),
+    ("No development information", None, None),
+]
+
+def test_extract_phase_info():
+    for text, phase, study_type in PHASE_TEXTS:
+        assert search_articles.extract_phase_info(text) == (phase, study_type), text
+    assert search_articles.extract_phase_info(None) == (None, None)
+
+def test_classify_phase_column_matches_extract_phase_info():
+    import pandas as pd
+
+    texts = pd.Series([text for text, _, _ in PHASE_TEXTS] + [None], index=range(10, 19))
+    phases, study_types = search_articles.classify_phase_column(texts)
+    assert list(phases.index) == list(texts.index)
+    assert list(phases) == [phase for _, phase, _ in PHASE_TEXTS] + [None]
+    assert list(study_types) == [study_type for _, _, study_type in PHASE_TEXTS] + [None]
+
+def test_reclassify_results_keeps_existing_values():
+    import pandas as pd
+
+    df = pd.DataFrame({
+        'Content': ["A Phase III, randomized trial", "Phase 2/3 observational study"],
+        'Development_Phase': ["Phase 3", None],
+        'Study_Type': [None, "Interventional"],
+    })
+    kept = search_articles.reclassify_results(df)
+    assert list(kept['Development_Phase']) == ["Phase 3", "Phase 2/Phase 3"]
+    assert list(kept['Study_Type']) == ["RCT", "Interventional"]
+
+    overwritten = search_articles.reclassify_results(df, overwrite=True)
+    assert list(overwritten['Study_Type']) == ["RCT", "Observational"]
+    # The input frame is left unchanged
+    assert pd.isna(df['Development_Phase'].iloc[1])
+
+@pytest.fixture
+def source_index(monkeypatch, tmp_path):
+    """Point SEARCH_DOMAINS_FILE at a temporary file and rebuild the source index around each test."""
+    path = tmp_path / "domains.json"
+    monkeypatch.setenv("SEARCH_DOMAINS_FILE", str(path))
+    search_articles.load_extra_domains.cache_clear()
+    search_articles.get_source_index.cache_clear()
+    yield path
+    search_articles.load_extra_domains.cache_clear()
+    search_articles.get_source_index.cache_clear()
+
+def test_hosts_are_classified_by_suffix(source_index):
+    classify = search_articles.classify_host
+    assert classify("www.nejm.org") == "Research Paper"
+    assert classify("WWW.NEJM.ORG.") == "Research Paper"
+    assert classify("classic.clinicaltrials.gov") == "Clinical Trial"
+    assert classify("www.accessdata.fda.gov") == "Regulatory Document"
+    assert classify("notfda.gov") == "Other"
+    assert classify("gov") == "Other"
+    assert classify(None) == "Other"
+
+    get_source = search_articles.get_source_metadata
+    assert get_source("https://www.ncbi.nlm.nih.gov/pmc/articles/PMC8108478/") == "Research Paper"
+    assert get_source("https://www.ncbi.nlm.nih.gov/pubmed/33397400") == "Research Paper"
+    assert get_source("https://www.ncbi.nlm.nih.gov/gene/2641") == "Other"
+
+def test_extra_domains_extend_the_source_index(source_index):
+    source_index.write_text(json.dumps({'News': ["Endpoints.News ", "biospace.com"], 'Patent': ["patents.google.com"]}))
+
+    assert search_articles.classify_host("www.endpoints.news") == "News"
+    assert search_articles.classify_host("patents.google.com") == "Patent"
+    domains = search_articles.get_search_domains()
+    assert domains['News'].count("biospace.com") == 1
+    assert domains['Patent'] == ["patents.google.com"]
+
+def test_missing_or_malformed_extra_domains_file_is_ignored(source_index):
+    assert search_articles.load_extra_domains() == {}
+    assert search_articles.classify_host("www.nejm.org") == "Research Paper"
+
+    source_index.write_text("{not json")
+    search_articles.load_extra_domains.cache_clear()
+    assert search_articles.load_extra_domains() == {}
+
+    source_index.write_text(json.dumps({'News': "endpoints.news"}))
+    search_articles.load_extra_domains.cache_clear()
+    assert search_articles.load_extra_domains() == {}
+
+@pytest.fixture
+def blocked_source():
+    """A source that blocks until the test ends, returning its release event."""
+    release = threading.Event()
+    def source():
+        release.wait(10)
+        return ["https://example.com/late"]
+    yield release, source
+    release.set()
+
+def test_slow_source_is_cut_off_at_its_deadline(blocked_source, monkeypatch):
+    release, slow = blocked_source
+    monkeypatch.setattr(search_articles, "SEARCH_DEADLINE", 10)
+    monkeypatch.setattr(search_articles, "SOURCE_DEADLINES", {'slow': 0.2})
+    def failing():
+        raise ConnectionError("source down")
+    sources = [
+        ('slow:Slow', slow, ()),
+        ('failing:Failing', failing, ()),
+        ('fast:Fast', lambda url: [url], ("https://example.com/fast",)),
+    ]
+
+    started = time.monotonic()
+    results = asyncio.run(search_articles._gather_sources(sources))
+    assert time.monotonic() - started < 5
+    # One source timing out and another raising do not affect the rest
+    assert results == {'slow:Slow': [], 'failing:Failing': [], 'fast:Fast': ["https://example.com/fast"]}
+
+def test_global_deadline_returns_partial_results(blocked_source, monkeypatch):
+    release, slow = blocked_source
+    monkeypatch.setattr(search_articles, "SEARCH_DEADLINE", 0.3)
+    monkeypatch.setattr(search_articles, "SOURCE_DEADLINES", {'slow': 10})
+    updates = []
+    sources = [('slow:Slow', slow, ()), ('fast:Fast', lambda: ["https://example.com/fast"], ())]
+
+    started = time.monotonic()
+    results = asyncio.run(search_articles._gather_sources(sources, lambda *args: updates.append(args)))
+    assert time.monotonic() - started < 5
+    assert results['fast:Fast'] == ["https://example.com/fast"]
+    assert not results.get('slow:Slow')
+    assert updates[0] == ("Searched Fast (1/2 sources)", 10)
+
+class StreamingResponse:
+    """Streamed requests.Response stand-in that serves a body in chunks."""
+
+    def __init__(self, chunks, content_length=None, delay=0):
+        self.url = "https://example.com/page"
+        self.chunks = chunks
+        self.delay = delay
+        self.headers = {} if content_length is None else {'content-length': content_length}
+        self.served = 0
+        self.closed = False
+
+    def iter_content(self, chunk_size=1):
+        for chunk in self.chunks:
+            time.sleep(self.delay)
+            self.served += 1
+            yield chunk
+
+    def close(self):
+        self.closed = True
+
+def test_response_body_byte_cap():
+    read = search_articles.read_response_body
+    chunks = [b"a" * 40, b"b" * 40, b"c" * 40, b"d" * 40]
+
+    response = StreamingResponse(chunks)
+    assert read(response, 100, truncate=True) == b"a" * 40 + b"b" * 40 + b"c" * 20
+    assert response.served == 3 and response.closed
+
+    response = StreamingResponse(chunks)
+    assert read(response, 100, truncate=False) is None
+    assert response.served == 3 and response.closed
+
+    assert read(StreamingResponse(chunks), 160, truncate=False) == b"".join(chunks)
+
+def test_response_body_content_length():
+    read = search_articles.read_response_body
+    chunks = [b"x" * 50, b"y" * 50]
+
+    # An announced oversized body is refused without reading it
+    response = StreamingResponse(chunks, content_length="5000")
+    assert read(response, 80, truncate=False) is None
+    assert response.served == 0 and response.closed
+    # but truncated when a prefix is enough
+    assert read(StreamingResponse(chunks, content_length="5000"), 80, truncate=True) == b"x" * 50 + b"y" * 30
+
+    # A Content-Length that understates the body does not lift the cap
+    assert read(StreamingResponse(chunks, content_length="10"), 80, truncate=False) is None
+    # Missing or malformed headers are treated as unknown
+    assert read(StreamingResponse(chunks), 100, truncate=False) == b"".join(chunks)
+    assert read(StreamingResponse(chunks, content_length="lots"), 100, truncate=False) == b"".join(chunks)
+
+def test_response_body_time_cap(monkeypatch):
+    monkeypatch.setattr(search_articles, "DOWNLOAD_TIMEOUT", 0.05)
+    read = search_articles.read_response_body
+    chunks = [b"z" * 10] * 20
+
+    response = StreamingResponse(chunks, delay=0.03)
+    body = read(response, 1000, truncate=True)
+    assert body and len(body) < 200
+    assert response.served < 20 and response.closed
+
+    assert read(StreamingResponse(chunks, delay=0.03), 1000, truncate=False) is None
+
+SOURCES = ['pubmed:PubMed', 'clinicaltrials:ClinicalTrials.gov', 'journal_api:nejm.org',
+           'domain_search:fda.gov', 'domain_search:biospace.com']
+
+def test_search_budget_is_split_by_source_weight():
+    budget = search_articles.plan_search_budget(10, SOURCES)
+    # 15 candidates (CANDIDATE_FACTOR 1.5) in proportion to the weights 4:3:1:1:1
+    assert budget == {
+        'pubmed:PubMed': 6, 'clinicaltrials:ClinicalTrials.gov': 5, 'journal_api:nejm.org': 2,
+        'domain_search:fda.gov': 1, 'domain_search:biospace.com': 1
+    }
+    assert search_articles.plan_search_budget(10, []) == {}
+    assert search_articles.plan_search_budget(7, ['pubmed:PubMed']) == {'pubmed:PubMed': 11}
+
+def test_search_budget_with_fewer_results_than_sources():
+    for num_results in (1, 2, 3):
+        budget = search_articles.plan_search_budget(num_results, SOURCES)
+        # Every source is asked for one candidate, and no more than that in total
+        assert budget == dict.fromkeys(SOURCES, 1)
+
+    budget = search_articles.plan_search_budget(2, ['pubmed:PubMed'] + [f"domain_search:site{i}.org" for i in range(4)])
+    assert sum(budget.values()) == 5 and min(budget.values()) == 1
+
+def test_years_back_sets_the_date_window(monkeypatch):
+    calls = []
+    def gather(query, search_domains, status_callback=None, num_results=10, start_date=None):
+        calls.append((num_results, start_date))
+        return []
+    monkeypatch.setattr(search_articles, "gather_search_urls", gather)
+
+    assert list(iter_search_articles("glucagon", num_results=4, years_back=3)) == []
+    num_results, start_date = calls[0]
+    assert num_results == 4
+    assert abs((datetime.now() - start_date).days - 3 * 365) <= 1
+
+    assert search_articles.is_within_date_window("2021-06", start_date=datetime(2021, 1, 1))
+    assert not search_articles.is_within_date_window("2020-12-31", start_date=datetime(2021, 1, 1))
+    assert search_articles.is_within_date_window(None, start_date=datetime(2021, 1, 1))
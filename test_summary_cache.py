@@ -0,0 +1,68 @@
+import os
+import tempfile
+from types import SimpleNamespace
+
+import pandas as pd
+import pytest
+
+import summary_cache
+from summary_cache import make_summary_key, get_cached_summary, store_cached_summary, get_cache_connection
+
+ARTICLES = pd.DataFrame([
+    {'URL': f"https://example.com/article/{i}", 'Title': f"Article {i}", 'Summary': f"Summary {i}", 'Content': f"Content {i}"}
+    for i in range(3)
+])
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Controllable time for the cache module."""
+    now = SimpleNamespace(value=1_700_000_000.0)
+    monkeypatch.setattr(summary_cache, "time", SimpleNamespace(time=lambda: now.value))
+    return now
+
+@pytest.fixture
+def cache_path():
+    return os.path.join(tempfile.mkdtemp(), "summaries.db")
+
+def test_key_ignores_order_and_fields_outside_the_prompt():
+    key = make_summary_key(ARTICLES, ["Efficacy", "Safety"], "Comprehensive", "gpt-4o-mini")
+
+    # Article order, focus area order and case, and non-prompt fields do not matter
+    reordered = ARTICLES.iloc[::-1].assign(Content="changed")
+    assert make_summary_key(reordered, ["safety", "efficacy"], "Comprehensive", "gpt-4o-mini") == key
+
+    # Prompt fields, the article set, summary type and model do
+    edited = ARTICLES.assign(Summary=["Summary 0", "Summary 1", "Revised"])
+    assert make_summary_key(edited, ["Efficacy", "Safety"], "Comprehensive", "gpt-4o-mini") != key
+    assert make_summary_key(ARTICLES.iloc[:2], ["Efficacy", "Safety"], "Comprehensive", "gpt-4o-mini") != key
+    assert make_summary_key(ARTICLES, ["Efficacy", "Safety"], "Brief", "gpt-4o-mini") != key
+    assert make_summary_key(ARTICLES, ["Efficacy", "Safety"], "Comprehensive", "gpt-4o") != key
+
+def test_entries_expire_after_ttl(clock, cache_path, monkeypatch):
+    monkeypatch.setattr(summary_cache, "SUMMARY_CACHE_TTL_DAYS", 1)
+    store_cached_summary("key", "Cached summary", path=cache_path)
+
+    clock.value += 86400 - 60
+    assert get_cached_summary("key", path=cache_path) == "Cached summary"
+
+    clock.value += 120
+    assert get_cached_summary("key", path=cache_path) is None
+    conn = get_cache_connection(cache_path)
+    assert conn.execute("SELECT COUNT(*) FROM summaries").fetchone()[0] == 0
+    conn.close()
+
+def test_least_recently_used_entries_are_evicted(clock, cache_path, monkeypatch):
+    monkeypatch.setattr(summary_cache, "SUMMARY_CACHE_MAX_ENTRIES", 2)
+    store_cached_summary("first", "First", path=cache_path)
+    clock.value += 1
+    store_cached_summary("second", "Second", path=cache_path)
+
+    # Reading "first" makes "second" the least recently used
+    clock.value += 1
+    assert get_cached_summary("first", path=cache_path) == "First"
+    clock.value += 1
+    store_cached_summary("third", "Third", path=cache_path)
+
+    assert get_cached_summary("second", path=cache_path) is None
+    assert get_cached_summary("first", path=cache_path) == "First"
+    assert get_cached_summary("third", path=cache_path) == "Third"
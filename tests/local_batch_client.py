@@ -0,0 +1,53 @@
+import json
+import uuid
+from types import SimpleNamespace
+
+class LocalBatchClient:
+    """
+    In-process stand-in for the OpenAI files and batches APIs.
+
+    Batches complete immediately by passing each request body to respond,
+    which returns the message content. Packed and single requests are
+    answered the same way through chat.completions.create.
+    """
+
+    def __init__(self, respond):
+        self.respond = respond
+        self._files = {}
+        self._batches = {}
+        self.requests = []
+        self.files = SimpleNamespace(create=self._create_file, content=self._file_content)
+        self.batches = SimpleNamespace(create=self._create_batch, retrieve=self._batches.__getitem__)
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create_completion))
+
+    def _create_completion(self, **body):
+        self.requests.append(body)
+        message = SimpleNamespace(content=self.respond(body))
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+    def _create_file(self, file, purpose):
+        _, handle = file
+        file_id = f"file-{uuid.uuid4().hex}"
+        self._files[file_id] = handle.read().decode('utf-8')
+        return SimpleNamespace(id=file_id, purpose=purpose)
+
+    def _file_content(self, file_id):
+        return SimpleNamespace(text=self._files[file_id])
+
+    def _create_batch(self, input_file_id, endpoint, completion_window):
+        output = []
+        for line in self._files[input_file_id].splitlines():
+            request = json.loads(line)
+            body = self._create_completion(**request['body'])
+            output.append(json.dumps({
+                'custom_id': request['custom_id'],
+                'response': {
+                    'status_code': 200,
+                    'body': {'choices': [{'message': {'content': body.choices[0].message.content}}]}
+                }
+            }))
+        output_id = f"file-{uuid.uuid4().hex}"
+        self._files[output_id] = '\n'.join(output)
+        batch = SimpleNamespace(id=f"batch-{uuid.uuid4().hex}", status='completed', output_file_id=output_id)
+        self._batches[batch.id] = batch
+        return batch
@@ -1,20 +1,32 @@
 import os
-from dotenv import load_dotenv
-import pinecone
-from openai import OpenAI
-import tiktoken
 import time
 import json
-import uuid
+import threading
+from functools import lru_cache
+from openai_client import get_openai_client
+from ingestion_manifest import (
+    PENDING, EMBEDDED, UPSERTED, get_manifest_connection, make_vector_id, content_hash,
+    sync_article, save_embedding, load_embeddings, mark_upserted, mark_failed, remove_chunks
+)
 
-# Load environment variables
-load_dotenv()
+# Rounds of retries for chunks that failed to embed or upsert, and the first backoff delay in seconds
+INGESTION_MAX_ATTEMPTS = max(1, int(os.getenv("INGESTION_MAX_ATTEMPTS", "3")))
+INGESTION_RETRY_DELAY = float(os.getenv("INGESTION_RETRY_DELAY", "2"))
 
-# Initialize OpenAI client
-client = OpenAI()
+# Upsert batches are closed at this many serialized bytes (Pinecone accepts up to 2 MB
+# per request) or vectors, and this many batches are sent at once
+UPSERT_MAX_BYTES = int(os.getenv("UPSERT_MAX_BYTES", str(1536 * 1024)))
+UPSERT_MAX_VECTORS = int(os.getenv("UPSERT_MAX_VECTORS", "1000"))
+UPSERT_CONCURRENCY = int(os.getenv("UPSERT_CONCURRENCY", "4"))
+
+# Shared index handle of this process, created on first use by get_pinecone_index()
+_pinecone_index = None
+_pinecone_lock = threading.Lock()
 
 def initialize_pinecone():
     """Initialize Pinecone connection."""
+    import pinecone
+
     api_key = os.getenv("PINECONE_API_KEY")
     environment = os.getenv("PINECONE_ENVIRONMENT", "gcp-starter")
     
@@ -24,37 +36,104 @@ def initialize_pinecone():
     # Initialize Pinecone with new API
     pinecone_client = pinecone.Pinecone(api_key=api_key)
     
-    # Check if index exists, if not create it
     #index_name = "searchableapi"
     index_name = "demo"
     
-    # Get list of indexes
-    indexes = [index.name for index in pinecone_client.list_indexes()]
-    
-    if index_name not in indexes:
-        # Create index
+    # Connect to index, with a thread pool for concurrent upserts. Resolving the
+    # index host is the only control-plane call and fails if the index is missing,
+    # so the index is only created then instead of listing all indexes every time.
+    try:
+        return pinecone_client.Index(index_name, pool_threads=UPSERT_CONCURRENCY)
+    except pinecone.NotFoundException:
         pinecone_client.create_index(
             name=index_name,
             dimension=1536,  # OpenAI embedding dimension
             metric="cosine"
         )
         print(f"Created new Pinecone index: {index_name}")
+        return pinecone_client.Index(index_name, pool_threads=UPSERT_CONCURRENCY)
+
+def get_pinecone_index():
+    """
+    Get the Pinecone index handle shared by all pages, sessions and the ingestion worker.
+    
+    The connection is made on the first call and reused afterwards, until
+    reset_pinecone_index() drops it.
+    
+    Returns:
+        Pinecone index
+    """
+    global _pinecone_index
+    with _pinecone_lock:
+        if _pinecone_index is None:
+            _pinecone_index = initialize_pinecone()
+        return _pinecone_index
+
+def reset_pinecone_index():
+    """Drop the shared index handle so the next get_pinecone_index() connects again."""
+    global _pinecone_index
+    with _pinecone_lock:
+        _pinecone_index = None
+
+def is_connection_error(error):
+    """
+    Whether an error, or the error that caused it, is a connection or transport failure.
     
-    # Connect to index
-    index = pinecone_client.Index(index_name)
-    return index
+    Rejected requests (validation errors, 4xx responses) are not, since
+    reconnecting and sending them again cannot succeed.
+    """
+    import urllib3
+
+    while error is not None:
+        if isinstance(error, (ConnectionError, TimeoutError, urllib3.exceptions.HTTPError)):
+            return True
+        error = error.__cause__
+    return False
+
+def with_pinecone_index(operation):
+    """
+    Run operation(index) on the shared index handle, reconnecting once if the connection fails.
+    
+    Args:
+        operation (function): Takes the Pinecone index and returns a result
+    
+    Returns:
+        The result of operation
+    """
+    try:
+        return operation(get_pinecone_index())
+    except Exception as e:
+        if not is_connection_error(e):
+            raise
+        print(f"Pinecone connection failed, reconnecting: {str(e)}")
+        reset_pinecone_index()
+        return operation(get_pinecone_index())
+
+def get_pinecone_error():
+    """Connect to Pinecone if needed and return the error message, or None when connected."""
+    try:
+        get_pinecone_index()
+        return None
+    except Exception as e:
+        return str(e)
+
+@lru_cache(maxsize=None)
+def get_encoding():
+    """Tokenizer of the embedding model, loaded on first use."""
+    import tiktoken
+
+    return tiktoken.get_encoding("cl100k_base")  # OpenAI's encoding
 
 def num_tokens(text):
     """Count the number of tokens in a text string."""
-    encoding = tiktoken.get_encoding("cl100k_base")  # OpenAI's encoding
-    return len(encoding.encode(text))
+    return len(get_encoding().encode(text))
 
 def chunk_text(text, chunk_size=512, chunk_overlap=64):
     """Split text into chunks with specified size and overlap."""
     if not text:
         return []
     
-    encoding = tiktoken.get_encoding("cl100k_base")
+    encoding = get_encoding()
     tokens = encoding.encode(text)
     
     chunks = []
@@ -80,7 +159,7 @@ def generate_embedding(text):
     
     for attempt in range(max_retries):
         try:
-            response = client.embeddings.create(
+            response = get_openai_client().embeddings.create(
                 model="text-embedding-ada-002",
                 input=text
             )
@@ -94,131 +173,214 @@ def generate_embedding(text):
                 print(f"Failed to generate embedding after {max_retries} attempts: {str(e)}")
                 raise
 
-def store_article_chunks(article, index, status_callback=None):
+def article_metadata(article, chunk, chunk_index, total_chunks):
+    """Build the vector metadata for a chunk, leaving out missing values, which Pinecone rejects."""
+    metadata = {
+        "url": article.get('URL', ''),
+        "title": article.get('Title', ''),
+        "source_type": article.get('Source_Type', ''),
+        "publication_date": str(article.get('Publication_Date', '')),
+        "authors": article.get('Authors', ''),
+        "journal": article.get('Journal', ''),
+        "doi": article.get('DOI', ''),
+        "abstract": article.get('Abstract', ''),
+        "chunk_index": chunk_index,
+        "total_chunks": total_chunks,
+        "chunk_text": chunk
+    }
+    return {key: value for key, value in metadata.items() if value is not None and value == value}
+
+class UpsertWriter:
+    """
+    Upsert vectors in batches sized by their serialized size, several batches at a time.
+    
+    Batches are closed at UPSERT_MAX_BYTES or UPSERT_MAX_VECTORS and sent with
+    the client's async_req support, which runs them on the index's pool of
+    UPSERT_CONCURRENCY threads. Completed batches are reported from the
+    calling thread, through on_success(ids) or on_failure(ids, error).
+    """
+    
+    def __init__(self, index, on_success, on_failure, max_bytes=None, max_vectors=None, concurrency=None):
+        self.index = index
+        self.on_success = on_success
+        self.on_failure = on_failure
+        self.max_bytes = max_bytes or UPSERT_MAX_BYTES
+        self.max_vectors = max_vectors or UPSERT_MAX_VECTORS
+        self.concurrency = concurrency or UPSERT_CONCURRENCY
+        self.batch = []
+        self.batch_bytes = 0
+        self.in_flight = []
+    
+    def add(self, vector):
+        """Add a vector, sending the current batch first if the vector would not fit."""
+        size = len(json.dumps(vector, separators=(',', ':')))
+        if self.batch and (self.batch_bytes + size > self.max_bytes or len(self.batch) >= self.max_vectors):
+            self.flush()
+        self.batch.append(vector)
+        self.batch_bytes += size
+    
+    def flush(self):
+        """Send the current batch, waiting for the oldest one if all threads are busy."""
+        if not self.batch:
+            return
+        while len(self.in_flight) >= self.concurrency:
+            self._wait_oldest()
+        ids = [vector["id"] for vector in self.batch]
+        try:
+            self.in_flight.append((ids, self.index.upsert(vectors=self.batch, async_req=True)))
+        except Exception as e:
+            self.on_failure(ids, e)
+        self.batch = []
+        self.batch_bytes = 0
+    
+    def _wait_oldest(self):
+        ids, result = self.in_flight.pop(0)
+        try:
+            result.get()
+            self.on_success(ids)
+        except Exception as e:
+            self.on_failure(ids, e)
+    
+    def close(self):
+        """Send the last batch and wait for every batch to finish."""
+        self.flush()
+        while self.in_flight:
+            self._wait_oldest()
+
+def store_article_chunks(article, index, status_callback=None, manifest_path=None):
     """
     Process an article, chunk its content, generate embeddings, and store in Pinecone.
     
+    Progress is recorded per chunk in the ingestion manifest: embeddings are
+    saved as soon as they are generated and chunks are marked once upserted.
+    Calling this again for the same article only embeds and upserts the
+    chunks that are not stored yet. Upserts run in the background through
+    UpsertWriter while the following chunks are embedded. Vector ids are derived from the URL and
+    chunk index, so a repeated upsert overwrites instead of duplicating.
+    
     Args:
         article (dict): Article data including URL, Title, Summary, etc.
         index: Pinecone index
         status_callback (function, optional): Callback function for status updates
+        manifest_path (str, optional): Manifest database file
     
     Returns:
         int: Number of chunks stored
+    
+    Raises:
+        RuntimeError: If some chunks could not be stored after INGESTION_MAX_ATTEMPTS rounds
     """
+    # Extract content from article - use full Content instead of Summary
+    content = article.get('Content', '')
+    
+    # If Content is not available, fall back to Summary
+    if not content or content != content:
+        content = article.get('Summary', '')
+    
+    # Log article details for debugging
+    print(f"Processing article: {article.get('Title', 'Unknown')}")
+    print(f"URL: {article.get('URL', 'No URL')}")
+    print(f"Content length: {len(content) if content else 0} characters")
+    
+    # If content is too short, skip
+    if not content or len(content) < 100:
+        print(f"Content too short for article: {article.get('Title', 'Unknown')}")
+        if status_callback:
+            status_callback(f"Skipping article (content too short): {article.get('Title', 'Unknown')}", 100)
+        return 0
+    
+    # Chunk the content
+    chunks = chunk_text(content)
+    print(f"Created {len(chunks)} chunks from article")
+    
+    if status_callback:
+        status_callback(f"Chunking article: {article.get('Title', 'Unknown')} ({len(chunks)} chunks)", 0)
+    
+    url = article.get('URL', '')
+    conn = get_manifest_connection(manifest_path)
     try:
-        # Extract content from article - use full Content instead of Summary
-        content = article.get('Content', '')
+        states, stale_ids = sync_article(conn, url, chunks, content_hash(content))
+        if stale_ids:
+            # The article got shorter since it was last stored; the manifest keeps
+            # the stale chunks until their vectors are gone
+            index.delete(ids=stale_ids)
+            remove_chunks(conn, stale_ids)
         
-        # If Content is not available, fall back to Summary
-        if not content:
-            content = article.get('Summary', '')
+        vector_ids = {i: make_vector_id(url, i) for i in range(len(chunks))}
+        chunk_indexes = {vector_id: i for i, vector_id in vector_ids.items()}
         
-        # Log article details for debugging
-        print(f"Processing article: {article.get('Title', 'Unknown')}")
-        print(f"URL: {article.get('URL', 'No URL')}")
-        print(f"Content length: {len(content) if content else 0} characters")
+        def make_vector(i, embedding):
+            return {
+                "id": vector_ids[i],
+                "values": embedding,
+                "metadata": article_metadata(article, chunks[i], i, len(chunks))
+            }
         
-        # If content is too short, skip
-        if not content or len(content) < 100:
-            print(f"Content too short for article: {article.get('Title', 'Unknown')}")
+        def on_upserted(ids):
+            mark_upserted(conn, ids)
+            for vector_id in ids:
+                states[chunk_indexes[vector_id]] = UPSERTED
             if status_callback:
-                status_callback(f"Skipping article (content too short): {article.get('Title', 'Unknown')}", 100)
-            return 0
-        
-        # Chunk the content
-        chunks = chunk_text(content)
-        print(f"Created {len(chunks)} chunks from article")
+                stored = sum(state == UPSERTED for state in states.values())
+                status_callback(f"Stored {stored}/{len(chunks)} vectors", 100)
         
-        if status_callback:
-            status_callback(f"Chunking article: {article.get('Title', 'Unknown')} ({len(chunks)} chunks)", 0)
+        upsert_errors = []
         
-        # Prepare vectors for upsert
-        vectors = []
+        def on_failed(ids, error):
+            print(f"Error upserting batch of {len(ids)} vectors: {str(error)}")
+            mark_failed(conn, ids, error)
+            upsert_errors.append(error)
         
-        for i, chunk in enumerate(chunks):
-            if status_callback:
-                status_callback(f"Processing chunk {i+1}/{len(chunks)}", (i+1)/len(chunks)*100)
+        retry_delay = INGESTION_RETRY_DELAY
+        for attempt in range(INGESTION_MAX_ATTEMPTS):
+            upsert_errors.clear()
+            writer = UpsertWriter(index, on_upserted, on_failed)
             
-            # Generate embedding
-            try:
-                embedding = generate_embedding(chunk)
-                
-                # Create metadata
-                metadata = {
-                    "url": article.get('URL', ''),
-                    "title": article.get('Title', ''),
-                    "source_type": article.get('Source_Type', ''),
-                    "publication_date": str(article.get('Publication_Date', '')),
-                    "authors": article.get('Authors', ''),
-                    "journal": article.get('Journal', ''),
-                    "doi": article.get('DOI', ''),
-                    "abstract": article.get('Abstract', ''),
-                    "chunk_index": i,
-                    "total_chunks": len(chunks),
-                    "chunk_text": chunk
-                }
-                
-                # Create vector ID
-                vector_id = f"{uuid.uuid4()}"
-                
-                # Add to vectors list
-                vectors.append({
-                    "id": vector_id,
-                    "values": embedding,
-                    "metadata": metadata
-                })
-                
-            except Exception as e:
-                print(f"Error processing chunk {i}: {str(e)}")
-                if status_callback:
-                    status_callback(f"Error processing chunk {i}: {str(e)}", (i+1)/len(chunks)*100)
-    except Exception as e:
-        print(f"Error in store_article_chunks: {str(e)}")
-        if status_callback:
-            status_callback(f"Error processing article: {str(e)}", 100)
-        return 0
-    
-    # Upsert vectors to Pinecone
-    if vectors:
-        try:
-            print(f"Upserting {len(vectors)} vectors to Pinecone")
+            # Chunks embedded by an interrupted earlier run go first
+            embedded = [i for i, state in states.items() if state == EMBEDDED]
+            embeddings = load_embeddings(conn, [vector_ids[i] for i in embedded])
+            for i in embedded:
+                writer.add(make_vector(i, embeddings[vector_ids[i]]))
             
-            # Upsert in batches of 100
-            batch_size = 100
-            for i in range(0, len(vectors), batch_size):
-                batch = vectors[i:i+batch_size]
+            # Embed the remaining chunks; their upserts run while the next chunks are embedded
+            pending = [i for i, state in states.items() if state == PENDING]
+            for n, i in enumerate(pending):
+                if status_callback:
+                    status_callback(f"Embedding chunk {i+1}/{len(chunks)}", (n+1)/len(pending)*100)
                 try:
-                    index.upsert(vectors=batch)
-                    print(f"Successfully upserted batch {i//batch_size + 1}/{(len(vectors)-1)//batch_size + 1}")
-                    
-                    if status_callback:
-                        status_callback(f"Stored {min(i+batch_size, len(vectors))}/{len(vectors)} vectors", 100)
+                    embedding = generate_embedding(chunks[i])
+                    save_embedding(conn, vector_ids[i], embedding)
+                    states[i] = EMBEDDED
+                    writer.add(make_vector(i, embedding))
                 except Exception as e:
-                    print(f"Error upserting batch {i//batch_size + 1}: {str(e)}")
-                    if status_callback:
-                        status_callback(f"Error upserting batch: {str(e)}", 100)
-                    # Continue with next batch instead of failing completely
+                    print(f"Error processing chunk {i}: {str(e)}")
+                    mark_failed(conn, [vector_ids[i]], e)
+            writer.close()
             
-            # Add a small delay to ensure vectors are indexed
-            time.sleep(2)
-            
-            return len(vectors)
-        except Exception as e:
-            print(f"Error upserting vectors to Pinecone: {str(e)}")
-            if status_callback:
-                status_callback(f"Error upserting vectors: {str(e)}", 100)
-            return 0
+            remaining = sum(state != UPSERTED for state in states.values())
+            if not remaining:
+                break
+            if attempt < INGESTION_MAX_ATTEMPTS - 1:
+                print(f"{remaining} chunks not stored yet, retrying in {retry_delay}s")
+                time.sleep(retry_delay)
+                retry_delay *= 2
+    finally:
+        conn.close()
     
-    return 0
+    if remaining:
+        # The last upsert error tells callers whether the index connection failed
+        raise RuntimeError(
+            f"{remaining} of {len(chunks)} chunks could not be stored; retry to store only the missing chunks"
+        ) from (upsert_errors[-1] if upsert_errors else None)
+    return len(chunks)
 
-def query_similar_chunks(query_text, index, top_k=5):
+def query_similar_chunks(query_text, index=None, top_k=5):
     """
     Query Pinecone for chunks similar to the query text.
     
     Args:
         query_text (str): Query text
-        index: Pinecone index
+        index: Pinecone index, defaults to the shared handle from get_pinecone_index()
         top_k (int): Number of results to return
     
     Returns:
@@ -229,11 +391,12 @@ def query_similar_chunks(query_text, index, top_k=5):
         query_embedding = generate_embedding(query_text)
         
         # Query Pinecone
-        results = index.query(
+        query = lambda idx: idx.query(
             vector=query_embedding,
             top_k=top_k,
             include_metadata=True
         )
+        results = query(index) if index is not None else with_pinecone_index(query)
         
         # Extract results
         matches = []
@@ -248,13 +411,13 @@ def query_similar_chunks(query_text, index, top_k=5):
         print(f"Error querying Pinecone: {str(e)}")
         return []
 
-def get_relevant_context(query, index, max_tokens=1500):
+def get_relevant_context(query, index=None, max_tokens=1500):
     """
     Get relevant context for a query from Pinecone.
     
     Args:
         query (str): Query text
-        index: Pinecone index
+        index: Pinecone index, defaults to the shared handle from get_pinecone_index()
         max_tokens (int): Maximum number of tokens to include in context
     
     Returns: